@@ -1,7 +1,7 @@
-#   HV-7 CONDOR  |  QuantConnect Lean (Python)  |  SPY 7-DTE IV-filtered iron-condor engine
+#   HV-7 CONDOR  |  QuantConnect Lean (Python)  |  SPY/QQQ/IWM 7-DTE IV-filtered iron-condor engine
 #
 #   ✔ 20-δ shorts, $5 wings            ✔ Mon/Wed 15:40 ET entry
-#   ✔ VIX > 18  &  1-year IV-rank ≥40  ✔ Profit-target = 50 % credit
+#   ✔ Vol-index ≥ min & IV-rank ≥40    ✔ Profit-target = 50 % credit
 #   ✔ Max-loss = 1.5× credit           ✔ Roll/stop if short-strike Δ > 0.30
 #   ✔ Portfolio risk cap = 35 %        ✔ Auto-close ≥2 days before expiry
 #
@@ -9,23 +9,38 @@
 #
 from AlgorithmImports import *
 import numpy as np
+import json
+from statistics import NormalDist
 
 class HV7Condor(QCAlgorithm):
 
     # -------- CONFIG --------------------------------------------------------
-    UNDERLYING      = "SPY"
-    RISK_CAP        = 0.35            # ≤ 35 % portfolio at risk
-    DTE_MIN, DTE_MAX = 6, 8           # 7-DTE window
+    # underlying → (CBOE volatility index, minimum index level for entry)
+    UNDERLYINGS     = {"SPY": ("VIX", 18.0),
+                       "QQQ": ("VXN", 22.0),
+                       "IWM": ("RVX", 22.0)}
+    RISK_CAP        = 0.35            # ≤ 35 % portfolio at risk (whole basket)
+    DTE_MIN, DTE_MAX = 5, 6           # 7-DTE window, in NYSE trading days
+    EXIT_DTE        = 2               # time exit at ≤ 2 trading days to expiry
+    ENTRY_WEEKDAYS  = (0, 2)          # Mon/Wed; a holiday moves entry to the next session
     SHORT_DELTA     = 0.20            # target abs(Δ) for short legs
+    SMILE_STRIKES   = True            # shorts from a per-expiry smile fit, not per-contract greeks
+    SMILE_BAND      = 0.20            # |log-moneyness| of the OTM quotes in the fit
     WING_WIDTH      = 5               # $5-wide wings
-    VIX_MIN         = 18.0            # VIX filter
     IVR_MIN         = 0.40            # 40 % IV-rank filter
+    IVR_LOOKBACK    = 252             # 1-yr daily vol-index window for IV-rank
     CREDIT_TARGET   = 0.30            # want ≥30 % of width
     PROFIT_TGT_PCT  = 0.50            # 50 % profit-take
     LOSS_STOP_MULT  = 1.50            # 1.5× credit stop
     DELTA_ROLL_TRIG = 0.30            # roll if |Δshort| > 0.30
+    ROLL            = True            # re-open new strikes in the bar a delta breach closes
     MANAGE_HOUR     = 15              # daily management time
     MANAGE_MINUTE   = 50
+    STRESS_LOSS_CAP = None            # cap worst stress-grid book loss at this equity fraction (None = off)
+    STRESS_SPOT     = (-0.05, -0.03, -0.01, 0.0, 0.01, 0.03, 0.05)   # correlated spot gaps
+    STRESS_VOL      = (0.0, 0.05, 0.10, 0.20)                       # IV-point shifts
+    STRESS_DAYS     = (0, 1)                                        # days forward
+    EVENTS_KEY      = "hv7/events.ndjson"   # ObjectStore key of the structured event log
 
     # -----------------------------------------------------------------------
     def Initialize(self):
@@ -35,23 +50,36 @@ class HV7Condor(QCAlgorithm):
         self.SetTimeZone("America/New_York")
         self.Settings.EnableGreekApproximation = True
 
-        # Underlying & option chain
-        self.spy = self.AddEquity(self.UNDERLYING, Resolution.Minute).Symbol
-        opt = self.AddOption(self.UNDERLYING, Resolution.Minute)
-        opt.SetFilter(self.UniverseFunc)
-        self.opt_symbol = opt.Symbol
+        # Underlyings, option chains & vol indexes: row i of every array is tickers[i]
+        self.tickers = list(self.UNDERLYINGS)
+        self.opt_symbols, self.vol_symbols = [], []
+        for ticker, (vol_index, _) in self.UNDERLYINGS.items():
+            self.AddEquity(ticker, Resolution.Minute)
+            opt = self.AddOption(ticker, Resolution.Minute)
+            opt.SetFilter(self.UniverseFunc)
+            self.opt_symbols.append(opt.Symbol)
+            self.vol_symbols.append(self.AddData(CBOE, vol_index, Resolution.Daily).Symbol)
+        self.vol_min = np.array([vol_min for _, vol_min in self.UNDERLYINGS.values()])
+        self.quotes = QuoteSnapshot(self)   # per-bar bid/ask/greeks arrays for every chain
 
-        # VIX index (for filter & IV-rank proxy)
-        self.vix = self.AddData(CBOE, "VIX", Resolution.Daily).Symbol
-        self.SetWarmup(timedelta(days=252))  # need 1-yr history for IV-rank proxy
+        # Seed the 1-yr IV-rank windows from daily vol-index bars only; a SetWarmup
+        # here would stream a year of minute equity/option data just to fill them.
+        self.vol_hist = np.full((len(self.tickers), self.IVR_LOOKBACK), np.nan)   # oldest → newest
+        hist = self.History(self.vol_symbols, self.IVR_LOOKBACK, Resolution.Daily)
+        for i, sym in enumerate(self.vol_symbols):
+            if not hist.empty and sym in hist.index.get_level_values(0):
+                closes = hist.loc[sym]["close"].values[-self.IVR_LOOKBACK:]
+                self.vol_hist[i, self.IVR_LOOKBACK - len(closes):] = closes
 
         # Containers
-        self.condors = {}     # key: ticket-id → dict(details)
-        self.next_trade_day = None
+        self.condors = {}     # key: ticket-id → dict(details), whole basket
+        self.events = []      # skip/open/exit records, saved as NDJSON at the end (see events.py)
+        self.ladders = {}     # (ticker, expiry) → {right: (strikes, symbols)} sorted by strike
+        self.BuildCalendar()
 
-        # Schedule entry (Mon & Wed 15:40 ET) and daily management
+        # Schedule entry (Mon & Wed 15:40 ET, holiday-shifted) and daily management
         self.Schedule.On(
-            self.DateRules.Every(DayOfWeek.Monday, DayOfWeek.Wednesday),
+            self.DateRules.EveryDay(self.tickers[0]),
             self.TimeRules.At(15, 40),
             self.OpenCondor
         )
@@ -63,40 +91,69 @@ class HV7Condor(QCAlgorithm):
 
     # -------- OPTION UNIVERSE FILTER ---------------------------------------
     def UniverseFunc(self, universe: OptionFilterUniverse):
+        today = self.Time.date()
         return (universe
                 .WeeklysOnly()
                 .Strikes(-30, 30)
-                .Expiration(self.DTE_MIN, self.DTE_MAX))
+                .Expiration(0, self.DTE_MAX * 2 + 4)          # calendar-day superset of the window
+                .Contracts(lambda symbols: [s for s in symbols if
+                           self.DTE_MIN <= self.TradingDTE(today, s.ID.Date.date()) <= self.DTE_MAX]))
+
+    # -------- DATA -----------------------------------------------------------
+    def OnData(self, data):
+        for i, sym in enumerate(self.vol_symbols):
+            if data.ContainsKey(sym):
+                self.vol_hist[i, :-1] = self.vol_hist[i, 1:]
+                self.vol_hist[i, -1] = float(data[sym].Close)
 
     # -------- ENTRY --------------------------------------------------------
     def OpenCondor(self):
-        # --- 1) VOLATILITY FILTERS
-        vix_current = self.Securities[self.vix].Price
-        if vix_current < self.VIX_MIN:
-            self.Log(f"SKIP - VIX {vix_current:.1f} < {self.VIX_MIN}")
+        if not self.entry_day[(self.Time.date() - self.cal_origin).days]:
             return
+
+        # --- 1) VOLATILITY FILTERS (whole basket in one pass)
+        vol_now = self.GetVolNow()
         iv_rank = self.GetIVRank()
-        if iv_rank is None or iv_rank < self.IVR_MIN:
-            self.Log(f"SKIP - IV-Rank {iv_rank:.2f} < {self.IVR_MIN}")
-            return
+        vol_ok = vol_now >= self.vol_min
+        ivr_ok = iv_rank >= self.IVR_MIN            # NaN rank never passes
+        for i in range(len(self.tickers)):
+            if not vol_ok[i]:
+                self.Event("skip", self.tickers[i], "vol", vol=vol_now[i], ivr=iv_rank[i])
+            elif not ivr_ok[i]:
+                self.Event("skip", self.tickers[i], "ivr", vol=vol_now[i], ivr=iv_rank[i])
 
-        # --- 2) RISK BUDGET
+        # --- 2) RISK BUDGET (shared by the basket)
         risk_budget = self.Portfolio.TotalPortfolioValue * self.RISK_CAP
         risk_in_use = sum(cd["risk"] for cd in self.condors.values())
         room = risk_budget - risk_in_use
-        if room < self.WING_WIDTH * 100:
-            self.Log("SKIP - Risk cap reached")
-            return
+
+        # richest IV-rank first, so a tight budget goes to the best candidate
+        for i in sorted(np.flatnonzero(vol_ok & ivr_ok), key=lambda i: -iv_rank[i]):
+            if room < self.WING_WIDTH * 100:
+                self.Event("skip", self.tickers[i], "risk", vol=vol_now[i], ivr=iv_rank[i])
+                continue
+            room -= self.OpenUnderlying(i, room, iv_rank[i])
+
+    def OpenUnderlying(self, i, room, iv_rank):
+        """Open one condor on tickers[i] within room; returns the risk it used."""
+        ticker = self.tickers[i]
 
         # --- 3) CHAIN SELECTION
-        chain = self.CurrentSlice.OptionChains.get(self.opt_symbol)
+        chain = self.CurrentSlice.OptionChains.get(self.opt_symbols[i])
         if not chain:
-            self.Log("No chain yet")
-            return
+            self.Event("skip", ticker, "chain", ivr=iv_rank)
+            return 0
 
         # pick nearest expiry in window
         expiry = sorted(chain, key=lambda x: x.Expiry)[0].Expiry
         chain = [c for c in chain if c.Expiry == expiry]
+        self.Ladder(i, expiry, chain)       # cached for smile picks and same-bar rolls
+
+        # smile fit from quotes → shorts by delta-to-strike inversion on the ladder
+        fit = self.FitSmile(i, expiry) if self.SMILE_STRIKES else None
+        picked = self.LadderLegs(i, expiry, fit) if fit is not None else None
+        if picked is not None:
+            return self.PlaceCondor(i, expiry, *picked, room, iv_rank)
 
         # greeks may not yet be populated immediately after warm-up
         candidates = [c for c in chain if c.Greeks.Delta is not None]
@@ -108,53 +165,73 @@ class HV7Condor(QCAlgorithm):
                          key=lambda c: abs(c.Greeks.Delta - self.SHORT_DELTA),
                          default=None)
         if not (short_put and short_call):
-            self.Log("SKIP - could not find 20-δ shorts")
-            return
+            self.Event("skip", ticker, "strikes", ivr=iv_rank)
+            return 0
 
         # wings
-        wing_put  = self.GetContract(candidates, short_put.Strike  - self.WING_WIDTH,  OptionRight.Put, expiry)
-        wing_call = self.GetContract(candidates, short_call.Strike + self.WING_WIDTH, OptionRight.Call, expiry)
+        wing_put  = self.GetContract(chain, short_put.Strike  - self.WING_WIDTH,  OptionRight.Put, expiry)
+        wing_call = self.GetContract(chain, short_call.Strike + self.WING_WIDTH, OptionRight.Call, expiry)
         if not (wing_put and wing_call):
-            self.Log("SKIP - missing wing strikes")
-            return
+            self.Event("skip", ticker, "strikes", ivr=iv_rank)
+            return 0
+
+        legs = [wing_put.Symbol, short_put.Symbol, short_call.Symbol, wing_call.Symbol]
+        strikes = [wing_put.Strike, short_put.Strike, short_call.Strike, wing_call.Strike]
+        return self.PlaceCondor(i, expiry, legs, strikes, room, iv_rank)
+
+    def PlaceCondor(self, i, expiry, legs, strikes, room, iv_rank):
+        """Size and sell a condor on tickers[i] (legs wing put → wing call); returns the risk it used."""
+        ticker = self.tickers[i]
 
         # --- 4) CREDIT & POSITION SIZE
-        condor = OptionStrategyFactory.CreateIronCondor(self.opt_symbol,
-                                                        short_put.Strike,  wing_put.Strike,
-                                                        short_call.Strike, wing_call.Strike,
+        condor = OptionStrategyFactory.CreateIronCondor(self.opt_symbols[i],
+                                                        strikes[1], strikes[0],
+                                                        strikes[2], strikes[3],
                                                         expiry)
         quote = self.OptionStrategyPrice(condor)
         if quote is None:
-            self.Log("Quote unavailable")
-            return
-        credit = quote.AskPrice   # we SELL the condor; use ask (worst case)
+            self.Event("skip", ticker, "quote", ivr=iv_rank)
+            return 0
+        credit = quote            # we SELL the condor; shorts marked at ask (worst case)
         if credit < self.WING_WIDTH * self.CREDIT_TARGET:
-            self.Log(f"SKIP - Credit {credit:.2f} < target {self.WING_WIDTH*self.CREDIT_TARGET:.2f}")
-            return
+            self.Event("skip", ticker, "credit", ivr=iv_rank, credit=credit)
+            return 0
 
         risk_per_condor = (self.WING_WIDTH-credit) * 100   # max loss per 1-lot
         qty = int(room // risk_per_condor)
         if qty == 0: qty = 1
+        if self.STRESS_LOSS_CAP is not None:
+            qty = min(qty, self.StressQuantity(i, legs, strikes, expiry))
+            if qty == 0:
+                self.Event("skip", ticker, "stress", ivr=iv_rank, credit=credit)
+                return 0
         order = self.Sell(condor, qty)
         if order.Status != OrderStatus.Submitted:
-            self.Log("Order not submitted")
-            return
+            self.Event("skip", ticker, "unfilled", ivr=iv_rank, credit=credit)
+            return 0
 
         # store
         self.condors[order.Id] = {
+            "underlying": ticker,
             "strategy": condor,
             "qty": qty,
             "credit": credit,
             "risk": risk_per_condor*qty,
             "expiry": expiry,
-            "short_put": short_put.Symbol,
-            "short_call": short_call.Symbol
+            "short_put": legs[1],
+            "short_call": legs[2],
+            "legs": legs,
+            "strikes": strikes
         }
-        self.Log(f"OPEN  condor {order.Id}: credit {credit:.2f} ×{qty}  IVR={iv_rank:.2f}")
+        self.Log(f"OPEN  {ticker} condor {order.Id}: credit {credit:.2f} ×{qty}  IVR={iv_rank:.2f}")
+        self.Event("open", ticker, id=order.Id, qty=qty, credit=credit, ivr=iv_rank,
+                   vol=self.GetVolNow()[i], strikes=[float(k) for k in strikes])
+        return risk_per_condor * qty
 
     # -------- DAILY MANAGEMENT ---------------------------------------------
     def ManagePositions(self):
         close_ids = []
+        rolls = []
         open_ids  = list(self.condors.keys())
 
         for oid in open_ids:
@@ -162,49 +239,204 @@ class HV7Condor(QCAlgorithm):
             strat_price = self.OptionStrategyPrice(cd["strategy"])
             if strat_price is None:
                 continue
+            r = (cd["credit"] - strat_price) * 100 * cd["qty"] / cd["risk"]   # R if closed now
 
             # profit-take
             if strat_price <= cd["credit"] * self.PROFIT_TGT_PCT:
                 self.Buy(cd["strategy"], cd["qty"])
                 close_ids.append(oid)
-                self.Log(f"TP   condor {oid}  closed at {strat_price:.2f}")
+                self.Log(f"TP   {cd['underlying']} condor {oid}  closed at {strat_price:.2f}  R={r:+.3f}")
+                self.Exit(oid, "tp", strat_price, r)
                 continue
 
             # stop-loss
             if strat_price >= cd["credit"] * self.LOSS_STOP_MULT:
                 self.Buy(cd["strategy"], cd["qty"])
                 close_ids.append(oid)
-                self.Log(f"SL   condor {oid}  closed at {strat_price:.2f}")
+                self.Log(f"SL   {cd['underlying']} condor {oid}  closed at {strat_price:.2f}  R={r:+.3f}")
+                self.Exit(oid, "sl", strat_price, r)
                 continue
 
-            # time exit (≥2 days to expiry)
-            if (cd["expiry"] - self.Time).days <= 2:
+            # time exit (≤ EXIT_DTE trading days to expiry)
+            if self.TradingDTE(self.Time.date(), cd["expiry"].date()) <= self.EXIT_DTE:
                 self.Buy(cd["strategy"], cd["qty"])
                 close_ids.append(oid)
-                self.Log(f"T-exit condor {oid}")
+                self.Log(f"T-exit {cd['underlying']} condor {oid}  R={r:+.3f}")
+                self.Exit(oid, "time", strat_price, r)
                 continue
 
             # delta-based roll
-            sp = self.Securities[cd["short_put"]]
-            sc = self.Securities[cd["short_call"]]
-            if (abs(sp.Greeks.Delta) > self.DELTA_ROLL_TRIG or
-                abs(sc.Greeks.Delta) > self.DELTA_ROLL_TRIG):
+            slots = self.quotes.Gather([cd["short_put"], cd["short_call"]])
+            if slots is not None and np.any(np.abs(self.quotes.delta[slots]) > self.DELTA_ROLL_TRIG):
                 self.Buy(cd["strategy"], cd["qty"])
                 close_ids.append(oid)
-                self.Log(f"ROLL condor {oid}  (Δ hit); will open new condor next entry window")
+                self.Log(f"ROLL {cd['underlying']} condor {oid}  (Δ hit) R={r:+.3f}")
+                self.Exit(oid, "roll", strat_price, r)
+                if self.ROLL:
+                    rolls.append((self.tickers.index(cd["underlying"]), cd["expiry"]))
 
         # cleanup dictionary
         for oid in close_ids:
             self.condors.pop(oid, None)
 
+        # replacements go in with the closes, after every exit has freed its risk
+        for i, expiry in rolls:
+            self.Roll(i, expiry)
+        self.ladders = {}     # rebuilt next session, so later listings reach rolls
+
+    # -------- ROLLS ---------------------------------------------------------
+    def Ladder(self, i, expiry, chain=None):
+        """Strike-sorted (strikes, symbols) per right of one expiry, cached for the session."""
+        key = (self.tickers[i], expiry)
+        if key not in self.ladders:
+            if chain is None:
+                chain = [c for c in (self.CurrentSlice.OptionChains.get(self.opt_symbols[i]) or [])
+                         if c.Expiry == expiry]
+            ladder = {}
+            for right in (OptionRight.Put, OptionRight.Call):
+                contracts = sorted((c for c in chain if c.Right == right), key=lambda c: c.Strike)
+                ladder[right] = (np.array([c.Strike for c in contracts], dtype=float),
+                                 [c.Symbol for c in contracts])
+            self.ladders[key] = ladder
+        return self.ladders[key]
+
+    def FitSmile(self, i, expiry):
+        """Quadratic IV smile in log-moneyness from the ladder's OTM quotes: (coef, lo, hi, spot, years) or None."""
+        spot = self.Securities[self.tickers[i]].Price
+        years = (expiry + timedelta(hours=16) - self.Time).total_seconds() / (365 * 86400)
+        if not spot or years <= 0:
+            return None
+        ks, vols = [], []
+        for right in (OptionRight.Put, OptionRight.Call):
+            strikes, symbols = self.Ladder(i, expiry)[right]
+            slots = self.quotes.Lookup(symbols)
+            quoted = slots >= 0
+            bid, ask, iv = (np.where(quoted, col[slots], np.nan)
+                            for col in (self.quotes.bid, self.quotes.ask, self.quotes.iv))
+            k = np.log(strikes / spot)
+            put = right == OptionRight.Put
+            use = quoted & ((strikes < spot) if put else (strikes >= spot)) & (np.abs(k) <= self.SMILE_BAND)
+            with np.errstate(invalid='ignore'):
+                use &= (bid > 0) & (ask >= bid)
+                vol = np.where(iv > 0, iv, ImpliedVol(0.5 * (bid + ask), spot, strikes, years, put))
+                use &= vol > 0
+            ks.append(k[use])
+            vols.append(vol[use])
+        k, vol = np.concatenate(ks), np.concatenate(vols)
+        if len(k) < 5 or k.min() == k.max():
+            return None
+        coef = np.linalg.lstsq(np.stack([np.ones_like(k), k, k * k], axis=1), vol, rcond=None)[0]
+        return coef, k.min(), k.max(), spot, years
+
+    def LadderLegs(self, i, expiry, fit=None):
+        """(legs, strikes) wing put → wing call picked on the cached ladder, else None.
+
+        Shorts are the listed strikes nearest the smile's ±SHORT_DELTA strikes when a
+        fit is given, else the quoted contracts with delta nearest ±SHORT_DELTA.
+        """
+        picked = {}
+        for right, target, side in ((OptionRight.Put, -self.SHORT_DELTA, -1),
+                                    (OptionRight.Call, self.SHORT_DELTA, 1)):
+            strikes, symbols = self.Ladder(i, expiry)[right]
+            slots = self.quotes.Lookup(symbols)
+            if fit is not None and len(strikes) > 1:
+                strike = SmileStrike(fit, target, right == OptionRight.Put)
+                j = int(np.clip(np.searchsorted(strikes, strike), 1, len(strikes) - 1))
+                short = j - 1 if strike - strikes[j - 1] <= strikes[j] - strike else j
+                if slots[short] < 0:
+                    return None
+            else:
+                delta = np.where(slots >= 0, self.quotes.delta[slots], np.nan)
+                if not np.isfinite(delta).any():
+                    return None
+                short = int(np.nanargmin(np.abs(delta - target)))
+            wing = int(np.searchsorted(strikes, strikes[short] + side * self.WING_WIDTH))
+            if (wing >= len(strikes) or abs(strikes[wing] - strikes[short] - side * self.WING_WIDTH) > 1e-6
+                    or slots[wing] < 0):
+                return None
+            picked[right] = (wing, short, symbols, strikes)
+        (pw, ps, p_sym, p_k), (cw, cs, c_sym, c_k) = picked[OptionRight.Put], picked[OptionRight.Call]
+        return [p_sym[pw], p_sym[ps], c_sym[cs], c_sym[cw]], [p_k[pw], p_k[ps], c_k[cs], c_k[cw]]
+
+    def Roll(self, i, expiry):
+        """Re-open a condor on tickers[i] in the bar one expiring at expiry closed on a delta breach."""
+        ticker = self.tickers[i]
+        # the universe lists the entry window's expiries (rolling out); else stay in the breached one
+        chain = self.CurrentSlice.OptionChains.get(self.opt_symbols[i])
+        if chain:
+            expiry = min(c.Expiry for c in chain)
+        elif self.TradingDTE(self.Time.date(), expiry.date()) <= self.EXIT_DTE:
+            self.Event("skip", ticker, "chain")
+            return
+        picked = self.LadderLegs(i, expiry, self.FitSmile(i, expiry) if self.SMILE_STRIKES else None)
+        if picked is None:
+            self.Event("skip", ticker, "strikes")
+            return
+        room = (self.Portfolio.TotalPortfolioValue * self.RISK_CAP
+                - sum(cd["risk"] for cd in self.condors.values()))
+        if room < self.WING_WIDTH * 100:
+            self.Event("skip", ticker, "risk")
+            return
+        self.PlaceCondor(i, expiry, *picked, room, self.GetIVRank()[i])
+
+    # -------- EVENTS --------------------------------------------------------
+    def Event(self, kind, ticker, reason=None, **fields):
+        """Record one structured event (schema in events.py); NaN fields are dropped."""
+        record = {"time": self.Time.strftime("%Y-%m-%dT%H:%M"), "kind": kind, "ticker": ticker}
+        if reason:
+            record["reason"] = reason
+        for key, value in fields.items():
+            if isinstance(value, np.generic):
+                value = value.item()
+            if value is not None and value == value:
+                record[key] = value
+        self.events.append(record)
+
+    def Exit(self, oid, reason, mark, r):
+        """Record the exit of condor oid."""
+        cd = self.condors[oid]
+        self.Event("exit", cd["underlying"], reason, id=oid, qty=cd["qty"],
+                   credit=cd["credit"], mark=mark, r=r)
+
+    def OnEndOfAlgorithm(self):
+        """Save the event log as NDJSON to the ObjectStore."""
+        self.ObjectStore.Save(self.EVENTS_KEY,
+                              "\n".join(json.dumps(e, separators=(",", ":")) for e in self.events) + "\n")
+        self.Log(f"{len(self.events)} events saved to ObjectStore '{self.EVENTS_KEY}'")
+
     # -------- HELPERS -------------------------------------------------------
+    def BuildCalendar(self):
+        """Index the exchange's sessions once: trading DTE and entry days become array lookups."""
+        hours = self.Securities[self.tickers[0]].Exchange.Hours
+        first = self.StartDate.date() - timedelta(days=7)
+        days = [first + timedelta(days=k) for k in range((self.EndDate.date() - first).days + 60)]
+        is_open = np.array([hours.IsDateOpen(datetime(d.year, d.month, d.day)) for d in days])
+        self.cal_origin = first
+        self.session_count = np.cumsum(is_open)         # sessions on or before each calendar day
+        sessions = np.flatnonzero(is_open)
+        scheduled = np.flatnonzero([d.weekday() in self.ENTRY_WEEKDAYS for d in days])
+        moved = np.searchsorted(sessions, scheduled)    # first session on or after each entry weekday
+        self.entry_day = np.zeros(len(days), dtype=bool)
+        self.entry_day[sessions[moved[moved < len(sessions)]]] = True
+
+    def TradingDTE(self, day, expiry):
+        """Sessions after day up to and including expiry."""
+        return int(self.session_count[(expiry - self.cal_origin).days]
+                   - self.session_count[(day - self.cal_origin).days])
+
+    def GetVolNow(self):
+        """Latest vol-index close per underlying (falls back to the seeded window on day one)."""
+        price = np.array([self.Securities[sym].Price for sym in self.vol_symbols], dtype=float)
+        return np.where(price > 0, price, self.vol_hist[:, -1])
+
     def GetIVRank(self):
-        """1-year IV-rank proxy using VIX high/low."""
-        hist = self.History(self.vix, 252, Resolution.Daily)
-        if hist.empty: return None
-        vMin, vMax = hist["close"].min(), hist["close"].max()
-        vNow = self.Securities[self.vix].Price
-        return (vNow - vMin) / (vMax - vMin) if vMax > vMin else None
+        """1-year IV-rank proxy per underlying using vol-index high/low (NaN if undefined)."""
+        seen = ~np.isnan(self.vol_hist)
+        vMin = np.where(seen, self.vol_hist, np.inf).min(axis=1)
+        vMax = np.where(seen, self.vol_hist, -np.inf).max(axis=1)
+        vNow = self.GetVolNow()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(vMax > vMin, (vNow - vMin) / (vMax - vMin), np.nan)
 
     def GetContract(self, chain, strike, right, expiry):
         """Return contract matching strike/right/expiry, else None."""
@@ -215,14 +447,147 @@ class HV7Condor(QCAlgorithm):
                 return c
         return None
 
+    def StressSurface(self, positions):
+        """Book P&L over the STRESS_* grid (spot, vol, days) for [(ticker, legs, strikes, qty, expiry)]."""
+        grid = (len(self.STRESS_SPOT), len(self.STRESS_VOL), len(self.STRESS_DAYS))
+        rows = []
+        for ticker, legs, strikes, qty, expiry in positions:
+            slots = self.quotes.Gather(legs)
+            spot = self.Securities[ticker].Price
+            if slots is None or not spot:
+                continue
+            years = max((expiry + timedelta(hours=16) - self.Time).total_seconds(), 0) / (365 * 86400)
+            rows.append((spot, years, qty, strikes, self.quotes.iv[slots]))
+        if not rows:
+            return np.zeros(grid)
+        spot, years, qty = (np.array([r[k] for r in rows], dtype=float) for k in range(3))
+        strike = np.array([r[3] for r in rows], dtype=float)                  # (m, 4)
+        iv = np.array([r[4] for r in rows], dtype=float)
+        if not np.isfinite(iv).all():
+            return np.full(grid, np.nan)                                      # unpriceable, see StressQuantity
+        put = np.array([True, True, False, False])
+        ratio = np.array([1.0, -1.0, -1.0, 1.0])                              # long wings, short bodies
+        # (m, spot, vol, days, leg) in one evaluation
+        S = spot[:, None, None, None, None] * (1 + np.array(self.STRESS_SPOT))[None, :, None, None, None]
+        V = np.maximum(iv[:, None, None, None, :] + np.array(self.STRESS_VOL)[None, None, :, None, None], 0.01)
+        T = np.maximum(years[:, None, None, None, None] - np.array(self.STRESS_DAYS)[None, None, None, :, None] / 365, 0)
+        value = BlackScholes(S, strike[:, None, None, None, :], T, V, put) @ ratio
+        now = BlackScholes(spot[:, None], strike, years[:, None], np.maximum(iv, 0.01), put) @ ratio
+        return ((value - now[:, None, None, None]) * 100 * qty[:, None, None, None]).sum(axis=0)
+
+    def StressQuantity(self, i, legs, strikes, expiry):
+        """Largest lot count keeping the worst stress-grid loss of book + new condor within the cap."""
+        book = self.StressSurface([(cd["underlying"], cd["legs"], cd["strikes"], cd["qty"], cd["expiry"])
+                                   for cd in self.condors.values()])
+        unit = self.StressSurface([(self.tickers[i], legs, strikes, 1, expiry)])
+        if not (np.isfinite(book).all() and np.isfinite(unit).all()):
+            return 0                                # a leg without IV cannot be held to the cap
+        headroom = book + self.Portfolio.TotalPortfolioValue * self.STRESS_LOSS_CAP
+        if np.any(headroom < 0):
+            return 0
+        losing = unit < 0
+        return int(np.floor((headroom[losing] / -unit[losing]).min())) if losing.any() else 10**9
+
     def OptionStrategyPrice(self, strategy):
         """Return Bid/Ask mark for entire option strategy (average of legs)."""
         legs = [ (leg, qty) for leg, qty in strategy.OptionLegs ]
-        prices = []
-        for leg, qty in legs:
-            sec = self.Securities[leg.Symbol]
-            if not sec.HasData: return None
-            price = sec.AskPrice if qty < 0 else sec.BidPrice   # we sold strategy
-            prices.append(abs(qty) * price)
-        if not prices: return None
-        return sum(prices) / sum(abs(q) for _, q in legs)
\ No newline at end of file
+        if not legs: return None
+        slots = self.quotes.Gather([leg.Symbol for leg, _ in legs])
+        if slots is None: return None
+        qty = np.abs([q for _, q in legs]).astype(float)
+        short = np.array([q < 0 for _, q in legs])
+        prices = np.where(short, self.quotes.ask[slots], self.quotes.bid[slots])   # we sold strategy
+        return float(qty @ prices / qty.sum())
+
+
+# ---------------------------------------------------------------------------
+class QuoteSnapshot:
+    """Bid/ask/mid/greeks of every subscribed option, materialized once per time slice."""
+
+    def __init__(self, algorithm):
+        self.algo = algorithm
+        self.time = None
+        self.slots = {}                  # Symbol → row in the arrays below
+        self.bid = self.ask = self.mid = np.empty(0)
+        self.delta = self.gamma = self.vega = self.theta = self.iv = np.empty(0)
+
+    def Refresh(self):
+        """Rebuild the arrays when the slice time moves; free within the same bar."""
+        if self.time == self.algo.Time:
+            return
+        self.time = self.algo.Time
+
+        greeks = {}
+        chains = self.algo.CurrentSlice.OptionChains.Values if self.algo.CurrentSlice else []
+        for chain in chains:
+            for c in chain:
+                g = c.Greeks
+                greeks[c.Symbol] = (g.Delta, g.Gamma, g.Vega, g.Theta, c.ImpliedVolatility)
+
+        symbols, rows = [], []
+        nan5 = (np.nan,) * 5
+        for symbol, sec in self.algo.Securities.items():
+            if sec.Type != SecurityType.Option or not sec.HasData:
+                continue
+            symbols.append(symbol)
+            rows.append((sec.BidPrice, sec.AskPrice) + tuple(
+                np.nan if v is None else v for v in greeks.get(symbol, nan5)))
+
+        self.slots = {s: i for i, s in enumerate(symbols)}
+        cols = np.array(rows, dtype=float).reshape(-1, 7).T
+        self.bid, self.ask, self.delta, self.gamma, self.vega, self.theta, self.iv = cols
+        self.mid = 0.5 * (self.bid + self.ask)
+
+    def Lookup(self, symbols):
+        """Array of slots for symbols, -1 where unquoted."""
+        self.Refresh()
+        return np.array([self.slots.get(s, -1) for s in symbols], dtype=int)
+
+    def Gather(self, symbols):
+        """Array of slots for symbols, or None if any of them is unquoted."""
+        self.Refresh()
+        try:
+            return np.array([self.slots[s] for s in symbols], dtype=int)
+        except KeyError:
+            return None
+
+
+# ---------------------------------------------------------------------------
+def BlackScholes(spot, strike, years, vol, put):
+    """Vectorized Black-Scholes price (zero rate); expired legs are worth intrinsic."""
+    live = years > 0
+    t = np.where(live, years, 1.0)
+    d1 = (np.log(spot / strike) + 0.5 * vol * vol * t) / (vol * np.sqrt(t))
+    d2 = d1 - vol * np.sqrt(t)
+    call = np.where(live, spot * NormCdf(d1) - strike * NormCdf(d2), np.maximum(spot - strike, 0.0))
+    return np.where(put, call - spot + strike, call)     # put-call parity
+
+def ImpliedVol(price, spot, strike, years, put, lo=1e-4, hi=5.0, iterations=50):
+    """Vectorized bisection for the Black-Scholes vol matching price (NaN if out of range)."""
+    price, strike = np.asarray(price, dtype=float), np.asarray(strike, dtype=float)
+    low, high = np.full(price.shape, lo), np.full(price.shape, hi)
+    with np.errstate(invalid='ignore'):
+        ok = (price > BlackScholes(spot, strike, years, lo, put)) & (price < BlackScholes(spot, strike, years, hi, put))
+    for _ in range(iterations):
+        mid = 0.5 * (low + high)
+        above = BlackScholes(spot, strike, years, mid, put) > price
+        high, low = np.where(above, mid, high), np.where(above, low, mid)
+    return np.where(ok, 0.5 * (low + high), np.nan)
+
+def SmileStrike(fit, delta, put, iterations=4):
+    """Strike whose delta on the fitted smile is delta: k = σ²t/2 − σ√t·N⁻¹(Δ), iterated through σ(k)."""
+    coef, lo, hi, spot, years = fit
+    z = NormalDist().inv_cdf(1.0 + delta if put else delta)
+    k = 0.0
+    for _ in range(iterations):
+        x = min(max(k, lo), hi)
+        vol = max(coef[0] + coef[1] * x + coef[2] * x * x, 0.01)
+        k = 0.5 * vol * vol * years - vol * np.sqrt(years) * z
+    return spot * np.exp(k)
+
+def NormCdf(x):
+    """Standard normal CDF (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7)."""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return 0.5 * (1.0 + np.sign(x) * (1.0 - poly * np.exp(-z * z)))
@@ -9,23 +9,29 @@
 #
 from AlgorithmImports import *
 import numpy as np
+import math
+import json
 
 class IronCondorTest(QCAlgorithm):
 
     # -------- CONFIG --------------------------------------------------------
     UNDERLYING      = "SPY"
     RISK_CAP        = 0.35            # ≤ 35 % portfolio at risk
-    DTE_MIN, DTE_MAX = 6, 8           # 7-DTE window
+    DTE_MIN, DTE_MAX = 5, 6           # 7-DTE window, in NYSE trading days
+    EXIT_DTE        = 2               # time exit at ≤ 2 trading days to expiry
+    ENTRY_WEEKDAYS  = (0, 2)          # Mon/Wed; a holiday moves entry to the next session
     SHORT_DELTA     = 0.20            # target abs(Δ) for short legs
     WING_WIDTH      = 5               # $5-wide wings
     VIX_MIN         = 18.0            # VIX filter
     IVR_MIN         = 0.40            # 40 % IV-rank filter
+    IVR_LOOKBACK    = 252             # 1-yr daily VIX window for IV-rank
     CREDIT_TARGET   = 0.30            # want ≥30 % of width
     PROFIT_TGT_PCT  = 0.50            # 50 % profit-take
     LOSS_STOP_MULT  = 1.50            # 1.5× credit stop
     DELTA_ROLL_TRIG = 0.30            # roll if |Δshort| > 0.30
     MANAGE_HOUR     = 15              # daily management time
     MANAGE_MINUTE   = 50
+    EVENTS_KEY      = "ironcondortest/events.ndjson"   # ObjectStore key of the structured event log
 
     # -----------------------------------------------------------------------
     def initialize(self):
@@ -39,18 +45,26 @@ class IronCondorTest(QCAlgorithm):
         opt = self.add_option(self.UNDERLYING, Resolution.MINUTE)
         opt.set_filter(self.universe_func)
         self.opt_symbol = opt.symbol
+        self.quotes = QuoteSnapshot(self, self.opt_symbol)   # per-bar bid/ask/greeks arrays
 
         # VIX index (for filter & IV-rank proxy)
         self.vix = self.add_data(CBOE, "VIX", Resolution.DAILY).symbol
-        self.set_warm_up(timedelta(days=252))  # need 1-yr history for IV-rank proxy
+        # Seed the 1-yr IV-rank window from daily VIX bars only; a set_warm_up here
+        # would stream a year of minute SPY/option data just to fill it.
+        self.vix_window = RollingWindow[float](self.IVR_LOOKBACK)
+        hist = self.history(self.vix, self.IVR_LOOKBACK, Resolution.DAILY)
+        if not hist.empty:
+            for close in hist["close"]:
+                self.vix_window.add(float(close))
 
         # Containers
         self.condors = {}     # key: condor-id → dict(details)
-        self.next_trade_day = None
+        self.events = []      # skip/open/exit records, saved as NDJSON at the end (see events.py)
+        self.build_calendar()
 
-        # Schedule entry (Mon & Wed 15:40 ET) and daily management
+        # Schedule entry (Mon & Wed 15:40 ET, holiday-shifted) and daily management
         self.schedule.on(
-            self.date_rules.every(DayOfWeek.MONDAY, DayOfWeek.WEDNESDAY),
+            self.date_rules.every_day(self.spy),
             self.time_rules.at(15, 40),
             self.open_condor
         )
@@ -62,21 +76,32 @@ class IronCondorTest(QCAlgorithm):
 
     # -------- OPTION UNIVERSE FILTER ---------------------------------------
     def universe_func(self, universe):
+        today = self.time.date()
         return (universe
                 .weeklys_only()
                 .strikes(-30, 30)
-                .expiration(self.DTE_MIN, self.DTE_MAX))
+                .expiration(0, self.DTE_MAX * 2 + 4)          # calendar-day superset of the window
+                .contracts(lambda symbols: [s for s in symbols if
+                           self.DTE_MIN <= self.trading_dte(today, s.id.date.date()) <= self.DTE_MAX]))
+
+    # -------- DATA -----------------------------------------------------------
+    def on_data(self, data):
+        if data.contains_key(self.vix):
+            self.vix_window.add(float(data[self.vix].close))
 
     # -------- ENTRY --------------------------------------------------------
     def open_condor(self):
+        if not self.entry_day[(self.time.date() - self.cal_origin).days]:
+            return
+
         # --- 1) VOLATILITY FILTERS
-        vix_current = self.securities[self.vix].price
+        vix_current = self.get_vix()
         if vix_current < self.VIX_MIN:
-            self.log(f"SKIP - VIX {vix_current:.1f} < {self.VIX_MIN}")
+            self.event("skip", "vol", vol=vix_current)
             return
         iv_rank = self.get_iv_rank()
         if iv_rank is None or iv_rank < self.IVR_MIN:
-            self.log(f"SKIP - IV-Rank {iv_rank:.2f} < {self.IVR_MIN}")
+            self.event("skip", "ivr", vol=vix_current, ivr=iv_rank)
             return
 
         # --- 2) RISK BUDGET
@@ -84,13 +109,13 @@ class IronCondorTest(QCAlgorithm):
         risk_in_use = sum(cd["risk"] for cd in self.condors.values())
         room = risk_budget - risk_in_use
         if room < self.WING_WIDTH * 100:
-            self.log("SKIP - Risk cap reached")
+            self.event("skip", "risk", vol=vix_current, ivr=iv_rank)
             return
 
         # --- 3) CHAIN SELECTION
         chain = self.current_slice.option_chains.get(self.opt_symbol)
         if not chain:
-            self.log("No chain yet")
+            self.event("skip", "chain", vol=vix_current, ivr=iv_rank)
             return
 
         # pick nearest expiry in window
@@ -107,14 +132,14 @@ class IronCondorTest(QCAlgorithm):
                          key=lambda c: abs(c.greeks.delta - self.SHORT_DELTA),
                          default=None)
         if not (short_put and short_call):
-            self.log("SKIP - could not find 20-δ shorts")
+            self.event("skip", "strikes", vol=vix_current, ivr=iv_rank)
             return
 
         # wings
         wing_put  = self.get_contract(candidates, short_put.strike  - self.WING_WIDTH,  OptionRight.PUT, expiry)
         wing_call = self.get_contract(candidates, short_call.strike + self.WING_WIDTH, OptionRight.CALL, expiry)
         if not (wing_put and wing_call):
-            self.log("SKIP - missing wing strikes")
+            self.event("skip", "strikes", vol=vix_current, ivr=iv_rank)
             return
 
         # --- 4) CREDIT & POSITION SIZE
@@ -128,27 +153,17 @@ class IronCondorTest(QCAlgorithm):
         credit = short_put_price + short_call_price - wing_put_price - wing_call_price
         
         if credit < self.WING_WIDTH * self.CREDIT_TARGET:
-            self.log(f"SKIP - Credit {credit:.2f} < target {self.WING_WIDTH*self.CREDIT_TARGET:.2f}")
+            self.event("skip", "credit", vol=vix_current, ivr=iv_rank, credit=credit)
             return
 
         risk_per_condor = (self.WING_WIDTH - credit) * 100   # max loss per 1-lot
         qty = int(room // risk_per_condor)
         if qty == 0: qty = 1
 
-        # Execute iron condor as individual orders
+        # Execute iron condor as one combo order (long wings, short bodies),
+        # limited to the computed net credit: a negative combo price is a credit
         condor_id = f"IC_{int(self.time.timestamp())}"
-        
-        # Buy protective put wing (long)
-        order1 = self.market_order(wing_put.symbol, -qty)
-        # Sell short put (short)  
-        order2 = self.market_order(short_put.symbol, qty)
-        # Sell short call (short)
-        order3 = self.market_order(short_call.symbol, qty) 
-        # Buy protective call wing (long)
-        order4 = self.market_order(wing_call.symbol, -qty)
-
-        # store condor details
-        self.condors[condor_id] = {
+        cd = {
             "qty": qty,
             "credit": credit,
             "risk": risk_per_condor * qty,
@@ -157,87 +172,163 @@ class IronCondorTest(QCAlgorithm):
             "short_put": short_put.symbol,
             "short_call": short_call.symbol,
             "wing_call": wing_call.symbol,
-            "orders": [order1.order_id, order2.order_id, order3.order_id, order4.order_id]
         }
+        limit = -math.floor(credit * 100) / 100
+        tickets = self.combo_limit_order(self.condor_legs(cd), qty, limit)
+        cd["orders"] = [t.order_id for t in tickets]
+        cd["id"] = cd["orders"][0] if cd["orders"] else -1      # numeric id in the event log
+
+        # store condor details
+        self.condors[condor_id] = cd
         self.log(f"OPEN  condor {condor_id}: credit {credit:.2f} ×{qty}  IVR={iv_rank:.2f}")
+        self.event("open", id=cd["id"], qty=qty, credit=credit, ivr=iv_rank, vol=vix_current,
+                   strikes=[float(c.strike) for c in (wing_put, short_put, short_call, wing_call)])
 
     # -------- DAILY MANAGEMENT ---------------------------------------------
     def manage_positions(self):
         close_ids = []
         
         for condor_id, cd in self.condors.items():
+            # drop entries whose combo limit never filled
+            if not self.entry_filled(cd):
+                for oid in cd["orders"]:
+                    self.transactions.cancel_order(oid)
+                close_ids.append(condor_id)
+                self.log(f"UNFILLED condor {condor_id}  limit cancelled")
+                self.event("skip", "unfilled", id=cd["id"], credit=cd["credit"])
+                continue
+
             # Calculate current strategy value
             current_value = self.get_condor_value(cd)
             if current_value is None:
                 continue
+            r = (cd["credit"] - current_value) * 100 * cd["qty"] / cd["risk"]   # R if closed now
 
             # profit-take
             if current_value <= cd["credit"] * self.PROFIT_TGT_PCT:
                 self.close_condor(cd)
                 close_ids.append(condor_id)
-                self.log(f"TP   condor {condor_id}  closed at {current_value:.2f}")
+                self.log(f"TP   condor {condor_id}  closed at {current_value:.2f}  R={r:+.3f}")
+                self.exit_event(cd, "tp", current_value, r)
                 continue
 
             # stop-loss
             if current_value >= cd["credit"] * self.LOSS_STOP_MULT:
                 self.close_condor(cd)
                 close_ids.append(condor_id)
-                self.log(f"SL   condor {condor_id}  closed at {current_value:.2f}")
+                self.log(f"SL   condor {condor_id}  closed at {current_value:.2f}  R={r:+.3f}")
+                self.exit_event(cd, "sl", current_value, r)
                 continue
 
-            # time exit (≥2 days to expiry)
-            if (cd["expiry"] - self.time).days <= 2:
+            # time exit (≤ EXIT_DTE trading days to expiry)
+            if self.trading_dte(self.time.date(), cd["expiry"].date()) <= self.EXIT_DTE:
                 self.close_condor(cd)
                 close_ids.append(condor_id)
-                self.log(f"T-exit condor {condor_id}")
+                self.log(f"T-exit condor {condor_id}  R={r:+.3f}")
+                self.exit_event(cd, "time", current_value, r)
                 continue
 
             # delta-based roll
-            sp = self.securities[cd["short_put"]]
-            sc = self.securities[cd["short_call"]]
-            if (hasattr(sp, 'greeks') and sp.greeks and abs(sp.greeks.delta) > self.DELTA_ROLL_TRIG) or \
-               (hasattr(sc, 'greeks') and sc.greeks and abs(sc.greeks.delta) > self.DELTA_ROLL_TRIG):
+            slots = self.quotes.gather([cd["short_put"], cd["short_call"]])
+            if slots is not None and np.any(np.abs(self.quotes.delta[slots]) > self.DELTA_ROLL_TRIG):
                 self.close_condor(cd)
                 close_ids.append(condor_id)
-                self.log(f"ROLL condor {condor_id}  (Δ hit); will open new condor next entry window")
+                self.log(f"ROLL condor {condor_id}  (Δ hit) R={r:+.3f}; will open new condor next entry window")
+                self.exit_event(cd, "roll", current_value, r)
 
         # cleanup dictionary
         for condor_id in close_ids:
             self.condors.pop(condor_id, None)
 
     def close_condor(self, condor_details):
-        """Close iron condor by reversing all positions"""
-        qty = condor_details["qty"]
-        # Reverse all positions
-        self.market_order(condor_details["wing_put"], qty)      # sell the long put
-        self.market_order(condor_details["short_put"], -qty)    # buy back short put
-        self.market_order(condor_details["short_call"], -qty)   # buy back short call
-        self.market_order(condor_details["wing_call"], qty)     # sell the long call
+        """Close iron condor by reversing all four legs in one combo order"""
+        self.combo_market_order(self.condor_legs(condor_details), -condor_details["qty"])
+
+    def condor_legs(self, condor_details):
+        """Combo legs of one condor unit: +1 wings, -1 short strikes"""
+        return [
+            Leg.create(condor_details["wing_put"], 1),
+            Leg.create(condor_details["short_put"], -1),
+            Leg.create(condor_details["short_call"], -1),
+            Leg.create(condor_details["wing_call"], 1),
+        ]
+
+    def entry_filled(self, condor_details):
+        """True once every leg of the entry combo has filled"""
+        for oid in condor_details["orders"]:
+            ticket = self.transactions.get_order_ticket(oid)
+            if ticket is None or ticket.status != OrderStatus.FILLED:
+                return False
+        return True
 
     def get_condor_value(self, condor_details):
         """Calculate current value of iron condor"""
-        try:
-            wp = self.securities[condor_details["wing_put"]]
-            sp = self.securities[condor_details["short_put"]]
-            sc = self.securities[condor_details["short_call"]]
-            wc = self.securities[condor_details["wing_call"]]
-            
-            if not all([wp.has_data, sp.has_data, sc.has_data, wc.has_data]):
-                return None
-                
-            # Current cost to close the position (we want to buy back)
-            value = wp.bid_price - sp.ask_price - sc.ask_price + wc.bid_price
-            return value
-        except:
+        slots = self.quotes.gather([condor_details[k] for k in
+                                    ("wing_put", "short_put", "short_call", "wing_call")])
+        if slots is None:
             return None
+        bid, ask = self.quotes.bid[slots], self.quotes.ask[slots]
+
+        # Current cost to close the position (buy back shorts, sell wings)
+        return float(ask[1] + ask[2] - bid[0] - bid[3])
+
+    # -------- EVENTS --------------------------------------------------------
+    def event(self, kind, reason=None, **fields):
+        """Record one structured event (schema in events.py); NaN fields are dropped"""
+        record = {"time": self.time.strftime("%Y-%m-%dT%H:%M"), "kind": kind, "ticker": self.UNDERLYING}
+        if reason:
+            record["reason"] = reason
+        for key, value in fields.items():
+            if isinstance(value, np.generic):
+                value = value.item()
+            if value is not None and value == value:
+                record[key] = value
+        self.events.append(record)
+
+    def exit_event(self, condor_details, reason, mark, r):
+        """Record the exit of one condor"""
+        self.event("exit", reason, id=condor_details["id"], qty=condor_details["qty"],
+                   credit=condor_details["credit"], mark=mark, r=r)
+
+    def on_end_of_algorithm(self):
+        """Save the event log as NDJSON to the ObjectStore"""
+        self.object_store.save(self.EVENTS_KEY,
+                               "\n".join(json.dumps(e, separators=(",", ":")) for e in self.events) + "\n")
+        self.log(f"{len(self.events)} events saved to ObjectStore '{self.EVENTS_KEY}'")
 
     # -------- HELPERS -------------------------------------------------------
+    def build_calendar(self):
+        """Index the exchange's sessions once: trading DTE and entry days become array lookups."""
+        hours = self.securities[self.spy].exchange.hours
+        first = self.start_date.date() - timedelta(days=7)
+        days = [first + timedelta(days=k) for k in range((self.end_date.date() - first).days + 60)]
+        is_open = np.array([hours.is_date_open(datetime(d.year, d.month, d.day)) for d in days])
+        self.cal_origin = first
+        self.session_count = np.cumsum(is_open)         # sessions on or before each calendar day
+        sessions = np.flatnonzero(is_open)
+        scheduled = np.flatnonzero([d.weekday() in self.ENTRY_WEEKDAYS for d in days])
+        moved = np.searchsorted(sessions, scheduled)    # first session on or after each entry weekday
+        self.entry_day = np.zeros(len(days), dtype=bool)
+        self.entry_day[sessions[moved[moved < len(sessions)]]] = True
+
+    def trading_dte(self, day, expiry):
+        """Sessions after day up to and including expiry."""
+        return int(self.session_count[(expiry - self.cal_origin).days]
+                   - self.session_count[(day - self.cal_origin).days])
+
+    def get_vix(self):
+        """Latest VIX close (falls back to the seeded window on day one)."""
+        price = self.securities[self.vix].price
+        if price == 0 and self.vix_window.count:
+            price = self.vix_window[0]
+        return price
+
     def get_iv_rank(self):
         """1-year IV-rank proxy using VIX high/low."""
-        hist = self.history(self.vix, 252, Resolution.DAILY)
-        if hist.empty: return None
-        vMin, vMax = hist["close"].min(), hist["close"].max()
-        vNow = self.securities[self.vix].price
+        if self.vix_window.count == 0: return None
+        closes = list(self.vix_window)
+        vMin, vMax = min(closes), max(closes)
+        vNow = self.get_vix()
         return (vNow - vMin) / (vMax - vMin) if vMax > vMin else None
 
     def get_contract(self, chain, strike, right, expiry):
@@ -247,4 +338,52 @@ class IronCondorTest(QCAlgorithm):
                 c.right == right and
                 c.expiry == expiry):
                 return c
-        return None
\ No newline at end of file
+        return None
+
+
+# ---------------------------------------------------------------------------
+class QuoteSnapshot:
+    """Bid/ask/mid/greeks of every subscribed option, materialized once per time slice."""
+
+    def __init__(self, algorithm, opt_symbol):
+        self.algo = algorithm
+        self.opt_symbol = opt_symbol
+        self.time = None
+        self.slots = {}                  # Symbol → row in the arrays below
+        self.bid = self.ask = self.mid = np.empty(0)
+        self.delta = self.gamma = self.vega = self.theta = np.empty(0)
+
+    def refresh(self):
+        """Rebuild the arrays when the slice time moves; free within the same bar."""
+        if self.time == self.algo.time:
+            return
+        self.time = self.algo.time
+
+        greeks = {}
+        chain = self.algo.current_slice.option_chains.get(self.opt_symbol) if self.algo.current_slice else None
+        if chain:
+            for c in chain:
+                g = c.greeks
+                greeks[c.symbol] = (g.delta, g.gamma, g.vega, g.theta)
+
+        symbols, rows = [], []
+        nan4 = (np.nan,) * 4
+        for symbol, sec in self.algo.securities.items():
+            if sec.type != SecurityType.OPTION or not sec.has_data:
+                continue
+            symbols.append(symbol)
+            rows.append((sec.bid_price, sec.ask_price) + tuple(
+                np.nan if v is None else v for v in greeks.get(symbol, nan4)))
+
+        self.slots = {s: i for i, s in enumerate(symbols)}
+        cols = np.array(rows, dtype=float).reshape(-1, 6).T
+        self.bid, self.ask, self.delta, self.gamma, self.vega, self.theta = cols
+        self.mid = 0.5 * (self.bid + self.ask)
+
+    def gather(self, symbols):
+        """Array of slots for symbols, or None if any of them is unquoted."""
+        self.refresh()
+        try:
+            return np.array([self.slots[s] for s in symbols], dtype=int)
+        except KeyError:
+            return None
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Compressed columnar archive of Lean backtest results.
+
+`lean cloud backtest -o result.json` writes one JSON document with the equity
+chart, every order, every closed trade and the algorithm log inline. Ingesting
+it splits that into four segments (equity, orders, trades, logs), each stored
+column by column and zlib-compressed, behind a small JSON index:
+
+    HV7A | version | index length | index (JSON) | column blobs ...
+
+Readers memory-map the file, parse only the index and decompress just the
+columns they ask for, so comparing many runs never re-parses the raw JSON.
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import argparse
+import numpy as np
+
+import criteria
+
+ARCHIVE_DIR = "data/artifacts"
+MAGIC = b"HV7A"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")         # magic, version, index length
+LEVEL = 6
+SEGMENTS = ("equity", "orders", "trades", "logs")
+
+def log(message):
+    """Log message to stderr"""
+    print(f"[artifacts] {message}", file=sys.stderr)
+
+# -------- EXTRACT -----------------------------------------------------------
+def _number(value):
+    """Float of a Lean statistic such as '12.5%' or '$1,024.00', else None"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        text = str(value).replace("$", "").replace(",", "").strip()
+        return float(text[:-1]) / 100 if text.endswith("%") else float(text)
+    except ValueError:
+        return None
+
+def equity_rows(result):
+    """[{time, value}] of the Strategy Equity chart (candles are reduced to their close)"""
+    series = ((result.get("charts") or {}).get("Strategy Equity") or {}).get("series") or {}
+    values = (series.get("Equity") or {}).get("values") or result.get("equity") or []
+    rows = []
+    for point in values:
+        if isinstance(point, dict):
+            rows.append({"time": point.get("x"), "value": point.get("y")})
+        elif len(point) >= 2:
+            rows.append({"time": point[0], "value": point[-1]})
+    return rows
+
+def order_rows(result):
+    """Orders as a list of flat dicts"""
+    orders = result.get("orders") or []
+    return list(orders.values()) if isinstance(orders, dict) else list(orders)
+
+def trade_rows(result):
+    """Closed trades as a list of flat dicts"""
+    trades = result.get("trades")
+    if trades is None:
+        trades = (result.get("totalPerformance") or {}).get("closedTrades") or []
+    return list(trades)
+
+def log_rows(result):
+    """Log lines as [{line}]"""
+    logs = result.get("logs") or []
+    if isinstance(logs, str):
+        logs = logs.splitlines()
+    return [{"line": str(line)} for line in logs]
+
+def summary(result):
+    """Scalar headline statistics kept uncompressed in the index"""
+    out = {k: v for k, v in result.items() if isinstance(v, (int, float, str, bool)) or v is None}
+    for section in ("statistics", "runtimeStatistics"):
+        out.update({k: v for k, v in (result.get(section) or {}).items()
+                    if isinstance(v, (int, float, str))})
+    return out
+
+EXTRACTORS = {
+    "equity": equity_rows,
+    "orders": order_rows,
+    "trades": trade_rows,
+    "logs": log_rows,
+}
+
+# -------- WRITE -------------------------------------------------------------
+def columnize(rows):
+    """{column: np.ndarray | list} from a list of dicts; nested values become JSON text"""
+    keys = []
+    for row in rows:
+        keys.extend(k for k in row if k not in keys)
+    columns = {}
+    for key in keys:
+        values = [row.get(key) for row in rows]
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, bool) for v in present):
+            columns[key] = np.array([bool(v) for v in values])
+        elif present and all(isinstance(v, int) and not isinstance(v, bool) for v in present) \
+                and len(present) == len(values):
+            columns[key] = np.array(values, dtype=np.int64)
+        elif present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+            columns[key] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        else:
+            columns[key] = [v if v is None or isinstance(v, str) else json.dumps(v) for v in values]
+    return columns
+
+def _encode(column):
+    """(compressed bytes, index entry) of one column"""
+    if isinstance(column, np.ndarray):
+        raw, kind = np.ascontiguousarray(column).tobytes(), column.dtype.str
+    else:
+        raw, kind = json.dumps(column).encode(), "json"
+    return zlib.compress(raw, LEVEL), {"dtype": kind, "raw": len(raw)}
+
+def write_archive(result, path, meta=None):
+    """Write one parsed result.json as an archive; returns the path"""
+    index = {"meta": dict(meta or {}), "summary": summary(result), "segments": {}}
+    blobs, offset = [], 0
+    for name in SEGMENTS:
+        rows = EXTRACTORS[name](result)
+        segment = {"rows": len(rows), "columns": {}}
+        for key, column in columnize(rows).items():
+            blob, entry = _encode(column)
+            entry.update(offset=offset, length=len(blob))
+            segment["columns"][key] = entry
+            blobs.append(blob)
+            offset += len(blob)
+        index["segments"][name] = segment
+    head = json.dumps(index, separators=(",", ":")).encode()
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(head)))
+        f.write(head)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return path
+
+def ingest(result_file, name=None, archive_dir=ARCHIVE_DIR, meta=None):
+    """Convert a result.json into <archive_dir>/<name>.hv7a; returns the archive path"""
+    with open(result_file) as f:
+        result = json.load(f)
+    name = name or os.path.splitext(os.path.basename(result_file))[0]
+    path = write_archive(result, os.path.join(archive_dir, f"{name}.hv7a"),
+                         dict(meta or {}, name=name, source=result_file))
+    log(f"ingested {result_file} -> {path} ({os.path.getsize(result_file)} -> {os.path.getsize(path)} bytes)")
+    return path
+
+# -------- READ --------------------------------------------------------------
+class Archive:
+    """Memory-mapped archive; columns are decompressed on first access only"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a v{VERSION} HV-7 archive")
+        self.index = json.loads(self._map[HEADER.size:HEADER.size + size])
+        self._base = HEADER.size + size
+        self._cache = {}
+
+    @property
+    def meta(self):
+        return self.index["meta"]
+
+    @property
+    def summary(self):
+        return self.index["summary"]
+
+    def rows(self, segment):
+        """Number of rows in a segment"""
+        return self.index["segments"][segment]["rows"]
+
+    def columns(self, segment):
+        """Column names of a segment"""
+        return list(self.index["segments"][segment]["columns"])
+
+    def column(self, segment, name):
+        """One decompressed column: np.ndarray for numbers, list for text"""
+        key = (segment, name)
+        if key not in self._cache:
+            entry = self.index["segments"][segment]["columns"][name]
+            start = self._base + entry["offset"]
+            raw = zlib.decompress(self._map[start:start + entry["length"]])
+            if entry["dtype"] == "json":
+                self._cache[key] = json.loads(raw)
+            else:
+                self._cache[key] = np.frombuffer(raw, dtype=np.dtype(entry["dtype"]))
+        return self._cache[key]
+
+    def segment(self, segment, columns=None):
+        """{column: values} for the requested columns (all when None) of a segment"""
+        names = columns or self.columns(segment)
+        have = self.index["segments"][segment]["columns"]
+        return {name: self.column(segment, name) for name in names if name in have}
+
+    def close(self):
+        self._cache.clear()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_archive(path):
+    """Open an archive by path or by name inside ARCHIVE_DIR"""
+    if not os.path.exists(path):
+        path = os.path.join(ARCHIVE_DIR, f"{path}.hv7a")
+    return Archive(path)
+
+def list_archives(archive_dir=ARCHIVE_DIR):
+    """Names of every archive in archive_dir"""
+    if not os.path.isdir(archive_dir):
+        return []
+    return sorted(f[:-5] for f in os.listdir(archive_dir) if f.endswith(".hv7a"))
+
+# -------- METRICS -----------------------------------------------------------
+def run_metrics(archive):
+    """Headline metrics of one run, reading only the trade P&L, equity and log columns
+
+    avg_r comes from the R=<value> suffix of the strategy's close log lines;
+    runs whose log carries none have no avg_r.
+    """
+    trades = archive.segment("trades", ["profit", "profitLoss"])
+    pnl = trades.get("profit", trades.get("profitLoss"))
+    pnl = np.asarray(pnl, dtype=np.float64) if pnl is not None else np.empty(0)
+    equity = archive.segment("equity", ["value"]).get("value")
+    equity = np.asarray(equity, dtype=np.float64) if equity is not None else np.empty(0)
+    equity = equity[~np.isnan(equity)]
+
+    stats = archive.summary
+    drawdown = _number(stats.get("maxDrawdown", stats.get("Drawdown")))
+    if len(equity):
+        peak = np.maximum.accumulate(equity)
+        drawdown = float(np.max((peak - equity) / peak))
+    total_return = _number(stats.get("totalReturn", stats.get("Net Profit")))
+    if len(equity) > 1 and equity[0]:
+        total_return = float(equity[-1] / equity[0] - 1)
+    closes = criteria.RunningCriteria()
+    for line in archive.segment("logs", ["line"]).get("line") or []:
+        closes.feed_line(line)
+
+    metrics = {
+        "total_trades": int(len(pnl)) or int(_number(stats.get("totalOrders", stats.get("Total Orders"))) or 0),
+        "win_rate": float((pnl > 0).mean()) if len(pnl) else 0,
+        "sharpe_ratio": _number(stats.get("sharpeRatio", stats.get("Sharpe Ratio"))) or 0,
+        "total_return": total_return or 0,
+        "max_drawdown": drawdown or 0,
+    }
+    if closes.trades:
+        metrics["avg_r"] = closes.summary()["avg_r"]
+    return metrics
+
+def compare(paths):
+    """{name: metrics} for several archives"""
+    out = {}
+    for path in paths:
+        with open_archive(path) as archive:
+            out[archive.meta.get("name", path)] = run_metrics(archive)
+    return out
+
+def main():
+    """Ingest results or compare archives from the command line"""
+    parser = argparse.ArgumentParser(description="HV-7 backtest artifact archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("ingest", help="convert result.json files into archives")
+    p.add_argument('results', nargs='+')
+    p.add_argument('--name', help="archive name (single result only)")
+    p.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    p = sub.add_parser("compare", help="headline metrics of several archives")
+    p.add_argument('archives', nargs='*', help="archive paths or names (default: all)")
+    p.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    p = sub.add_parser("show", help="print one segment of an archive")
+    p.add_argument('archive')
+    p.add_argument('segment', choices=SEGMENTS)
+    p.add_argument('--columns', nargs='+')
+    p.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        for result_file in args.results:
+            ingest(result_file, args.name if len(args.results) == 1 else None, args.archive_dir)
+    elif args.command == "compare":
+        paths = args.archives or [os.path.join(args.archive_dir, f"{n}.hv7a")
+                                  for n in list_archives(args.archive_dir)]
+        print(json.dumps(compare(paths), indent=2))
+    else:
+        with open_archive(args.archive) as archive:
+            data = archive.segment(args.segment, args.columns)
+            for i in range(min(args.limit, archive.rows(args.segment))):
+                print(json.dumps({k: (v[i].item() if isinstance(v, np.ndarray) else v[i])
+                                  for k, v in data.items()}))
+
+if __name__ == "__main__":
+    main()
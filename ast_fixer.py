@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Single-pass syntax-tree fixer for a single-file Lean strategy.
+
+The source is parsed once and every mechanical fix is collected as a span
+edit against the tree's node positions:
+
+    imports   names the file uses but never binds (IMPORTS), plus the ones an
+              error reported; one import line each after the last top-level
+              import, or a single 'from AlgorithmImports import *' if absent
+    api       self.<Member> / .algo.<Member> references and overridden event
+              handlers of the QCAlgorithm surface moved to the class's
+              majority style, snake_case on a tie (SetCash <-> set_cash,
+              OnData <-> on_data)
+    renames   attributes an AttributeError reported (ATTRIBUTE_RENAMES)
+
+The edits are applied bottom-up in one go, so comments, quoting and layout
+outside the touched identifiers stay byte-for-byte. Source that does not
+parse first gets the repairs a SyntaxError pins down exactly (a missing ':',
+a missing or unexpected block indent) in memory. The result must compile and pass
+preflight before the file is written, once, atomically.
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import builtins
+import argparse
+import tempfile
+
+import preflight
+
+# What a reported or detected unbound name is imported from
+IMPORTS = {
+    "OptionStrategies": "from AlgorithmImports import OptionStrategies",
+    "Resolution": "from AlgorithmImports import Resolution",
+    "Slice": "from AlgorithmImports import Slice",
+    "QCAlgorithm": "from AlgorithmImports import QCAlgorithm",
+    "timedelta": "from datetime import timedelta",
+}
+STAR_IMPORT = "from AlgorithmImports import *"
+
+# Attribute names an AttributeError says do not exist, and what they should be
+ATTRIBUTE_RENAMES = {
+    "Buy": "buy",
+    "SetFilter": "set_filter",
+    "AddOption": "add_option",
+    "AddEquity": "add_equity",
+}
+
+# QCAlgorithm members in PascalCase; the snake_case API is snake(name)
+SURFACE = (
+    "AddData", "AddEquity", "AddIndex", "AddOption", "AddIndexOption", "AddUniverse",
+    "SetStartDate", "SetEndDate", "SetCash", "SetTimeZone", "SetWarmUp", "SetBenchmark",
+    "SetBrokerageModel", "SetSecurityInitializer", "Schedule", "DateRules", "TimeRules",
+    "Securities", "Portfolio", "Transactions", "ObjectStore", "Settings", "UniverseSettings",
+    "OptionChainProvider", "CurrentSlice", "Time", "UtcTime", "StartDate", "EndDate",
+    "IsWarmingUp", "History", "Log", "Debug", "Error", "Plot", "Quit", "Buy", "Sell",
+    "Order", "MarketOrder", "LimitOrder", "ComboMarketOrder", "ComboLimitOrder",
+    "Liquidate", "SetHoldings",
+)
+# Event handlers Lean calls on the algorithm; renamed where they are defined
+HANDLERS = ("Initialize", "OnData", "OnOrderEvent", "OnSecuritiesChanged",
+            "OnWarmupFinished", "OnEndOfDay", "OnEndOfAlgorithm")
+MAX_REPAIRS = 20                        # syntax repairs before giving up
+
+def log(message):
+    """Log message to stderr"""
+    print(f"[ast_fixer] {message}", file=sys.stderr)
+
+def snake(name):
+    """snake_case of a PascalCase name"""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+TO_SNAKE = {name: snake(name) for name in SURFACE + HANDLERS}
+TO_PASCAL = {v: k for k, v in TO_SNAKE.items()}
+HANDLER_NAMES = set(HANDLERS) | {snake(name) for name in HANDLERS}
+
+# -------- SYNTAX REPAIR -----------------------------------------------------
+def repair(source):
+    """(source, fixes) with the SyntaxErrors that have one exact repair resolved"""
+    fixes = []
+    for _ in range(MAX_REPAIRS):
+        try:
+            compile(source, "<source>", "exec", ast.PyCF_ONLY_AST)
+            break
+        except SyntaxError as e:
+            lines = source.split("\n")
+            if not e.lineno or e.lineno > len(lines):
+                break
+            row = e.lineno - 1
+            line = lines[row]
+            if e.msg == "expected ':'":
+                head = line[:max(e.offset - 1, 0)].rstrip()
+                lines[row] = head + ":" + line[len(head):]
+                fixes.append(f"Added ':' on line {e.lineno}")
+            elif e.msg.startswith("expected an indented block") and row > 0:
+                header = next(lines[i] for i in range(row - 1, -1, -1) if lines[i].strip())
+                indent = header[:len(header) - len(header.lstrip())] + "    "
+                lines[row] = indent + line.lstrip()
+                fixes.append(f"Indented line {e.lineno}")
+            elif e.msg == "unexpected indent" and row > 0:
+                above = next(lines[i] for i in range(row - 1, -1, -1) if lines[i].strip())
+                lines[row] = above[:len(above) - len(above.lstrip())] + line.lstrip()
+                fixes.append(f"Dedented line {e.lineno}")
+            else:
+                break
+            source = "\n".join(lines)
+    return source, fixes
+
+# -------- EDITS -------------------------------------------------------------
+def bound_names(tree):
+    """Every name the module binds anywhere (assignments, args, defs, imports, handlers)"""
+    names = set(dir(builtins))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((a.asname or a.name).split(".")[0] for a in node.names)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+    return names
+
+def import_edits(tree, source, wanted):
+    """(insertions, fixes) adding the imports of unbound names"""
+    star = any(isinstance(n, ast.ImportFrom) and n.module == "AlgorithmImports"
+               and any(a.name == "*" for a in n.names) for n in tree.body)
+    bound = bound_names(tree)
+    used = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+    # the star import binds every AlgorithmImports name and re-exports datetime's
+    unbound = set() if star else used - bound
+    missing = sorted(name for name in unbound | set(wanted) if name in IMPORTS and name not in bound)
+    lines = []
+    for name in missing:
+        line = IMPORTS[name]
+        if line.startswith("from AlgorithmImports "):
+            if star:
+                continue
+            line = STAR_IMPORT
+        if line not in lines and line not in source.split("\n"):
+            lines.append(line)
+    if not lines:
+        return [], []
+    # the star import goes first, the rest after the last top-level import
+    imports = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    first = imports[0].lineno if imports else 1
+    last = (imports[-1].end_lineno if imports else 0) + 1
+    text = {}
+    for line in sorted(lines, key=lambda line: line != STAR_IMPORT):
+        row = first if line == STAR_IMPORT else last
+        text[row] = text.get(row, "") + line + "\n"
+    return [(row, 0, row, 0, t) for row, t in text.items()], [f"Added import: {line}" for line in lines]
+
+def own_members(cls):
+    """Methods and self.<attr> assignments of the algorithm class, handlers excluded"""
+    names = {n.name for n in cls.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    for node in ast.walk(cls):
+        if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store) \
+                and isinstance(node.value, ast.Name) and node.value.id == "self":
+            names.add(node.attr)
+    return names - HANDLER_NAMES
+
+def is_algorithm(node, cls):
+    """True if an expression is the algorithm: self inside its class, or any <x>.algo"""
+    if isinstance(node, ast.Name):
+        return node.id == "self" and cls is not None
+    return isinstance(node, ast.Attribute) and node.attr == "algo"
+
+def attribute_span(node):
+    """(row, col, row, col) of an Attribute node's attribute name"""
+    return (node.end_lineno, node.end_col_offset - len(node.attr.encode()),
+            node.end_lineno, node.end_col_offset)
+
+def def_span(node, lines):
+    """(row, col, row, col) of a def's name"""
+    row = node.lineno
+    col = lines[row - 1].index(node.name.encode(), node.col_offset)
+    return row, col, row, col + len(node.name.encode())
+
+def api_edits(tree, lines, renames):
+    """(edits, fixes) moving QCAlgorithm references to the majority style, plus reported renames"""
+    cls = preflight.algorithm_class(tree)
+    own = own_members(cls) if cls is not None else set()
+    in_class = {id(n) for n in ast.walk(cls)} if cls is not None else set()
+
+    refs = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr not in own and \
+                (node.attr in TO_SNAKE or node.attr in TO_PASCAL) and \
+                is_algorithm(node.value, cls if id(node) in in_class else None):
+            refs.append(node)
+    handlers = [n for n in (cls.body if cls is not None else [])
+                if isinstance(n, ast.FunctionDef) and n.name in HANDLER_NAMES]
+
+    pascal = sum(n.attr in TO_SNAKE for n in refs) + sum(n.name in HANDLERS for n in handlers)
+    snake_ = len(refs) + len(handlers) - pascal
+    target = TO_PASCAL if pascal > snake_ else TO_SNAKE
+
+    edits, fixes, seen = [], [], set()
+    def rename(span, old, new):
+        edits.append(span + (new,))
+        if (old, new) not in seen:
+            seen.add((old, new))
+            fixes.append(f"Fixed attribute: {old} -> {new}")
+
+    # target maps the minority style onto the majority one; a tie goes to the current snake_case API
+    for node in refs:
+        if node.attr in target:
+            rename(attribute_span(node), node.attr, target[node.attr])
+    for node in handlers:
+        if node.name in target:
+            rename(def_span(node, lines), node.name, target[node.name])
+
+    touched = {e[:2] for e in edits}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr in renames:
+            span = attribute_span(node)
+            if span[:2] not in touched:
+                rename(span, node.attr, renames[node.attr])
+    return edits, fixes
+
+def apply_edits(source, edits):
+    """source with (row, col, end row, end col, text) edits applied; cols are UTF-8 byte offsets"""
+    lines = source.encode().split(b"\n")
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line) + 1)
+    raw = source.encode()
+    for row, col, end_row, end_col, text in sorted(edits, key=lambda e: e[:2], reverse=True):
+        start = min(starts[row - 1] + col, len(raw))
+        end = min(starts[end_row - 1] + end_col, len(raw))
+        raw = raw[:start] + text.encode() + raw[end:]
+    return raw.decode()
+
+# -------- FIX ---------------------------------------------------------------
+def hints(errors):
+    """(names to import, attribute renames) reported by parsed errors"""
+    names, renames = set(), {}
+    for error in errors or []:
+        groups = error.get("match_groups") or []
+        if error.get("fix_type") == "add_import" and groups:
+            names.add(groups[0])
+        elif error.get("fix_type") == "fix_attribute" and len(groups) >= 2 \
+                and groups[1] in ATTRIBUTE_RENAMES:
+            renames[groups[1]] = ATTRIBUTE_RENAMES[groups[1]]
+    return names, renames
+
+def fix_source(source, errors=None, path="<source>"):
+    """(fixed source, fixes, remaining problems) of one pass over a strategy's source"""
+    names, renames = hints(errors)
+    source, fixes = repair(source)
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        return source, fixes, [f"{path}:{e.lineno}: {type(e).__name__}: {e.msg}"]
+
+    lines = source.encode().split(b"\n")
+    inserts, import_fixes = import_edits(tree, source, names)
+    edits, api_fixes = api_edits(tree, lines, renames)
+    source = apply_edits(source, inserts + edits)
+    problems, _ = preflight.check_source(source, path)
+    return source, fixes + import_fixes + api_fixes, problems
+
+def write(path, content):
+    """Replace path with content atomically"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+def fix_file(path, errors=None, dry_run=False):
+    """Fix a strategy file in one pass; written once, only if it changed and still compiles"""
+    with open(path) as f:
+        original = f.read()
+    source, fixes, problems = fix_source(original, errors, path)
+    compiles = not any("SyntaxError" in p or "IndentationError" in p for p in problems)
+    written = bool(fixes) and source != original and compiles and not dry_run
+    if written:
+        write(path, source)
+    return {"fixes": fixes, "problems": problems, "written": written, "source": source}
+
+def main():
+    """Fix strategy files from the command line"""
+    parser = argparse.ArgumentParser(description="Single-pass syntax-tree fixer for Lean strategies")
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--dry-run', action='store_true', help="print the fixed source instead of writing")
+    parser.add_argument('--errors', help="JSON file of parsed errors (from /backtest) to use as hints")
+    args = parser.parse_args()
+
+    errors = None
+    if args.errors:
+        with open(args.errors) as f:
+            errors = json.load(f)
+    failed = False
+    for path in args.paths:
+        result = fix_file(path, errors, args.dry_run)
+        for fix in result["fixes"]:
+            log(f"{path}: {fix}")
+        for problem in result["problems"]:
+            print(problem)
+        if args.dry_run:
+            print(result["source"], end="")
+        elif result["written"]:
+            log(f"{path}: wrote {len(result['fixes'])} fixes")
+        failed |= bool(result["problems"])
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ import requests
 import subprocess
 from datetime import datetime
 
+import results_store
+
 MCP_URL = "http://localhost:8000"
 MAX_ITERATIONS = 10
 PROJECT_NAME = "IronCondor"
@@ -40,12 +42,23 @@ def apply_fixes(errors):
 def analyze_results():
     """Analyze backtest results"""
     log("Analyzing results...")
-    response = requests.post(f"{MCP_URL}/analyze", json={"result_file": "result.json"})
+    response = requests.post(f"{MCP_URL}/analyze", json={
+        "result_file": "result.json",
+        "project": PROJECT_NAME,
+        "use_cache": True
+    })
     return response.json()
 
+def strategy_key():
+    """Results-store key of the strategy as it is on disk right now"""
+    path = f"{PROJECT_NAME}/main.py"
+    start, end = results_store.strategy_window(path)
+    return results_store.source_hash(path), {"project": PROJECT_NAME}, start, end
+
 def main():
     """Main automation loop"""
     log("Starting automated Iron Condor optimization...")
+    store = results_store.connect()
     
     # Check MCP server
     if not check_mcp_server():
@@ -61,8 +74,14 @@ def main():
         iteration += 1
         log(f"\n=== Iteration {iteration}/{MAX_ITERATIONS} ===")
         
-        # Run backtest
-        backtest_result = run_backtest()
+        # Skip the cloud backtest if this exact source was already backtested;
+        # /analyze records every result and serves it back from the store
+        key = strategy_key()
+        if results_store.lookup(store, *key, origin="cloud") is not None:
+            log(f"Source {key[0]} already backtested; using stored metrics")
+            backtest_result = {'status': 'success'}
+        else:
+            backtest_result = run_backtest()
         
         if backtest_result['status'] == 'success':
             log("Backtest completed successfully")
@@ -87,6 +106,11 @@ def main():
                     log("Adjusting strategy parameters...")
                     # TODO: Implement parameter optimization
                     
+                    # the same source only replays its stored verdict next time
+                    if strategy_key() == key:
+                        log(f"Source {key[0]} unchanged; nothing left to try")
+                        break
+                    
         elif backtest_result['status'] == 'failed':
             log("Backtest failed with errors")
             
@@ -120,13 +144,7 @@ def main():
     else:
         log("\n❌ OPTIMIZATION FAILED - Maximum iterations reached or unrecoverable error")
     
-    # Save final state
-    with open('optimization_log.json', 'w') as f:
-        json.dump({
-            'iterations': iteration,
-            'success': success,
-            'timestamp': datetime.now().isoformat()
-        }, f, indent=2)
+    log(f"Per-iteration metrics are in {results_store.RESULTS_DB} (python results_store.py --origin cloud)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
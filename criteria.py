@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Running success-criteria evaluation with early abort.
+
+Tracks closed-trade statistics incrementally and decides when a run can no
+longer finish with win_rate ≥ WIN_RATE_MIN and avg_r ≥ AVG_R_MIN
+(codex_tasks.yaml): even if every remaining trade wins and earns best_r, the
+final figures would miss. Given a true upper bound on the remaining trades the
+win-rate verdict is exact; the average-R one is a heuristic, since a condor's
+take-profit R = credit / (width − credit) has no ceiling below the width. A
+drawdown guard can stop a run earlier on equity alone. Shared by the local
+engine and the /jobs stream.
+"""
+
+import re
+
+WIN_RATE_MIN = 0.55
+AVG_R_MIN = 0.15
+ASSUMED_BEST_R = 1.0    # R a winning trade is assumed to earn (heuristic: exceeded once credit > width/2)
+
+# "... R=+0.214" suffix on the strategy's close log lines
+R_PATTERN = re.compile(r"\bR=([+-]?\d+(?:\.\d+)?)")
+
+class RunningCriteria:
+    """Incremental win-rate / average-R tracker with unreachability and drawdown checks"""
+
+    def __init__(self, win_rate_min=WIN_RATE_MIN, avg_r_min=AVG_R_MIN, best_r=ASSUMED_BEST_R,
+                 max_drawdown=None):
+        self.win_rate_min = win_rate_min
+        self.avg_r_min = avg_r_min
+        self.best_r = best_r
+        self.max_drawdown = max_drawdown
+        self.trades = 0
+        self.wins = 0
+        self.sum_r = 0.0
+        self.peak = None
+        self.drawdown = 0.0
+
+    def add_trade(self, r, won=None):
+        """Record one closed trade"""
+        self.trades += 1
+        self.wins += int(r > 0 if won is None else won)
+        self.sum_r += r
+
+    def add_equity(self, value):
+        """Record one equity mark for the drawdown guard"""
+        self.peak = value if self.peak is None else max(self.peak, value)
+        if self.peak > 0:
+            self.drawdown = max(self.drawdown, (self.peak - value) / self.peak)
+
+    def best_case(self, remaining):
+        """(win rate, avg R) if every one of the remaining trades wins with best_r"""
+        n = self.trades + remaining
+        if n == 0:
+            return 0.0, 0.0
+        return (self.wins + remaining) / n, (self.sum_r + remaining * self.best_r) / n
+
+    def verdict(self, remaining=None):
+        """Reason to abort ('win_rate', 'avg_r', 'no_trades', 'drawdown') or None to keep going.
+
+        remaining is an upper bound on trades still to close; None means unknown,
+        which leaves only the drawdown guard. 'avg_r' rests on the best_r assumption.
+        """
+        if self.max_drawdown is not None and self.drawdown > self.max_drawdown:
+            return "drawdown"
+        if remaining is None:
+            return None
+        if self.trades + remaining == 0:
+            return "no_trades"
+        win_rate, avg_r = self.best_case(remaining)
+        if win_rate < self.win_rate_min:
+            return "win_rate"
+        if avg_r < self.avg_r_min:
+            return "avg_r"
+        return None
+
+    def summary(self):
+        """Statistics so far"""
+        return {
+            "trades": self.trades,
+            "win_rate": self.wins / self.trades if self.trades else 0.0,
+            "avg_r": self.sum_r / self.trades if self.trades else 0.0,
+            "max_drawdown": self.drawdown,
+        }
+
+    def feed_line(self, line):
+        """Record a trade from a log line carrying R=<value>; True if one was found"""
+        m = R_PATTERN.search(line)
+        if m:
+            self.add_trade(float(m[1]))
+        return bool(m)
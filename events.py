@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Structured decision events of the HV-7 condor strategies and the local engine.
+
+Every entry decision is a typed record instead of a free-text log line:
+
+    skip  ticker, reason (vol, ivr, risk, chain, strikes, quote, credit, stress, unfilled), vol, ivr
+    open  ticker, id, qty, credit, ivr, vol, strikes (wing put, short put, short call, wing call)
+    exit  ticker, id, reason (tp, sl, time, roll, expiry), qty, credit, mark, r
+
+Condor ids restart at 1 in every run, so records appended by a run carry its
+run id and attribution joins exits to opens on (run, id).
+
+Two append-only encodings share one schema:
+
+    .ndjson  one compact JSON object per line (what Lean saves to the ObjectStore)
+    .hv7e    HV7E | version | record size | packed RECORD structs ...
+
+Readers return one NumPy structured array, so a year of events loads in
+milliseconds and attribution by exit reason is a handful of masked reductions.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import struct
+import argparse
+import numpy as np
+
+MAGIC = b"HV7E"
+VERSION = 2                             # 2: run id
+HEADER = struct.Struct("<4sHI")         # magic, version, record size
+KINDS = ("skip", "open", "exit")
+SKIP_REASONS = ("vol", "ivr", "risk", "chain", "strikes", "quote", "credit", "stress", "unfilled")
+EXIT_REASONS = ("tp", "sl", "time", "roll", "expiry")
+REASONS = ("",) + SKIP_REASONS + EXIT_REASONS
+
+RECORD = np.dtype([
+    ("time", "<i8"),                    # minutes since the epoch (datetime64[m])
+    ("run", "S8"),                      # run id, empty for single-run logs (Lean ObjectStore)
+    ("kind", "u1"),                     # index into KINDS
+    ("reason", "u1"),                   # index into REASONS, 0 for opens
+    ("ticker", "S6"),
+    ("id", "<i4"),                      # condor / order id, -1 for skips
+    ("qty", "<i4"),
+    ("credit", "<f4"),
+    ("mark", "<f4"),
+    ("r", "<f4"),
+    ("ivr", "<f4"),
+    ("vol", "<f4"),
+    ("strikes", "<f4", (4,)),
+])
+FLOATS = ("credit", "mark", "r", "ivr", "vol")
+
+def log(message):
+    """Log message to stderr"""
+    print(f"[events] {message}", file=sys.stderr)
+
+def event(when, kind, ticker, reason=None, **fields):
+    """One event as an NDJSON-ready dict; None and NaN fields are dropped"""
+    record = {"time": str(np.datetime64(when, 'm')), "kind": kind, "ticker": ticker}
+    if reason:
+        record["reason"] = reason
+    record.update((k, v) for k, v in fields.items() if v is not None and v == v)
+    return record
+
+def run_id():
+    """Fresh id tagging the events of one run"""
+    return uuid.uuid4().hex[:8]
+
+# -------- ENCODE ------------------------------------------------------------
+def to_array(records):
+    """Structured RECORD array of event dicts"""
+    out = np.zeros(len(records), dtype=RECORD)
+    out["id"] = -1
+    for name in FLOATS + ("strikes",):
+        out[name] = np.nan
+    for i, rec in enumerate(records):
+        row = out[i]
+        row["time"] = np.datetime64(rec["time"], 'm').astype(np.int64)
+        row["kind"] = KINDS.index(rec["kind"])
+        row["reason"] = REASONS.index(rec.get("reason", ""))
+        row["ticker"] = rec["ticker"].encode()
+        row["run"] = rec.get("run", "").encode()
+        for name in ("id", "qty") + FLOATS:
+            if name in rec:
+                row[name] = rec[name]
+        if "strikes" in rec:
+            row["strikes"] = rec["strikes"]
+    return out
+
+def to_records(events):
+    """Event dicts of a RECORD array (inverse of to_array)"""
+    records = []
+    for row in events:
+        fields = {name: float(row[name]) for name in FLOATS if np.isfinite(row[name])}
+        if row["id"] >= 0:
+            fields["id"] = int(row["id"])
+        if row["qty"]:
+            fields["qty"] = int(row["qty"])
+        if np.isfinite(row["strikes"]).all():
+            fields["strikes"] = row["strikes"].tolist()
+        if row["run"]:
+            fields["run"] = row["run"].decode()
+        records.append(event(np.datetime64(int(row["time"]), 'm'), KINDS[row["kind"]],
+                             row["ticker"].decode(), REASONS[row["reason"]], **fields))
+    return records
+
+def append(path, records, run=None):
+    """Append event dicts to an .ndjson or .hv7e log, tagging untagged ones with run; returns the path"""
+    if run:
+        records = [rec if "run" in rec else dict(rec, run=run) for rec in records]
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if path.endswith(".hv7e"):
+        fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not fresh:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER.size)
+            if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION, RECORD.itemsize):
+                raise ValueError(f"{path} is not a version-{VERSION} event log; append to a new file")
+        with open(path, 'ab') as f:
+            if fresh:
+                f.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize))
+            f.write(to_array(records).tobytes())
+    else:
+        with open(path, 'a') as f:
+            for rec in records:
+                f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+    return path
+
+# -------- READ --------------------------------------------------------------
+def parse_ndjson(text):
+    """RECORD array of NDJSON text (blank lines ignored)"""
+    return to_array([json.loads(line) for line in text.splitlines() if line.strip()])
+
+def load(path):
+    """RECORD array of an .ndjson or .hv7e event log"""
+    if path.endswith(".hv7e"):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        magic, version, size = HEADER.unpack_from(raw)
+        if magic != MAGIC or version != VERSION or size != RECORD.itemsize:
+            raise ValueError(f"{path} is not a version-{VERSION} event log")
+        body = len(raw) - HEADER.size
+        return np.frombuffer(raw, dtype=RECORD, offset=HEADER.size, count=body // size)
+    with open(path) as f:
+        return parse_ndjson(f.read())
+
+def attribution(events):
+    """Trades, win rate and R per exit reason (with entry IV-rank), plus skip counts"""
+    kind = events["kind"]
+    exits = events[kind == KINDS.index("exit")]
+    opens = events[kind == KINDS.index("open")]
+    skips = events[kind == KINDS.index("skip")]
+
+    # entry IV-rank of every exit, joined on (run, id): ids restart in every run
+    entry_ivr = np.full(len(exits), np.nan)
+    if len(opens):
+        _, run = np.unique(np.concatenate([opens["run"], exits["run"]]), return_inverse=True)
+        keys = (run.astype(np.int64) << 32) | np.concatenate([opens["id"], exits["id"]]).astype(np.int64)
+        ids, exit_ids, ivr = keys[:len(opens)], keys[len(opens):], opens["ivr"]
+        order = np.argsort(ids, kind='stable')
+        k = np.minimum(np.searchsorted(ids[order], exit_ids), len(opens) - 1)
+        hit = ids[order][k] == exit_ids
+        entry_ivr[hit] = ivr[order][k][hit]
+
+    by_exit = {}
+    for code in np.unique(exits["reason"]):
+        mask = exits["reason"] == code
+        r = exits["r"][mask].astype(np.float64)
+        ivr = entry_ivr[mask]
+        by_exit[REASONS[code]] = {
+            "trades": int(mask.sum()),
+            "share": float(mask.mean()),
+            "win_rate": float((r > 0).mean()),
+            "avg_r": float(r.mean()),
+            "sum_r": float(r.sum()),
+            "entry_ivr": float(np.nanmean(ivr)) if np.isfinite(ivr).any() else None,
+        }
+    codes, counts = np.unique(skips["reason"], return_counts=True)
+    r = exits["r"].astype(np.float64)
+    return {
+        "entries": int(len(opens)),
+        "trades": int(len(exits)),
+        "win_rate": float((r > 0).mean()) if len(r) else 0.0,
+        "avg_r": float(r.mean()) if len(r) else 0.0,
+        "exits": by_exit,
+        "skips": {REASONS[c]: int(n) for c, n in zip(codes, counts)},
+    }
+
+def main():
+    """Attribution report or format conversion of event logs"""
+    parser = argparse.ArgumentParser(description="HV-7 structured event logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("attribute", help="P&L attribution by exit reason")
+    p.add_argument('logs', nargs='+', help=".ndjson or .hv7e event logs (concatenated)")
+    p = sub.add_parser("convert", help="rewrite an event log in the other encoding")
+    p.add_argument('source')
+    p.add_argument('dest')
+    p = sub.add_parser("show", help="print events as NDJSON")
+    p.add_argument('log')
+    p.add_argument('--kind', choices=KINDS)
+    p.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "attribute":
+        t0 = time.perf_counter()
+        logs = [np.array(load(path)) for path in args.logs]
+        for i, log_events in enumerate(logs):
+            log_events["run"][log_events["run"] == b""] = f"log{i}".encode()   # untagged: one run per file
+        events = np.concatenate(logs)
+        log(f"loaded {len(events)} events in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+        print(json.dumps(attribution(events), indent=2))
+    elif args.command == "convert":
+        if os.path.exists(args.dest):
+            os.remove(args.dest)
+        append(args.dest, to_records(load(args.source)))
+        log(f"{args.source} ({os.path.getsize(args.source)} bytes) -> "
+            f"{args.dest} ({os.path.getsize(args.dest)} bytes)")
+    else:
+        events = load(args.log)
+        if args.kind:
+            events = events[events["kind"] == KINDS.index(args.kind)]
+        for rec in to_records(events[:args.limit]):
+            print(json.dumps(rec))
+
+if __name__ == "__main__":
+    main()
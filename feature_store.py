@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Precomputed daily feature store for the HV-7 condor gates.
+
+Builds a volatility index's daily level once per data version into a single
+.npy file, named after the index (vix, vxn, rvx ...), that is memory-mapped by
+readers. Rows are point-in-time: the row keyed by session date D holds what
+the strategy can see intraday on D (the previous session's CBOE close),
+exactly like Securities[vix].Price inside OpenCondor. The IV rank and the gate
+thresholds are not baked in: the engine and the screener derive them from the
+same rows over the window the strategy sees, so neither ever rebuilds the store.
+"""
+
+import os
+import sys
+import json
+import glob
+import hashlib
+import tempfile
+import argparse
+import numpy as np
+
+VIX_SOURCE = "data/alternative/cboe/vix.csv"   # Lean CBOE layout: yyyyMMdd,open,high,low,close
+STORE_DIR = "data/features"
+STORE_VERSION = 3                              # 3: date and level only, no lookback in the name
+
+def log(message):
+    """Log message to stderr"""
+    print(f"[feature_store] {message}", file=sys.stderr)
+
+def source_hash(path):
+    """Return the content hash identifying one version of the source data"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+def load_vix_csv(path):
+    """Load a CBOE daily csv into (dates, closes) arrays sorted by date"""
+    raw = np.genfromtxt(path, delimiter=',', dtype=None, encoding='utf-8',
+                        usecols=(0, 4), names=('date', 'close'), invalid_raise=False)
+    raw = raw[~np.isnan(raw['close'])]
+    dates = np.array([f"{d[:4]}-{d[4:6]}-{d[6:8]}" for d in raw['date'].astype(str)],
+                     dtype='datetime64[D]')
+    order = np.argsort(dates, kind='stable')
+    return dates[order], raw['close'][order].astype(np.float64)
+
+STORE_DTYPE = np.dtype([('date', 'datetime64[D]'), ('vix', 'f8')])
+
+def compute_features(dates, closes):
+    """Compute the point-in-time feature table for every session after the first"""
+    rows = np.zeros(max(len(dates) - 1, 0), dtype=STORE_DTYPE)
+    rows['date'] = dates[1:]
+    rows['vix'] = closes[:-1]                   # what the algorithm sees on D is close of D-1
+    return rows
+
+def index_name(source):
+    """Vol index a CBOE csv holds, from its file name (vxn.csv → vxn)"""
+    return os.path.splitext(os.path.basename(source))[0].lower()
+
+def store_path(store_dir, index, digest):
+    """Path of the store file for one vol index and data version"""
+    return os.path.join(store_dir, f"{index}_{digest}.npy")
+
+def read_meta(path):
+    """Metadata written next to a store file, or None if it is missing or unreadable"""
+    try:
+        with open(path[:-4] + ".json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_feature_store(source=VIX_SOURCE, store_dir=STORE_DIR, digest=None):
+    """Build the store for the current source version, dropping stale versions"""
+    digest = digest or source_hash(source)
+    index = index_name(source)
+    path = store_path(store_dir, index, digest)
+    os.makedirs(store_dir, exist_ok=True)
+
+    dates, closes = load_vix_csv(source)
+    rows = compute_features(dates, closes)
+    # unique temp names: concurrent builders (pool workers, parallel runs) must not share one
+    fd, tmp = tempfile.mkstemp(suffix=".npy", dir=store_dir)
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, rows)
+    os.replace(tmp, path)
+    fd, tmp = tempfile.mkstemp(suffix=".json", dir=store_dir)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({
+            'version': STORE_VERSION,
+            'source': source,
+            'source_hash': digest,
+            'index': index,
+            'rows': int(len(rows))
+        }, f, indent=2)
+    os.replace(tmp, path[:-4] + ".json")
+
+    for stale in glob.glob(os.path.join(store_dir, f"{index}_*.npy")):
+        if stale != path:
+            os.remove(stale)
+            meta = stale[:-4] + ".json"
+            if os.path.exists(meta):
+                os.remove(meta)
+    log(f"built {path} ({len(rows)} rows)")
+    return path
+
+def open_feature_store(source=VIX_SOURCE, store_dir=STORE_DIR):
+    """Memory-map the store for the current source version, building it if missing or stale"""
+    digest = source_hash(source)
+    path = store_path(store_dir, index_name(source), digest)
+    meta = read_meta(path) if os.path.exists(path) else None
+    if meta is None or meta.get('version') != STORE_VERSION:
+        path = build_feature_store(source, store_dir, digest)
+    return np.load(path, mmap_mode='r')
+
+def main():
+    """Build the feature store from the command line"""
+    parser = argparse.ArgumentParser(description="Build the daily vol-index feature store")
+    parser.add_argument('--source', default=VIX_SOURCE)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    store = open_feature_store(args.source, args.store_dir)
+    print(json.dumps({
+        'index': index_name(args.source),
+        'rows': int(len(store)),
+        'first': str(store['date'][0]) if len(store) else None,
+        'last': str(store['date'][-1]) if len(store) else None
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Chain-selection and condor-valuation kernels with switchable backends.
+
+  python  reference loops, the behaviour every other backend must match
+  numpy   vectorized, allocates a few temporaries per call
+  numba   compiled loops, no temporaries (only if numba is installed)
+
+The backend is picked from HV7_KERNELS (default: numba when importable, else
+numpy) and can be switched at runtime with set_backend(). Run this file with
+--check to verify parity of every available backend against python.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Leg order used everywhere: wing_put, short_put, short_call, wing_call
+CONDOR_RATIOS = np.array([1, -1, -1, 1], dtype=np.float64)   # long wings, short bodies
+
+# -------- PYTHON ------------------------------------------------------------
+def _py_nearest_delta(delta, right, eligible, want_right, target):
+    best, best_dist = -1, np.inf
+    for i in range(len(delta)):
+        if eligible[i] and right[i] == want_right and delta[i] == delta[i]:
+            dist = abs(delta[i] - target)
+            if dist < best_dist:
+                best, best_dist = i, dist
+    return best
+
+def _py_match_strike(strike, right, eligible, want_right, target):
+    for i in range(len(strike)):
+        if eligible[i] and right[i] == want_right and abs(strike[i] - target) < 1e-6:
+            return i
+    return -1
+
+def _py_condor_marks(bid, ask, legs):
+    m = len(legs)
+    credit, cost = np.empty(m), np.empty(m)
+    for k in range(m):
+        wp, sp, sc, wc = legs[k]
+        credit[k] = bid[sp] + bid[sc] - ask[wp] - ask[wc]
+        cost[k] = ask[sp] + ask[sc] - bid[wp] - bid[wc]
+    return credit, cost
+
+def _py_aggregate(col, legs, ratios):
+    out = np.empty(len(legs))
+    for k in range(len(legs)):
+        total = 0.0
+        for j in range(4):
+            if ratios[j] != 0:
+                total += ratios[j] * col[legs[k][j]]
+        out[k] = total
+    return out
+
+# -------- NUMPY -------------------------------------------------------------
+def _np_nearest_delta(delta, right, eligible, want_right, target):
+    dist = np.abs(delta - target)
+    dist[~(eligible & (right == want_right)) | np.isnan(delta)] = np.inf
+    i = int(np.argmin(dist)) if len(dist) else -1
+    return i if i >= 0 and np.isfinite(dist[i]) else -1
+
+def _np_match_strike(strike, right, eligible, want_right, target):
+    hit = np.flatnonzero(eligible & (right == want_right) & (np.abs(strike - target) < 1e-6))
+    return int(hit[0]) if len(hit) else -1
+
+def _np_condor_marks(bid, ask, legs):
+    b, a = bid[legs], ask[legs]
+    credit = b[:, 1] + b[:, 2] - a[:, 0] - a[:, 3]
+    cost = a[:, 1] + a[:, 2] - b[:, 0] - b[:, 3]
+    return credit, cost
+
+def _np_aggregate(col, legs, ratios):
+    used = ratios != 0
+    return col[legs[:, used]] @ ratios[used]
+
+BACKENDS = {
+    "python": {
+        "nearest_delta": _py_nearest_delta,
+        "match_strike": _py_match_strike,
+        "condor_marks": _py_condor_marks,
+        "aggregate": _py_aggregate,
+    },
+    "numpy": {
+        "nearest_delta": _np_nearest_delta,
+        "match_strike": _np_match_strike,
+        "condor_marks": _np_condor_marks,
+        "aggregate": _np_aggregate,
+    },
+}
+
+# -------- NUMBA -------------------------------------------------------------
+if numba is not None:
+    _nb = numba.njit(cache=True, nogil=True)
+
+    @_nb
+    def _nb_condor_marks(bid, ask, legs):
+        m = legs.shape[0]
+        credit, cost = np.empty(m), np.empty(m)
+        for k in range(m):
+            wp, sp, sc, wc = legs[k, 0], legs[k, 1], legs[k, 2], legs[k, 3]
+            credit[k] = bid[sp] + bid[sc] - ask[wp] - ask[wc]
+            cost[k] = ask[sp] + ask[sc] - bid[wp] - bid[wc]
+        return credit, cost
+
+    @_nb
+    def _nb_aggregate(col, legs, ratios):
+        out = np.empty(legs.shape[0])
+        for k in range(legs.shape[0]):
+            total = 0.0
+            for j in range(4):
+                if ratios[j] != 0:
+                    total += ratios[j] * col[legs[k, j]]
+            out[k] = total
+        return out
+
+    BACKENDS["numba"] = {
+        "nearest_delta": _nb(_py_nearest_delta),
+        "match_strike": _nb(_py_match_strike),
+        "condor_marks": _nb_condor_marks,
+        "aggregate": _nb_aggregate,
+    }
+
+_backend = None
+
+def set_backend(name):
+    """Select the kernel backend: python, numpy or numba"""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Kernel backend '{name}' unavailable; have {sorted(BACKENDS)}")
+    _backend = name
+
+def get_backend():
+    """Name of the active kernel backend"""
+    return _backend
+
+set_backend(os.environ.get("HV7_KERNELS", "numba" if "numba" in BACKENDS else "numpy"))
+
+# -------- DISPATCH ----------------------------------------------------------
+def nearest_delta(delta, right, eligible, want_right, target):
+    """Index of the eligible contract of want_right whose delta is closest to target, else -1"""
+    return BACKENDS[_backend]["nearest_delta"](delta, right, eligible, want_right, target)
+
+def match_strike(strike, right, eligible, want_right, target):
+    """Index of the first eligible contract of want_right listed at target, else -1"""
+    return BACKENDS[_backend]["match_strike"](strike, right, eligible, want_right, target)
+
+def condor_marks(bid, ask, legs):
+    """(open credit, cost to close) per condor for an (m, 4) array of leg slots"""
+    return BACKENDS[_backend]["condor_marks"](bid, ask, np.asarray(legs, dtype=np.int64))
+
+def aggregate(col, legs, ratios=CONDOR_RATIOS):
+    """Per-condor sum of ratio × leg value of a column (mid, delta, vega ...) for (m, 4) leg slots
+
+    Legs with a zero ratio are skipped, so their NaNs do not leak into the sum.
+    """
+    return BACKENDS[_backend]["aggregate"](col, np.asarray(legs, dtype=np.int64),
+                                           np.asarray(ratios, dtype=np.float64))
+
+# -------- PARITY ------------------------------------------------------------
+def random_chain(rng, n):
+    """Synthetic one-expiry chain: half calls, half puts on a $1 strike grid"""
+    strike = np.repeat(np.arange(n // 2, dtype=np.float64) + 400.0, 2)
+    right = np.tile(np.array([0, 1], dtype=np.int8), n // 2)
+    delta = np.where(right == 0, 1, -1) * rng.uniform(0, 1, n)
+    delta[rng.uniform(size=n) < 0.05] = np.nan
+    eligible = rng.uniform(size=n) < 0.9
+    bid = rng.uniform(0.01, 10, n)
+    ask = bid + rng.uniform(0.01, 0.2, n)
+    return strike, right, delta, eligible, bid, ask
+
+def check_parity(trials=200, seed=0):
+    """Compare every backend with the python reference; returns mismatch counts"""
+    rng = np.random.default_rng(seed)
+    mismatches = {name: 0 for name in BACKENDS if name != "python"}
+    ref = BACKENDS["python"]
+    for _ in range(trials):
+        n = int(rng.integers(2, 200)) * 2
+        strike, right, delta, eligible, bid, ask = random_chain(rng, n)
+        target = float(rng.uniform(0.05, 0.5))
+        wing = float(strike[rng.integers(n)])
+        legs = rng.integers(0, n, size=(int(rng.integers(1, 50)), 4))
+        expected = (
+            ref["nearest_delta"](delta, right, eligible, 1, -target),
+            ref["nearest_delta"](delta, right, eligible, 0, target),
+            ref["match_strike"](strike, right, eligible, 1, wing),
+            ref["condor_marks"](bid, ask, legs),
+            ref["aggregate"](delta, legs, CONDOR_RATIOS),
+        )
+        for name in mismatches:
+            k = BACKENDS[name]
+            got = (
+                k["nearest_delta"](delta, right, eligible, 1, -target),
+                k["nearest_delta"](delta, right, eligible, 0, target),
+                k["match_strike"](strike, right, eligible, 1, wing),
+                k["condor_marks"](bid, ask, legs),
+                k["aggregate"](delta, legs, CONDOR_RATIOS),
+            )
+            same = (got[:3] == expected[:3] and
+                    all(np.allclose(g, e, equal_nan=True) for g, e in zip(got[3], expected[3])) and
+                    np.allclose(got[4], expected[4], equal_nan=True))
+            mismatches[name] += not same
+    return mismatches
+
+def benchmark(n=800, condors=50, repeat=2000, seed=0):
+    """Microseconds per selection + valuation round for each backend"""
+    rng = np.random.default_rng(seed)
+    strike, right, delta, eligible, bid, ask = random_chain(rng, n)
+    legs = rng.integers(0, n, size=(condors, 4))
+    timings = {}
+    for name, k in BACKENDS.items():
+        k["condor_marks"](bid, ask, legs)                       # compile outside the timer
+        k["nearest_delta"](delta, right, eligible, 1, -0.2)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            k["nearest_delta"](delta, right, eligible, 1, -0.2)
+            k["nearest_delta"](delta, right, eligible, 0, 0.2)
+            k["match_strike"](strike, right, eligible, 1, 420.0)
+            k["condor_marks"](bid, ask, legs)
+            k["aggregate"](delta, legs, CONDOR_RATIOS)
+        timings[name] = (time.perf_counter() - t0) / repeat * 1e6
+    return timings
+
+def main():
+    """Parity check and micro-benchmark from the command line"""
+    parser = argparse.ArgumentParser(description="HV-7 kernel backends")
+    parser.add_argument('--check', action='store_true', help="parity of every backend vs python")
+    parser.add_argument('--bench', action='store_true', help="time every backend")
+    args = parser.parse_args()
+
+    print(f"backends: {sorted(BACKENDS)}  active: {get_backend()}")
+    if args.check:
+        mismatches = check_parity()
+        print(json.dumps(mismatches, indent=2))
+        if any(mismatches.values()):
+            sys.exit(1)
+    if args.bench:
+        print(json.dumps({k: f"{v:.1f} us" for k, v in benchmark().items()}, indent=2))
+
+if __name__ == "__main__":
+    main()
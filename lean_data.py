@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Streaming, parallel reader for Lean-format local option data.
+
+Reads QuantConnect's on-disk minute data straight from the daily zips:
+
+    option/usa/minute/<ticker>/yyyymmdd_quote_american.zip
+        yyyymmdd_<ticker>_minute_quote_american_<call|put>_<strike×10000>_<expiry>.csv
+        rows: ms since midnight, bid o/h/l/c, bid size, ask o/h/l/c, ask size
+    equity/usa/minute/<ticker>/yyyymmdd_trade.zip
+        rows: ms since midnight, o/h/l/c, volume
+
+Prices are scaled by 10000. Each member is decompressed in chunks and parsed
+into NumPy columns without touching disk; a session is reduced to the quotes
+visible at the decision minutes, with IV and greeks from pricing.py, in the
+same column layout as the local engine's .npz snapshots. Sessions decode in a
+process pool behind a bounded prefetch queue, so decoding overlaps with the
+strategy consuming earlier sessions.
+"""
+
+import os
+import re
+import sys
+import json
+import zipfile
+import argparse
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pricing
+import local_engine
+import trading_calendar
+
+LEAN_DATA = "data"                      # lean.json data-folder
+SCALE = 10000.0
+CHUNK = 1 << 20                         # decompressed bytes parsed per step
+PREFETCH = 4                            # sessions decoded ahead of the consumer
+QUOTE_COLUMNS = 11
+TRADE_COLUMNS = 6
+EXPIRY_MINUTE = local_engine.EXPIRY_MINUTE
+MEMBER = re.compile(r"_(call|put)_(\d+)_(\d{8})\.csv$")
+
+def log(message):
+    """Log message to stderr"""
+    print(f"[lean_data] {message}", file=sys.stderr)
+
+def option_zip(lean_dir, ticker, day, kind="quote"):
+    """Path of one session's option zip"""
+    return os.path.join(lean_dir, "option", "usa", "minute", ticker.lower(),
+                        f"{str(day).replace('-', '')}_{kind}_american.zip")
+
+def equity_zip(lean_dir, ticker, day):
+    """Path of one session's underlying trade-bar zip"""
+    return os.path.join(lean_dir, "equity", "usa", "minute", ticker.lower(),
+                        f"{str(day).replace('-', '')}_trade.zip")
+
+# -------- PARSING -----------------------------------------------------------
+def _floats(body):
+    """Flat float array of the comma/newline separated numbers in body; blank fields are NaN
+
+    Quote rows leave the bid or ask OHLC blank when that side had no quote.
+    """
+    fields = body.strip().replace(b"\r", b"").replace(b"\n", b",").split(b",")
+    try:
+        return np.array(fields, dtype=np.float64)
+    except ValueError:
+        return np.array([f if f.strip() else b"nan" for f in fields], dtype=np.float64)
+
+def parse_csv(stream, columns):
+    """Decompress a zip member in CHUNK steps into an (n, columns) float array"""
+    parts, tail = [], b""
+    while True:
+        chunk = stream.read(CHUNK)
+        if not chunk:
+            break
+        buf = tail + chunk
+        cut = buf.rfind(b"\n")
+        if cut < 0:
+            tail = buf
+            continue
+        body, tail = buf[:cut], buf[cut + 1:]
+        if body.strip():
+            parts.append(_floats(body))
+    if tail.strip():
+        parts.append(_floats(tail))
+    if not parts:
+        return np.empty((0, columns))
+    return np.concatenate(parts).reshape(-1, columns)
+
+def visible_rows(ms, minutes):
+    """Row of the last bar closed by each decision minute (-1 if none yet)"""
+    cutoff = (np.asarray(minutes, dtype=np.int64) - 1) * 60000     # bar starting at m-1 ends at m
+    return np.searchsorted(ms, cutoff, side='right') - 1
+
+def read_spot(lean_dir, ticker, day):
+    """(minute, close) of the underlying's minute trade bars"""
+    path = equity_zip(lean_dir, ticker, day)
+    with zipfile.ZipFile(path) as zf:
+        with zf.open(zf.namelist()[0]) as f:
+            bars = parse_csv(f, TRADE_COLUMNS)
+    # a bar is known at its end: minute = start + 1
+    return (bars[:, 0] // 60000 + 1).astype(np.int16), bars[:, 4] / SCALE
+
+def read_session(lean_dir, ticker, day, minutes):
+    """One session as snapshot columns at the decision minutes (see local_engine.load_snapshot_day)"""
+    day = np.datetime64(day, 'D')
+    minutes = np.asarray(sorted(minutes), dtype=np.int64)
+    spot_minute, spot = read_spot(lean_dir, ticker, day)
+
+    cols = {k: [] for k in ("minute", "symbol", "expiry", "strike", "right", "bid", "ask")}
+    with zipfile.ZipFile(option_zip(lean_dir, ticker, day)) as zf:
+        for name in zf.namelist():
+            m = MEMBER.search(name)
+            if not m:
+                continue
+            with zf.open(name) as f:
+                rows = parse_csv(f, QUOTE_COLUMNS)
+            if not len(rows):
+                continue
+            seen = visible_rows(rows[:, 0], minutes)
+            have = seen >= 0
+            if not have.any():
+                continue
+            right = pricing.CALL if m[1] == "call" else pricing.PUT
+            strike = int(m[2]) / SCALE
+            expiry = np.datetime64(f"{m[3][:4]}-{m[3][4:6]}-{m[3][6:]}", 'D')
+            symbol = f"{ticker.upper()}{m[3][2:]}{'CP'[right]}{int(round(strike * 1000)):08d}"
+            n = int(have.sum())
+            cols["minute"].append(minutes[have])
+            cols["symbol"].append(np.full(n, symbol))
+            cols["expiry"].append(np.full(n, expiry))
+            cols["strike"].append(np.full(n, strike))
+            cols["right"].append(np.full(n, right, dtype=np.int8))
+            cols["bid"].append(rows[seen[have], 4] / SCALE)      # bid close
+            cols["ask"].append(rows[seen[have], 9] / SCALE)      # ask close
+
+    if not cols["minute"]:
+        return None
+    data = {k: np.concatenate(v) for k, v in cols.items()}
+    order = np.argsort(data["minute"], kind='stable')
+    data = {k: v[order] for k, v in data.items()}
+    data["minute"] = data["minute"].astype(np.int16)
+    data["bid"] = np.where(data["bid"] > 0, data["bid"], np.nan)
+    data["ask"] = np.where(data["ask"] > 0, data["ask"], np.nan)
+
+    # greeks from the mid against the spot visible at each decision minute
+    j = np.searchsorted(spot_minute, data["minute"], side='right') - 1
+    s = np.where(j >= 0, spot[np.maximum(j, 0)], np.nan)
+    close = data["expiry"].astype('datetime64[m]') + np.timedelta64(EXPIRY_MINUTE, 'm')
+    now = day + data["minute"].astype('timedelta64[m]')
+    t = pricing.year_fraction((close - now).astype(np.int64) / 1440.0)
+    mid = 0.5 * (data["bid"] + data["ask"])
+    iv = pricing.implied_vol(mid, s, data["strike"], t, data["right"])
+    data["iv"] = iv
+    data["delta"] = np.where(np.isfinite(iv), pricing.bs_delta(s, data["strike"], t, iv, data["right"]), np.nan)
+    data["gamma"] = pricing.bs_gamma(s, data["strike"], t, iv)
+    data["vega"] = pricing.bs_vega(s, data["strike"], t, iv)
+    data["theta"] = pricing.bs_theta(s, data["strike"], t, iv, data["right"])
+    data["spot_minute"], data["spot"] = spot_minute, spot
+    return data
+
+def _decode(job):
+    lean_dir, ticker, day, minutes = job
+    try:
+        return read_session(lean_dir, ticker, day, minutes)
+    except (OSError, zipfile.BadZipFile, IndexError, ValueError) as e:
+        log(f"skipping {ticker} {day}: {type(e).__name__}: {e}")
+        return None
+
+# -------- FEED --------------------------------------------------------------
+def session_days(lean_dir, ticker, start, end):
+    """NYSE sessions in [start, end] with an option quote zip"""
+    cal = trading_calendar.for_window(start, end)
+    sessions = cal.sessions[(cal.sessions >= np.datetime64(start, 'D')) &
+                            (cal.sessions <= np.datetime64(end, 'D'))]
+    return [d for d in sessions if os.path.exists(option_zip(lean_dir, ticker, d))]
+
+def iter_sessions(lean_dir, underlyings, start, end, minutes, procs=None, prefetch=PREFETCH, wanted=None):
+    """Yield (day, {underlying: columns}) in date order, decoding up to prefetch sessions ahead
+
+    wanted(day) names the underlyings to decode. It is asked speculatively when a
+    session is queued and again when it is consumed; anything needed only by then
+    is decoded on the spot and anything no longer needed is dropped.
+    """
+    days = sorted({d for u in underlyings for d in session_days(lean_dir, u, start, end)})
+    minutes = list(minutes)
+    pick = (lambda day: underlyings) if wanted is None else wanted
+    with ProcessPoolExecutor(max_workers=procs) as pool:
+        def submit(day, names):
+            return {u: pool.submit(_decode, (lean_dir, u, day, minutes)) for u in underlyings if u in names}
+        queue = deque()
+        pending = iter(days)
+        for day in pending:
+            queue.append((day, submit(day, pick(day))))
+            if len(queue) >= prefetch:
+                break
+        while queue:
+            day, futures = queue.popleft()
+            for nxt in pending:                        # keep the pool prefetch sessions ahead
+                queue.append((nxt, submit(nxt, pick(nxt))))
+                break
+            need = pick(day)
+            for u in [u for u in futures if u not in need]:
+                futures.pop(u).cancel()
+            futures.update(submit(day, [u for u in need if u not in futures]))
+            yield day, {u: f.result() for u, f in futures.items() if f.result() is not None}
+
+def iter_lean(lean_dir, underlyings, start, end, minutes, procs=None, prefetch=PREFETCH, wanted=None):
+    """Yield (time, {underlying: batch}) frames, like local_engine.iter_snapshots"""
+    for day, sessions in iter_sessions(lean_dir, underlyings, start, end, minutes, procs, prefetch, wanted):
+        frames = {}
+        for u, data in sessions.items():
+            for batch in local_engine.iter_day_batches(data, day, minutes):
+                frames.setdefault(batch["time"], {})[u] = batch
+        if not frames:
+            # nothing decoded (unwanted or unreadable): the session still rolls, settles and marks
+            yield from local_engine.idle_frames(day, minutes)
+        for t in sorted(frames):
+            yield t, frames[t]
+
+def export(lean_dir, underlyings, start, end, minutes, out_dir=local_engine.SNAPSHOT_DIR, procs=None):
+    """Write .npz snapshots so later runs skip decoding; returns sessions written"""
+    written = 0
+    for day, sessions in iter_sessions(lean_dir, underlyings, start, end, minutes, procs):
+        for u, data in sessions.items():
+            path = local_engine.snapshot_path(out_dir, u, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savez(path[:-4] + ".tmp.npz", **data)
+            os.replace(path[:-4] + ".tmp.npz", path)
+            written += 1
+    return written
+
+def main():
+    """Export Lean option zips to local-engine snapshots"""
+    parser = argparse.ArgumentParser(description="Decode Lean minute option zips into engine snapshots")
+    parser.add_argument('--lean-dir', default=LEAN_DATA)
+    parser.add_argument('--out', default=local_engine.SNAPSHOT_DIR)
+    parser.add_argument('--underlyings', nargs='+', default=list(local_engine.DEFAULT_PARAMS["UNDERLYINGS"]))
+    parser.add_argument('--start', default=local_engine.START)
+    parser.add_argument('--end', default=local_engine.END)
+    parser.add_argument('--params', default='{}', help="JSON params deciding the decision minutes")
+    parser.add_argument('--procs', type=int, default=None)
+    args = parser.parse_args()
+
+    params = dict(local_engine.DEFAULT_PARAMS, **json.loads(args.params))
+    n = export(args.lean_dir, args.underlyings, args.start, args.end,
+               local_engine.decision_minutes(params), args.out, args.procs)
+    log(f"wrote {n} sessions to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,859 @@
+#!/usr/bin/env python3
+"""
+Local HV-7 condor backtest engine.
+
+Replays decision-time option chain snapshots through the same entry and
+management rules as IronCondor/main.py, without a cloud round trip.
+
+Snapshots are one .npz per session under SNAPSHOT_DIR/<underlying>/yyyymmdd.npz
+holding flat, minute-sorted contract columns (minute, symbol, expiry, strike,
+right, bid, ask, delta, gamma, vega, theta, iv) plus the underlying's
+spot_minute/spot series; lean_data.py produces the same columns from Lean
+minute option zips, either on the fly (--lean-dir) or exported once. One run
+trades the whole UNDERLYINGS basket: each decision minute is a frame of
+per-underlying batches evaluated in one pass under a shared RISK_CAP.
+Warm-up only seeds the daily vol-index windows from the feature store;
+minute-level processing starts at the real start date.
+An up-front screener pass over the vol-index gates lets a session's chains be
+skipped unless it can open a condor or has one to manage.
+
+With a checkpoint directory the engine pickles its full state at session
+boundaries, so a crashed run resumes from the latest valid checkpoint and a
+sweep branch that only diverges at date D can fork from a base run's prefix.
+
+Every skip, entry and exit is also recorded as a structured event (events.py)
+and can be appended to an NDJSON or packed binary log with --events.
+"""
+
+import os
+import sys
+import json
+import glob
+import math
+import pickle
+import hashlib
+import argparse
+import numpy as np
+
+import criteria
+import events
+import feature_store
+import kernels
+import pricing
+import screener
+import smile
+import stress
+import trading_calendar
+
+SNAPSHOT_DIR = "data/snapshots"
+CBOE_DIR = os.path.dirname(feature_store.VIX_SOURCE)
+CHECKPOINT_DIR = "data/checkpoints"
+START, END = "2023-12-01", "2024-12-01"
+CASH = 100_000
+
+CALL, PUT = 0, 1                        # Lean OptionRight values
+
+# Mirrors the HV7Condor CONFIG block
+DEFAULT_PARAMS = {
+    # underlying → [CBOE volatility index, minimum index level for entry]
+    "UNDERLYINGS": {"SPY": ["VIX", 18.0], "QQQ": ["VXN", 22.0], "IWM": ["RVX", 22.0]},
+    "RISK_CAP": 0.35,
+    "DTE_MIN": 5,                       # trading days: the next same-weekday expiry
+    "DTE_MAX": 6,
+    "EXIT_DTE": 2,
+    "SHORT_DELTA": 0.20,
+    "SMILE_STRIKES": True,              # shorts from a per-expiry smile fit, not per-contract deltas
+    "WING_WIDTH": 5,
+    "IVR_MIN": 0.40,
+    "IVR_LOOKBACK": 252,
+    "CREDIT_TARGET": 0.30,
+    "PROFIT_TGT_PCT": 0.50,
+    "LOSS_STOP_MULT": 1.50,
+    "DELTA_ROLL_TRIG": 0.30,
+    "ROLL": True,                       # re-open new strikes in the bar a delta breach closes
+    "ENTRY_HOUR": 15,
+    "ENTRY_MINUTE": 40,
+    "MANAGE_HOUR": 15,
+    "MANAGE_MINUTE": 50,
+    "STRESS_LOSS_CAP": None,            # max stress-grid book loss, fraction of equity (None = off)
+    "EARLY_ABORT": False,               # stop once the success criteria are unreachable
+    "ABORT_BEST_R": criteria.ASSUMED_BEST_R,    # R a remaining winner is assumed to earn (heuristic)
+    "DD_GUARD": None,                   # stop once drawdown exceeds this fraction (None = off)
+}
+LEG_KEYS = ("wing_put", "short_put", "short_call", "wing_call")
+LEG_RIGHTS = (PUT, PUT, CALL, CALL)
+SHORT_PUT = np.array([0.0, 1.0, 0.0, 0.0])        # kernels.aggregate ratios picking one short leg
+SHORT_CALL = np.array([0.0, 0.0, 1.0, 0.0])
+EXPIRY_MINUTE = 16 * 60                 # options stop trading at the 16:00 close
+
+# Everything that evolves during a run; params/start/end/cash identify the run
+STATE_FIELDS = ("cash", "holdings", "condors", "closed", "equity", "next_id",
+                "day", "fired", "sessions", "vol_hist", "events")
+
+def log(message):
+    """Log message to stderr"""
+    print(f"[local_engine] {message}", file=sys.stderr)
+
+def decision_minutes(params):
+    """Minutes after midnight at which the scheduled events fire"""
+    return (params["ENTRY_HOUR"] * 60 + params["ENTRY_MINUTE"],
+            params["MANAGE_HOUR"] * 60 + params["MANAGE_MINUTE"])
+
+# -------- SNAPSHOT FEED -----------------------------------------------------
+def snapshot_path(data_dir, underlying, day):
+    """Path of one session's snapshot file"""
+    return os.path.join(data_dir, underlying.lower(), f"{str(day).replace('-', '')}.npz")
+
+def snapshot_days(data_dir, underlying, start, end):
+    """Sorted session dates with a snapshot file in [start, end]"""
+    days = []
+    for path in glob.glob(os.path.join(data_dir, underlying.lower(), "*.npz")):
+        stem = os.path.basename(path)[:-4]
+        days.append(np.datetime64(f"{stem[:4]}-{stem[4:6]}-{stem[6:8]}", 'D'))
+    days = np.array(sorted(days), dtype='datetime64[D]')
+    return days[(days >= np.datetime64(start, 'D')) & (days <= np.datetime64(end, 'D'))]
+
+def iter_day_batches(data, day, minutes=None):
+    """Split one session's minute-sorted columns into per-minute chain batches"""
+    minute_col = data["minute"]
+    wanted = np.unique(minute_col) if minutes is None else np.asarray(sorted(minutes))
+    lo = np.searchsorted(minute_col, wanted, side='left')
+    hi = np.searchsorted(minute_col, wanted, side='right')
+    spot_minute, spot = data["spot_minute"], data["spot"]
+    for m, a, b in zip(wanted, lo, hi):
+        if a == b:
+            continue
+        j = np.searchsorted(spot_minute, m, side='right') - 1
+        batch = {k: data[k][a:b] for k in data if k not in ("minute", "spot_minute", "spot")}
+        batch["time"] = day + np.timedelta64(int(m), 'm')
+        batch["spot"] = float(spot[j]) if j >= 0 else np.nan
+        yield batch
+
+def slot_index(batch):
+    """Symbol → row of one chain batch, built on first use and kept on the batch"""
+    if "slots" not in batch:
+        batch["slots"] = {s: i for i, s in enumerate(batch["symbol"].tolist())}
+    return batch["slots"]
+
+def load_snapshot_day(path):
+    """Load one session's snapshot columns into memory"""
+    with np.load(path) as npz:
+        return {k: npz[k] for k in npz.files}
+
+def feed_days(data_dir, underlyings, start, end):
+    """Sessions in [start, end] with a snapshot for any of the underlyings"""
+    return np.unique(np.concatenate([snapshot_days(data_dir, u, start, end) for u in underlyings]))
+
+def idle_frames(day, minutes):
+    """Chain-less frames at the decision minutes of a session whose chains were not loaded"""
+    for m in sorted(minutes or ()):
+        yield day + np.timedelta64(int(m), 'm'), {}
+
+def iter_snapshots(data_dir, underlyings, start, end, minutes=None, wanted=None):
+    """Yield (time, {underlying: batch}) frames for every session in [start, end]
+
+    wanted(day), asked just before a session is read, names the underlyings
+    whose chains to load; a session that loads no chain still yields idle frames.
+    """
+    for day in feed_days(data_dir, underlyings, start, end):
+        frames = {}
+        need = underlyings if wanted is None else [u for u in underlyings if u in wanted(day)]
+        for u in need:
+            path = snapshot_path(data_dir, u, day)
+            if not os.path.exists(path):
+                continue
+            for batch in iter_day_batches(load_snapshot_day(path), day, minutes):
+                frames.setdefault(batch["time"], {})[u] = batch
+        if not frames:
+            # nothing loaded (unwanted or missing): the session still rolls, settles and marks
+            yield from idle_frames(day, minutes)
+        for t in sorted(frames):
+            yield t, frames[t]
+
+# -------- FILLS -------------------------------------------------------------
+def fill_combo(bid, ask, slots, ratios, quantity, limit=None):
+    """Fill every leg of a combo against one quote snapshot in a single step.
+
+    Legs the combo buys take the ask, legs it sells take the bid. Returns the
+    net price per combo unit (debit positive, credit negative), or None when a
+    leg is unquoted or the combo limit is not met.
+    """
+    slots = np.asarray(slots)
+    px = np.where(np.asarray(ratios) * quantity > 0, ask[slots], bid[slots])
+    if not np.all(np.isfinite(px)):
+        return None
+    net = float(px @ ratios)
+    if limit is not None and (net > limit + 1e-9 if quantity > 0 else net < limit - 1e-9):
+        return None
+    return net
+
+# -------- ENGINE ------------------------------------------------------------
+class LocalBacktest:
+
+    def __init__(self, vol_stores, params=None, start=START, end=END, cash=CASH):
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.tickers = list(self.params["UNDERLYINGS"])     # row i of every array is tickers[i]
+        self.vol_min = np.array([v[1] for v in self.params["UNDERLYINGS"].values()], dtype=float)
+        self.start = np.datetime64(start, 'D')
+        self.end = np.datetime64(end, 'D')
+        self.initial_cash = float(cash)
+        self.cash = float(cash)
+        self.holdings = {}      # symbol → signed contracts
+        self.condors = {}       # condor-id → dict(details)
+        self.closed = []        # closed-trade records
+        self.equity = []        # (session, equity) at each management time
+        self.events = []        # structured skip/open/exit records (events.py)
+        self.ladders = {}       # (underlying, expiry) → {right: (strikes, symbols)}, this session's listings
+        self.next_id = 1
+        self.day = None
+        self.time = None        # frame time being processed
+        self.fired = set()      # scheduled events already run this session
+        self.sessions = 0       # sessions processed so far
+        self.resume_day = None  # first session still to process after a restore
+        self.vol_dates = [np.asarray(vol_stores[t]["date"]) for t in self.tickers]
+        self.vol_closes = [np.asarray(vol_stores[t]["vix"]) for t in self.tickers]
+        self.vol_hist = np.full((len(self.tickers), self.params["IVR_LOOKBACK"]), np.nan)   # oldest → newest
+        self.calendar = trading_calendar.for_window(self.start, self.end)
+        self.progress = False   # log every closed trade with its R
+        self.gates = None       # {entry day: underlyings past the vol/IV-rank gates} (screener.py)
+        self.aborted = None     # (reason, session) once early abort stops the run
+        self.criteria = self.new_criteria()
+        self.warm_up()
+
+    # -------- WARM-UP ----------------------------------------------------------
+    def warm_up(self):
+        """Seed the daily vol-index windows from point-in-time rows before the start date"""
+        n = self.vol_hist.shape[1]
+        for k, (dates, closes) in enumerate(zip(self.vol_dates, self.vol_closes)):
+            i = np.searchsorted(dates, self.start, side='left')
+            seed = closes[max(0, i - n):i]
+            self.vol_hist[k, n - len(seed):] = seed
+
+    def new_day(self, day):
+        """Roll the session: push that day's visible vol-index closes and settle expired condors"""
+        self.day = day
+        self.fired = set()
+        self.sessions += 1
+        for k, (dates, closes) in enumerate(zip(self.vol_dates, self.vol_closes)):
+            i = np.searchsorted(dates, day, side='left')
+            if i < len(dates) and dates[i] == day:
+                self.vol_hist[k, :-1] = self.vol_hist[k, 1:]
+                self.vol_hist[k, -1] = closes[i]
+        for oid in [oid for oid, cd in self.condors.items() if cd["expiry"] < day]:
+            self.settle(oid)
+        # rebuilt every session, so later listings reach rolls and a resume sees the same ladders
+        self.ladders = {}
+
+    # -------- EVENT LOOP ---------------------------------------------------------
+    def run(self, feed, checkpoint_dir=None, checkpoint_every=0):
+        """Process a stream of (time, {underlying: batch}) frames and return the metrics"""
+        entry_min, manage_min = decision_minutes(self.params)
+        first = self.resume_day or self.start
+        for t, batches in feed:
+            day = t.astype('datetime64[D]')
+            if day < first or day > self.end:
+                continue
+            self.time = t
+            if day != self.day:
+                if (checkpoint_dir and checkpoint_every and self.day is not None and
+                        self.sessions % checkpoint_every == 0):
+                    self.save_checkpoint(checkpoint_dir, day)
+                self.new_day(day)
+            minute = int((t - day).astype('timedelta64[m]').astype(np.int64))
+            if (minute >= entry_min and "entry" not in self.fired and
+                    self.calendar.is_entry_day(day)):
+                self.fired.add("entry")
+                self.open_condor(batches)
+            if minute >= manage_min and "manage" not in self.fired:
+                self.fired.add("manage")
+                self.manage_positions(batches)
+                reason = self.abort_reason()
+                if reason:
+                    self.aborted = (reason, str(day))
+                    log(f"aborted on {day}: {reason} ({json.dumps(self.criteria.summary())})")
+                    break
+        return self.results()
+
+    def chains_needed(self, day):
+        """Underlyings whose option chain day needs: open condors, or an entry the gates let through"""
+        if self.gates is None:
+            return set(self.tickers)
+        need = {cd["underlying"] for cd in self.condors.values()}
+        # portfolio value is at most cash (marks are costs to close), so this room is an upper bound
+        room = self.cash * self.params["RISK_CAP"] - sum(cd["risk"] for cd in self.condors.values())
+        if self.calendar.is_entry_day(day) and room >= self.params["WING_WIDTH"] * 100:
+            need |= self.gates.get(day, set())
+        return need
+
+    # -------- RUNNING CRITERIA -------------------------------------------------
+    def new_criteria(self):
+        """Running criteria tracker configured from the params"""
+        tracker = criteria.RunningCriteria(best_r=self.params["ABORT_BEST_R"],
+                                           max_drawdown=self.params["DD_GUARD"])
+        tracker.add_equity(self.initial_cash)
+        return tracker
+
+    def abort_reason(self):
+        """Why the run should stop now, or None"""
+        remaining = None
+        if self.params["EARLY_ABORT"]:
+            # every open condor closes and every later entry opens one per underlying
+            condors = len(self.condors) + len(self.tickers) * self.calendar.entry_days_between(
+                self.day, self.end)
+            remaining = condors
+            if self.params["ROLL"]:
+                # a roll closes a trade and opens a condor in the same bar: at most one per
+                # condor alive per remaining management bar
+                remaining += condors * int(self.calendar.trading_dte(self.day, self.end))
+        return self.criteria.verdict(remaining)
+
+    # -------- ENTRY ------------------------------------------------------------
+    def open_condor(self, batches):
+        """Entry pass over the whole basket; returns {underlying: outcome}"""
+        p = self.params
+
+        # --- 1) VOLATILITY FILTERS (all underlyings at once)
+        vol_now = self.vol_hist[:, -1]
+        iv_rank = self.iv_rank()
+        outcome = {}
+        with np.errstate(invalid='ignore'):
+            vol_ok = vol_now >= self.vol_min
+            ivr_ok = iv_rank >= p["IVR_MIN"]
+        for k, ticker in enumerate(self.tickers):
+            if not vol_ok[k]:
+                outcome[ticker] = "vol"
+            elif not ivr_ok[k]:
+                outcome[ticker] = "ivr"
+
+        # --- 2) RISK BUDGET (shared by the basket)
+        risk_budget = self.portfolio_value() * p["RISK_CAP"]
+        risk_in_use = sum(cd["risk"] for cd in self.condors.values())
+        room = risk_budget - risk_in_use
+
+        shock = self.stress_shock(batches)
+
+        # richest IV-rank first, so a tight budget goes to the best candidate
+        for k in sorted(np.flatnonzero(vol_ok & ivr_ok), key=lambda k: -iv_rank[k]):
+            ticker = self.tickers[k]
+            if room < p["WING_WIDTH"] * 100:
+                outcome[ticker] = "risk"
+            elif ticker not in batches:
+                outcome[ticker] = "chain"
+            else:
+                outcome[ticker] = self.open_underlying(ticker, batches[ticker], room,
+                                                       float(iv_rank[k]), shock)
+                if outcome[ticker] == "open":
+                    room -= self.condors[self.next_id - 1]["risk"]
+        for k, ticker in enumerate(self.tickers):
+            if outcome.get(ticker, "open") != "open":
+                self.events.append(events.event(self.time, "skip", ticker, outcome[ticker],
+                                                vol=float(vol_now[k]), ivr=float(iv_rank[k])))
+        return outcome
+
+    def stress_shock(self, batches):
+        """Stress-grid surface of the book already open and the loss cap, or None when off"""
+        if self.params["STRESS_LOSS_CAP"] is None:
+            return None
+        # new condors are added to the surface as they open
+        return {
+            "cap": self.portfolio_value() * self.params["STRESS_LOSS_CAP"],
+            "surface": stress.surface(condor_book(self.condors, batches)),
+        }
+
+    def window_expiry(self, batch):
+        """Nearest expiry of batch within the trading-DTE window, or None"""
+        dte = self.calendar.trading_dte(self.day, batch["expiry"])
+        in_window = (dte >= self.params["DTE_MIN"]) & (dte <= self.params["DTE_MAX"])
+        return batch["expiry"][in_window].min() if in_window.any() else None
+
+    def open_underlying(self, ticker, batch, room, iv_rank, shock=None):
+        """Open one condor on ticker within room (and the stress cap); returns the outcome"""
+        # --- 3) CHAIN SELECTION (universe filter: expiry within the trading-DTE window)
+        expiry = self.window_expiry(batch)
+        if expiry is None:
+            return "chain"
+        self.ladder(ticker, batch, expiry)          # cached for smile picks and same-bar rolls
+
+        legs = None
+        fit = self.fit_smile(batch, expiry) if self.params["SMILE_STRIKES"] else None
+        if fit is not None:
+            legs = self.ladder_legs(ticker, batch, expiry, fit)
+        if legs is None:
+            # greeks may not be populated for every contract
+            eligible = (batch["expiry"] == expiry) & np.isfinite(batch["delta"])
+            legs = self.select_legs(batch, eligible)
+        if legs is None:
+            return "strikes"
+        return self.place(ticker, batch, legs, expiry, room, iv_rank, shock)
+
+    def place(self, ticker, batch, legs, expiry, room, iv_rank, shock=None):
+        """Size and fill a condor on batch rows legs; returns the outcome"""
+        p = self.params
+
+        # --- 4) CREDIT & POSITION SIZE
+        credit = float(kernels.condor_marks(batch["bid"], batch["ask"], [legs])[0][0])
+        if credit < p["WING_WIDTH"] * p["CREDIT_TARGET"]:
+            return "credit"
+
+        risk_per_condor = (p["WING_WIDTH"] - credit) * 100
+        qty = int(room // risk_per_condor)
+        if qty == 0: qty = 1
+
+        # worst-case grid loss of the whole book, this condor included, stays under the cap
+        unit = None
+        if shock is not None and np.isfinite(batch["spot"]):
+            unit = stress.surface(leg_book(batch, [legs], expiry, [1]))
+            qty = min(qty, stress.max_quantity(shock["surface"], unit, shock["cap"]))
+            if qty == 0:
+                return "stress"
+
+        # one combo at a net-credit limit, filled on this same quote snapshot
+        limit = -math.floor(credit * 100) / 100
+        net = fill_combo(batch["bid"], batch["ask"], legs, kernels.CONDOR_RATIOS, qty, limit)
+        if net is None:
+            return "unfilled"
+        symbols = [str(batch["symbol"][i]) for i in legs]
+        self.fill(symbols, kernels.CONDOR_RATIOS, qty, net)
+        credit = -net
+        oid = self.next_id
+        self.next_id += 1
+        self.condors[oid] = {
+            "underlying": ticker,
+            "qty": qty,
+            "credit": credit,
+            "risk": risk_per_condor * qty,
+            "expiry": expiry,
+            "opened": self.day,
+            "strikes": [float(batch["strike"][i]) for i in legs],
+            "wing_put": symbols[0],
+            "short_put": symbols[1],
+            "short_call": symbols[2],
+            "wing_call": symbols[3],
+            "mark": credit,
+            "ivr": iv_rank,
+        }
+        if unit is not None:
+            shock["surface"] = shock["surface"] + unit * qty
+        cd = self.condors[oid]
+        self.events.append(events.event(self.time, "open", ticker, id=oid, qty=qty, credit=credit,
+                                        ivr=iv_rank, strikes=cd["strikes"],
+                                        vol=float(self.vol_hist[self.tickers.index(ticker), -1])))
+        return "open"
+
+    def select_legs(self, batch, eligible):
+        """Pick (wing_put, short_put, short_call, wing_call) row indices, else None"""
+        p = self.params
+        delta, right, strike = batch["delta"], batch["right"], batch["strike"]
+        sp = kernels.nearest_delta(delta, right, eligible, PUT, -p["SHORT_DELTA"])
+        sc = kernels.nearest_delta(delta, right, eligible, CALL, p["SHORT_DELTA"])
+        if sp < 0 or sc < 0:
+            return None
+        wp = kernels.match_strike(strike, right, eligible, PUT, strike[sp] - p["WING_WIDTH"])
+        wc = kernels.match_strike(strike, right, eligible, CALL, strike[sc] + p["WING_WIDTH"])
+        if wp < 0 or wc < 0:
+            return None
+        return wp, sp, sc, wc
+
+    # -------- ROLLS --------------------------------------------------------------
+    def ladder(self, ticker, batch, expiry):
+        """Strike-sorted (strikes, symbols) per right of one expiry, cached for the session"""
+        key = (ticker, expiry)
+        if key not in self.ladders:
+            rows = batch["expiry"] == expiry
+            ladder = {}
+            for right in (PUT, CALL):
+                k = np.flatnonzero(rows & (batch["right"] == right))
+                k = k[np.argsort(batch["strike"][k], kind='stable')]
+                ladder[right] = (batch["strike"][k], batch["symbol"][k].tolist())
+            self.ladders[key] = ladder
+        return self.ladders[key]
+
+    def fit_smile(self, batch, expiry):
+        """Quadratic smile of one expiry at this bar (see smile.py), or None"""
+        rows = batch["expiry"] == expiry
+        return smile.fit_chain(batch["strike"][rows], batch["right"][rows], batch["bid"][rows],
+                               batch["ask"][rows], batch["spot"], years_to_expiry(batch["time"], expiry),
+                               batch["iv"][rows])
+
+    def ladder_legs(self, ticker, batch, expiry, fit=None):
+        """(wing_put, short_put, short_call, wing_call) rows picked on the cached ladder, else None
+
+        Shorts are the listed strikes nearest the smile's ±SHORT_DELTA strikes when
+        a fit is given, else the quoted contracts with delta nearest ±SHORT_DELTA.
+        """
+        p = self.params
+        index = slot_index(batch)
+        t = years_to_expiry(batch["time"], expiry)
+        legs = {}
+        for right, target, side in ((PUT, -p["SHORT_DELTA"], -1), (CALL, p["SHORT_DELTA"], 1)):
+            strikes, symbols = self.ladder(ticker, batch, expiry)[right]
+            if not len(strikes):
+                return None
+            rows = np.array([index.get(s, -1) for s in symbols], dtype=np.int64)
+            if fit is not None:
+                short = smile.snap(strikes, float(smile.delta_to_strike(fit, batch["spot"], t, target, right)))
+            else:
+                delta = np.where(rows >= 0, batch["delta"][rows], np.nan)
+                if not np.isfinite(delta).any():
+                    return None
+                short = int(np.nanargmin(np.abs(delta - target)))
+            if rows[short] < 0:
+                return None
+            wing = int(np.searchsorted(strikes, strikes[short] + side * p["WING_WIDTH"]))
+            if (wing >= len(strikes) or abs(strikes[wing] - strikes[short] - side * p["WING_WIDTH"]) > 1e-6
+                    or rows[wing] < 0):
+                return None
+            legs[right] = (int(rows[wing]), int(rows[short]))
+        return legs[PUT][0], legs[PUT][1], legs[CALL][1], legs[CALL][0]
+
+    def roll(self, ticker, expiry, batches):
+        """Re-open a condor on ticker in the bar one expiring at expiry closed on a delta breach"""
+        p = self.params
+        batch = batches[ticker]
+        # the entry window's expiry (rolling out), else the breached condor's own
+        window = self.window_expiry(batch)
+        if window is not None:
+            expiry = window
+        elif self.calendar.trading_dte(self.day, expiry) <= p["EXIT_DTE"]:
+            return "chain"
+        fit = self.fit_smile(batch, expiry) if p["SMILE_STRIKES"] else None
+        legs = self.ladder_legs(ticker, batch, expiry, fit)
+        if legs is None:
+            return "strikes"
+        room = self.portfolio_value() * p["RISK_CAP"] - sum(cd["risk"] for cd in self.condors.values())
+        if room < p["WING_WIDTH"] * 100:
+            return "risk"
+        k = self.tickers.index(ticker)
+        return self.place(ticker, batch, legs, expiry, room, float(self.iv_rank()[k]),
+                          self.stress_shock(batches))
+
+    # -------- DAILY MANAGEMENT -------------------------------------------------
+    def manage_positions(self, batches):
+        rolls = []
+        for ticker, batch in batches.items():
+            rolls += self.manage_underlying(ticker, batch)
+        # replacements go in after every exit of the bar, so they see the freed risk budget
+        for ticker, expiry in rolls:
+            outcome = self.roll(ticker, expiry, batches)
+            if outcome != "open":
+                self.events.append(events.event(self.time, "skip", ticker, outcome))
+        self.equity.append((self.day, self.portfolio_value()))
+        self.criteria.add_equity(self.equity[-1][1])
+
+    def manage_underlying(self, ticker, batch):
+        """Exit checks for every open condor on ticker against its batch; returns rolls to re-open"""
+        p = self.params
+        index = slot_index(batch)
+
+        # value every quoted condor with one gather
+        oids = [oid for oid, cd in self.condors.items()
+                if cd["underlying"] == ticker and all(cd[k] in index for k in LEG_KEYS)]
+        if not oids:
+            return []
+        legs = np.array([[index[self.condors[oid][k]] for k in LEG_KEYS] for oid in oids])
+        _, values = kernels.condor_marks(batch["bid"], batch["ask"], legs)
+        short_deltas = np.maximum(np.abs(kernels.aggregate(batch["delta"], legs, SHORT_PUT)),
+                                  np.abs(kernels.aggregate(batch["delta"], legs, SHORT_CALL)))
+        dtes = self.calendar.trading_dte(self.day, np.array([self.condors[oid]["expiry"] for oid in oids]))
+
+        rolls = []
+        for oid, slots, value, short_delta, dte in zip(oids, legs, values.tolist(),
+                                                       short_deltas.tolist(), dtes.tolist()):
+            cd = self.condors[oid]
+            cd["mark"] = value
+
+            if value <= cd["credit"] * p["PROFIT_TGT_PCT"]:
+                reason = "tp"
+            elif value >= cd["credit"] * p["LOSS_STOP_MULT"]:
+                reason = "sl"
+            elif dte <= p["EXIT_DTE"]:
+                reason = "time"
+            elif short_delta > p["DELTA_ROLL_TRIG"]:
+                reason = "roll"
+            else:
+                continue
+            net = fill_combo(batch["bid"], batch["ask"], slots, kernels.CONDOR_RATIOS, -cd["qty"])
+            if net is not None:
+                self.close_condor(oid, -net, reason)
+                if reason == "roll" and p["ROLL"]:
+                    rolls.append((ticker, cd["expiry"]))
+        return rolls
+
+    # -------- ORDERS & BOOK ----------------------------------------------------
+    def fill(self, symbols, ratios, qty, net):
+        """Book a combo fill of qty units at net price per unit (debit positive)"""
+        for symbol, ratio in zip(symbols, ratios):
+            pos = self.holdings.get(symbol, 0) + int(ratio) * qty
+            if pos:
+                self.holdings[symbol] = pos
+            else:
+                self.holdings.pop(symbol, None)
+        self.cash -= net * 100 * qty
+
+    def close_condor(self, oid, value, reason):
+        """Buy the condor back at value and record the closed trade"""
+        cd = self.condors.pop(oid)
+        symbols = [cd[k] for k in LEG_KEYS]
+        self.fill(symbols, kernels.CONDOR_RATIOS, -cd["qty"], -value)
+        pnl = (cd["credit"] - value) * 100 * cd["qty"]
+        self.closed.append({
+            "id": oid,
+            "underlying": cd["underlying"],
+            "opened": str(cd["opened"]),
+            "closed": str(self.day),
+            "reason": reason,
+            "qty": cd["qty"],
+            "credit": cd["credit"],
+            "exit": value,
+            "pnl": pnl,
+            "r": pnl / cd["risk"] if cd["risk"] else 0.0,
+        })
+        self.criteria.add_trade(self.closed[-1]["r"], pnl > 0)
+        self.events.append(events.event(self.time, "exit", cd["underlying"], reason, id=oid,
+                                        qty=cd["qty"], credit=cd["credit"], mark=value,
+                                        r=self.closed[-1]["r"]))
+        if self.progress:
+            log(f"CLOSE {reason} {cd['underlying']} condor {oid} on {self.day}  R={self.closed[-1]['r']:+.3f}")
+
+    def settle(self, oid):
+        """Close an expired condor at its last mark (it should have been time-exited)"""
+        self.close_condor(oid, self.condors[oid]["mark"], "expiry")
+
+    def portfolio_value(self):
+        """Cash plus the open condors marked at their last cost-to-close"""
+        return self.cash - sum(cd["mark"] * 100 * cd["qty"] for cd in self.condors.values())
+
+    # -------- CHECKPOINTS -------------------------------------------------------
+    def run_key(self):
+        """Identity of a run: parameters, date window, starting cash and vol-index data"""
+        h = hashlib.sha1(json.dumps(self.params, sort_keys=True).encode())
+        h.update(f"{self.start}|{self.end}|{self.initial_cash}".encode())
+        for closes in self.vol_closes:
+            h.update(np.ascontiguousarray(closes).tobytes())
+        return h.hexdigest()[:16]
+
+    def save_checkpoint(self, checkpoint_dir, resume_day):
+        """Pickle the state at the boundary before resume_day; returns the path"""
+        path = checkpoint_path(checkpoint_dir, self.run_key(), resume_day)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        state = {k: getattr(self, k) for k in STATE_FIELDS}
+        blob = {
+            "key": self.run_key(),
+            "params": self.params,
+            "resume_day": resume_day,
+            "state": state,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(blob, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return path
+
+    def restore(self, path, fork=False):
+        """Load a checkpoint; fork=True accepts one taken by a run with other params"""
+        blob = load_checkpoint(path)
+        if blob is None:
+            raise ValueError(f"Unreadable checkpoint: {path}")
+        if not fork and blob["key"] != self.run_key():
+            raise ValueError(f"Checkpoint {path} belongs to another run")
+        for k, v in blob["state"].items():
+            setattr(self, k, v)
+        self.resume_day = blob["resume_day"]
+        self.criteria = self.new_criteria()
+        for _, value in self.equity:
+            self.criteria.add_equity(value)
+        for trade in self.closed:
+            self.criteria.add_trade(trade["r"], trade["pnl"] > 0)
+
+    # -------- HELPERS -----------------------------------------------------------
+    def iv_rank(self):
+        """1-year IV-rank proxy per underlying from its vol-index window (NaN if undefined)."""
+        seen = ~np.isnan(self.vol_hist)
+        vMin = np.where(seen, self.vol_hist, np.inf).min(axis=1)
+        vMax = np.where(seen, self.vol_hist, -np.inf).max(axis=1)
+        vNow = self.vol_hist[:, -1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(vMax > vMin, (vNow - vMin) / (vMax - vMin), np.nan)
+
+    def results(self):
+        """Summary metrics in the same shape as the /analyze endpoint"""
+        pnl = np.array([t["pnl"] for t in self.closed])
+        r = np.array([t["r"] for t in self.closed])
+        curve = np.array([self.initial_cash] + [v for _, v in self.equity])
+        peak = np.maximum.accumulate(curve)
+        rets = np.diff(curve) / curve[:-1]
+        metrics = {
+            "total_trades": int(len(pnl)),
+            "win_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+            "avg_r": float(r.mean()) if len(r) else 0.0,
+            "sharpe_ratio": float(rets.mean() / rets.std() * np.sqrt(252)) if len(rets) > 1 and rets.std() > 0 else 0.0,
+            "total_return": float(curve[-1] / curve[0] - 1),
+            "max_drawdown": float(((peak - curve) / peak).max()),
+        }
+        if self.aborted:
+            metrics["aborted"], metrics["aborted_on"] = self.aborted
+        return metrics
+
+# -------- STRESS BOOK -------------------------------------------------------
+def years_to_expiry(time, expiry):
+    """Years from a bar time to the 16:00 close of expiry"""
+    close = np.datetime64(expiry, 'D').astype('datetime64[m]') + np.timedelta64(EXPIRY_MINUTE, 'm')
+    return float(pricing.year_fraction((close - time).astype(np.int64) / 1440.0))
+
+def leg_book(batch, legs, expiry, qty):
+    """Stress book of condors on one batch, legs as (m, 4) row indices"""
+    legs = np.asarray(legs, dtype=np.int64).reshape(-1, 4)
+    return stress.make_book(batch["strike"][legs], batch["right"][legs], batch["iv"][legs],
+                            kernels.CONDOR_RATIOS, qty, np.full(len(legs), batch["spot"]),
+                            np.full(len(legs), years_to_expiry(batch["time"], expiry)))
+
+def condor_book(condors, batches):
+    """Stress book of every open condor whose legs are quoted in its underlying's batch"""
+    parts = []
+    for cd in condors.values():
+        batch = batches.get(cd["underlying"])
+        if batch is None or not np.isfinite(batch["spot"]):
+            continue
+        index = slot_index(batch)
+        if all(cd[k] in index for k in LEG_KEYS):
+            parts.append(leg_book(batch, [[index[cd[k]] for k in LEG_KEYS]], cd["expiry"], [cd["qty"]]))
+    if not parts:
+        return stress.make_book(np.empty((0, 4)), np.empty((0, 4)), np.empty((0, 4)),
+                                kernels.CONDOR_RATIOS, [], [], [])
+    return {k: np.concatenate([part[k] for part in parts]) for k in parts[0]}
+
+def checkpoint_book(path, data_dir=SNAPSHOT_DIR):
+    """Stress book of a checkpoint's open condors, marked at that session's management time"""
+    blob = load_checkpoint(path)
+    if blob is None:
+        raise ValueError(f"Unreadable checkpoint: {path}")
+    state, params = blob["state"], dict(DEFAULT_PARAMS, **blob["params"])
+    day = state["day"]
+    _, manage_min = decision_minutes(params)
+    batches = {}
+    for ticker in {cd["underlying"] for cd in state["condors"].values()}:
+        snap = snapshot_path(data_dir, ticker, day)
+        if os.path.exists(snap):
+            for batch in iter_day_batches(load_snapshot_day(snap), day, [manage_min]):
+                batches[ticker] = batch
+    return condor_book(state["condors"], batches)
+
+# -------- CHECKPOINT FILES --------------------------------------------------
+def checkpoint_path(checkpoint_dir, key, resume_day):
+    """Path of the checkpoint taken before session resume_day of run key"""
+    return os.path.join(checkpoint_dir, key, f"{str(resume_day).replace('-', '')}.pkl")
+
+def load_checkpoint(path):
+    """Unpickle a checkpoint, or None if it is truncated or corrupt"""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+
+def latest_checkpoint(checkpoint_dir, key, before=None):
+    """Newest readable checkpoint of run key, optionally resuming no later than before"""
+    paths = sorted(glob.glob(os.path.join(checkpoint_dir, key, "*.pkl")), reverse=True)
+    for path in paths:
+        stem = os.path.basename(path)[:-4]
+        day = np.datetime64(f"{stem[:4]}-{stem[4:6]}-{stem[6:8]}", 'D')
+        if before is not None and day > np.datetime64(before, 'D'):
+            continue
+        if load_checkpoint(path) is not None:
+            return path
+    return None
+
+def vol_source(vol_index, cboe_dir=CBOE_DIR):
+    """Lean CBOE csv of one volatility index"""
+    return os.path.join(cboe_dir, f"{vol_index.lower()}.csv")
+
+def open_vol_stores(params, cboe_dir=CBOE_DIR, store_dir=feature_store.STORE_DIR):
+    """Memory-mapped feature store of each underlying's vol index"""
+    stores = {}
+    for ticker, (vol_index, _) in params["UNDERLYINGS"].items():
+        stores[ticker] = feature_store.open_feature_store(
+            vol_source(vol_index, cboe_dir), os.path.join(store_dir, vol_index.lower()))
+    return stores
+
+def run_backtest(params=None, start=START, end=END, data_dir=SNAPSHOT_DIR,
+                 cboe_dir=CBOE_DIR, store_dir=feature_store.STORE_DIR,
+                 checkpoint_dir=None, checkpoint_every=0, resume=False, fork_from=None,
+                 lean_dir=None, procs=None, progress=False, events_path=None, screen=True):
+    """Run one local backtest over the snapshot directory (or Lean data zips) and return its metrics
+
+    With events_path the run's structured events are appended there (.ndjson or .hv7e),
+    tagged with a fresh run id.
+    With screen, option chains load only on sessions that can trade or manage a
+    position (screener.py); the results are the same as a full run.
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    engine = LocalBacktest(open_vol_stores(params, cboe_dir, store_dir), params, start, end)
+    engine.progress = progress
+    if fork_from:
+        engine.restore(fork_from, fork=True)
+    elif resume and checkpoint_dir:
+        path = latest_checkpoint(checkpoint_dir, engine.run_key())
+        if path:
+            engine.restore(path)
+            log(f"resuming from {path}")
+    wanted, loads = None, {}
+    if lean_dir:
+        import lean_data
+        days = sorted({d for u in engine.tickers for d in lean_data.session_days(lean_dir, u, start, end)})
+    else:
+        days = feed_days(data_dir, engine.tickers, start, end)
+    if screen:
+        engine.gates = screener.entry_gates(engine, days)
+        def wanted(day):
+            loads[day] = engine.chains_needed(day)
+            return loads[day]
+    if lean_dir:
+        feed = lean_data.iter_lean(lean_dir, engine.tickers, engine.resume_day or start,
+                                   end, decision_minutes(engine.params), procs, wanted=wanted)
+    else:
+        feed = iter_snapshots(data_dir, engine.tickers, engine.resume_day or start,
+                              end, decision_minutes(engine.params), wanted)
+    metrics = engine.run(feed, checkpoint_dir, checkpoint_every)
+    if screen:
+        log(f"loaded {sum(map(len, loads.values()))} of {len(loads) * len(engine.tickers)} chain sessions")
+    if events_path:
+        events.append(events_path, engine.events, run=events.run_id())
+        log(f"{len(engine.events)} events -> {events_path}")
+    return metrics
+
+def main():
+    """Run a local backtest from the command line"""
+    parser = argparse.ArgumentParser(description="Local HV-7 condor backtest")
+    parser.add_argument('--data-dir', default=SNAPSHOT_DIR)
+    parser.add_argument('--start', default=START)
+    parser.add_argument('--end', default=END)
+    parser.add_argument('--cboe-dir', default=CBOE_DIR)
+    parser.add_argument('--store-dir', default=feature_store.STORE_DIR)
+    parser.add_argument('--params', default='{}', help="JSON overrides of DEFAULT_PARAMS")
+    parser.add_argument('--checkpoint-dir', default=None)
+    parser.add_argument('--checkpoint-every', type=int, default=5, help="sessions between checkpoints")
+    parser.add_argument('--resume', action='store_true', help="resume from the latest valid checkpoint")
+    parser.add_argument('--fork-from', default=None, help="start from another run's checkpoint file")
+    parser.add_argument('--kernels', default=None, choices=sorted(kernels.BACKENDS),
+                        help="chain-selection / valuation kernel backend")
+    parser.add_argument('--lean-dir', default=None, help="read Lean minute option zips instead of snapshots")
+    parser.add_argument('--procs', type=int, default=None, help="decode processes with --lean-dir")
+    parser.add_argument('--progress', action='store_true', help="log every closed trade with its R")
+    parser.add_argument('--events', default=None, help="append structured events to this .ndjson/.hv7e file")
+    parser.add_argument('--no-screen', action='store_true', help="load every session's chains")
+    args = parser.parse_args()
+
+    if args.kernels:
+        kernels.set_backend(args.kernels)
+
+    metrics = run_backtest(json.loads(args.params), args.start, args.end, args.data_dir,
+                           args.cboe_dir, args.store_dir, args.checkpoint_dir,
+                           args.checkpoint_every, args.resume, args.fork_from,
+                           args.lean_dir, args.procs, args.progress, args.events,
+                           not args.no_screen)
+    print(json.dumps(metrics, indent=2))
+
+if __name__ == "__main__":
+    main()
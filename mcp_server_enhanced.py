@@ -2,11 +2,22 @@
 
 import os
 import re
+import sys
 import json
+import time
+import uuid
+import threading
 import subprocess
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
+import artifacts
+import ast_fixer
+import criteria
+import events
+import preflight
+import results_store
+
 app = Flask(__name__)
 CORS(app)
 
@@ -17,32 +28,15 @@ QC_TOKEN = os.environ.get('QC_TOKEN', '')
 ERROR_PATTERNS = {
     r"The type or namespace name '(\w+)' could not be found": {
         "fix": "add_import",
-        "imports": {
-            "OptionStrategies": "from AlgorithmImports import OptionStrategies",
-            "Resolution": "from AlgorithmImports import Resolution",
-            "Slice": "from AlgorithmImports import Slice",
-            "QCAlgorithm": "from AlgorithmImports import QCAlgorithm",
-            "timedelta": "from datetime import timedelta"
-        }
+        "imports": ast_fixer.IMPORTS
     },
     r"'(\w+)' is not defined": {
         "fix": "add_import",
-        "imports": {
-            "OptionStrategies": "from AlgorithmImports import OptionStrategies",
-            "Resolution": "from AlgorithmImports import Resolution",
-            "Slice": "from AlgorithmImports import Slice",
-            "QCAlgorithm": "from AlgorithmImports import QCAlgorithm",
-            "timedelta": "from datetime import timedelta"
-        }
+        "imports": ast_fixer.IMPORTS
     },
     r"AttributeError: '(\w+)' object has no attribute '(\w+)'": {
         "fix": "fix_attribute",
-        "mappings": {
-            "Buy": "buy",
-            "SetFilter": "set_filter",
-            "AddOption": "add_option",
-            "AddEquity": "add_equity"
-        }
+        "mappings": ast_fixer.ATTRIBUTE_RENAMES
     },
     r"Invalid syntax": {
         "fix": "fix_syntax"
@@ -59,7 +53,7 @@ def health_check():
         "service": "mcp-trader-enhanced",
         "version": "2.0.0",
         "qc_user_id": QC_USER_ID[:6] + "..." if QC_USER_ID else "not set",
-        "features": ["compile", "backtest", "auto-fix", "analyze"]
+        "features": ["compile", "backtest", "auto-fix", "analyze", "jobs"]
     })
 
 @app.route('/compile', methods=['POST'])
@@ -98,10 +92,14 @@ def compile_project():
 def backtest_project():
     data = request.json
     project = data.get('project', 'IronCondor')
+    result_file = data.get('result_file', 'result.json')
     
     try:
+        # hash what gets pushed, so /analyze can tell whose result the file holds
+        source = results_store.source_hash(f"{project}/main.py")
+        started = time.time()
         result = subprocess.run(
-            ['lean', 'cloud', 'backtest', project, '--open', '--push'],
+            ['lean', 'cloud', 'backtest', project, '--open', '--push', '-o', result_file],
             capture_output=True,
             text=True
         )
@@ -118,6 +116,9 @@ def backtest_project():
                 "can_autofix": len(errors) > 0
             })
         
+        if os.path.exists(result_file) and os.path.getmtime(result_file) >= started:
+            results_store.stamp(result_file, source)
+        
         return jsonify({
             "status": "success",
             "stdout": result.stdout,
@@ -140,34 +141,20 @@ def fix_errors():
         if result:
             errors = result.get('errors', [])
     
-    if not errors:
-        return jsonify({
-            "status": "no_errors",
-            "message": "No errors to fix"
-        })
-    
-    fixes_applied = []
-    
     try:
-        # Read the current file
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Apply fixes
-        for error in errors:
-            fix = apply_fix(content, error)
-            if fix:
-                content = fix['content']
-                fixes_applied.append(fix['description'])
-        
-        # Write back the fixed content
-        with open(file_path, 'w') as f:
-            f.write(content)
-        
+        # One parse, every fix (reported errors are hints, the rest is detected), one write
+        result = ast_fixer.fix_file(file_path, errors)
+        if not result["fixes"] and not result["problems"]:
+            return jsonify({
+                "status": "no_errors",
+                "message": "No errors to fix"
+            })
         return jsonify({
-            "status": "success",
-            "fixes_applied": fixes_applied,
-            "message": f"Applied {len(fixes_applied)} fixes"
+            "status": "unresolved" if result["problems"] else "success",
+            "fixes_applied": result["fixes"],
+            "problems": result["problems"],
+            "written": result["written"],
+            "message": f"Applied {len(result['fixes'])} fixes"
         })
         
     except Exception as e:
@@ -180,33 +167,71 @@ def fix_errors():
 def analyze_results():
     data = request.json
     result_file = data.get('result_file', 'result.json')
+    project = data.get('project')
+    use_cache = data.get('use_cache', False)
+    runs = data.get('runs')
+    events_file = data.get('events_file')    # NDJSON event log from the ObjectStore, or a local .hv7e
     
     try:
-        with open(result_file, 'r') as f:
-            results = json.load(f)
+        # Multi-run comparison straight from the archives: only the trade P&L
+        # and equity columns of each run are decompressed
+        if runs is not None:
+            names = runs or artifacts.list_archives()
+            metrics = artifacts.compare(names)
+            return jsonify({
+                "status": "success",
+                "runs": {
+                    name: {
+                        "metrics": m,
+                        "all_criteria_met": all(archived_criteria(m).values())
+                    } for name, m in metrics.items()
+                }
+            })
         
-        # Extract key metrics
-        metrics = {
-            "total_trades": results.get("totalOrders", 0),
-            "win_rate": calculate_win_rate(results),
-            "sharpe_ratio": results.get("sharpeRatio", 0),
-            "total_return": results.get("totalReturn", 0),
-            "max_drawdown": results.get("maxDrawdown", 0)
-        }
+        # Results are keyed by the strategy source that produced them
+        key = None
+        if project:
+            path = f"{project}/main.py"
+            key = (results_store.source_hash(path), {"project": project},
+                   *results_store.strategy_window(path))
+            store = results_store.connect()
         
-        # Check against criteria
-        criteria_met = {
-            "win_rate": metrics["win_rate"] >= 0.55,
-            "avg_r": metrics.get("avg_return", 0) >= 0.15,
-            "trades": metrics["total_trades"] > 0
-        }
+        metrics = None
+        if key and use_cache:
+            metrics = results_store.lookup(store, *key, origin="cloud")
+        cached = metrics is not None
         
-        return jsonify({
+        if not cached:
+            with open(result_file, 'r') as f:
+                results = json.load(f)
+            
+            # Extract key metrics
+            metrics = {
+                "total_trades": results.get("totalOrders", 0),
+                "win_rate": calculate_win_rate(results),
+                "sharpe_ratio": results.get("sharpeRatio", 0),
+                "total_return": results.get("totalReturn", 0),
+                "max_drawdown": results.get("maxDrawdown", 0)
+            }
+            # only a result /backtest stamped with this very source may be keyed by it
+            if key and results_store.stamped_source(result_file) == key[0]:
+                results_store.record(store, *key, metrics, origin="cloud")
+                artifacts.write_archive(
+                    results, os.path.join(artifacts.ARCHIVE_DIR, f"{project}-{key[0]}.hv7a"),
+                    {"name": f"{project}-{key[0]}", "project": project, "source_hash": key[0]})
+        
+        criteria_met = check_criteria(metrics)
+        
+        response = {
             "status": "success",
+            "cached": cached,
             "metrics": metrics,
             "criteria_met": criteria_met,
             "all_criteria_met": all(criteria_met.values())
-        })
+        }
+        if events_file:
+            response["attribution"] = events.attribution(events.load(events_file))
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({
@@ -214,6 +239,124 @@ def analyze_results():
             "message": str(e)
         }), 500
 
+# Streaming backtest jobs: job-id → state, followed by /jobs/<id>/stream
+JOBS = {}
+
+@app.route('/jobs', methods=['POST'])
+def start_job():
+    data = request.json or {}
+    project = data.get('project', 'IronCondor')
+    mode = data.get('mode', 'local')
+    expected_trades = data.get('expected_trades')
+    
+    try:
+        if mode == 'local':
+            # same CONFIG as the strategy; the engine aborts itself once criteria are unreachable
+            problems, params = preflight.check(f"{project}/main.py")
+            if problems:
+                return jsonify({"status": "failed", "errors": problems})
+            params.update(data.get('params', {}))
+            params.setdefault("EARLY_ABORT", data.get('abort', True))
+            # only the engine sees equity, so the drawdown guard runs there
+            params.setdefault("DD_GUARD", data.get('max_drawdown'))
+            cmd = [sys.executable, 'local_engine.py', '--progress', '--params', json.dumps(params)]
+            for flag in ('start', 'end', 'data_dir', 'cboe_dir', 'lean_dir'):
+                if data.get(flag):
+                    cmd += [f"--{flag.replace('_', '-')}", str(data[flag])]
+        else:
+            # lean cloud prints no trade or equity lines while the backtest runs, so nothing can abort it
+            unsupported = [k for k in ('abort', 'max_drawdown', 'expected_trades') if data.get(k)]
+            if unsupported:
+                return jsonify({"status": "error",
+                                "message": f"early abort ({', '.join(unsupported)}) needs mode 'local'"}), 400
+            cmd = ['lean', 'cloud', 'backtest', project, '--push']
+        
+        job_id = uuid.uuid4().hex[:12]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, bufsize=1)
+        JOBS[job_id] = {
+            "id": job_id,
+            "project": project,
+            "mode": mode,
+            "cmd": cmd,
+            "proc": proc,
+            "lines": [],
+            "status": "running",
+            "abort_reason": None,
+            "expected_trades": expected_trades,
+            "criteria": criteria.RunningCriteria(),
+            "started": time.time()
+        }
+        threading.Thread(target=follow_job, args=(JOBS[job_id],), daemon=True).start()
+        return jsonify({"status": "started", "job_id": job_id, "cmd": cmd})
+        
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"unknown job {job_id}"}), 404
+    return jsonify(job_summary(job))
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"unknown job {job_id}"}), 404
+    
+    def ndjson():
+        sent = 0
+        while True:
+            lines = job["lines"]
+            while sent < len(lines):
+                yield json.dumps({"line": lines[sent], "criteria": job["criteria"].summary()}) + "\n"
+                sent += 1
+            if job["status"] != "running" and sent == len(job["lines"]):
+                yield json.dumps(job_summary(job)) + "\n"
+                return
+            time.sleep(0.2)
+    
+    return Response(stream_with_context(ndjson()), mimetype='application/x-ndjson')
+
+def follow_job(job):
+    """Read a job's output, update its running criteria and stop it once they are unreachable"""
+    tracker = job["criteria"]
+    for line in job["proc"].stdout:
+        line = line.rstrip("\n")
+        job["lines"].append(line)
+        aborted = re.search(r"aborted on \S+: (\w+)", line)
+        if aborted:
+            job["abort_reason"] = aborted[1]
+        if not tracker.feed_line(line):
+            continue
+        remaining = None
+        if job["expected_trades"] is not None:
+            remaining = max(job["expected_trades"] - tracker.trades, 0)
+        reason = tracker.verdict(remaining)
+        if reason and job["status"] == "running":
+            job["abort_reason"] = reason
+            job["proc"].terminate()
+    job["proc"].wait()
+    if job["abort_reason"]:
+        job["status"] = "aborted"
+    else:
+        job["status"] = "success" if job["proc"].returncode == 0 else "failed"
+
+def job_summary(job):
+    """JSON-safe view of a job"""
+    return {
+        "job_id": job["id"],
+        "project": job["project"],
+        "mode": job["mode"],
+        "status": job["status"],
+        "abort_reason": job["abort_reason"],
+        "criteria": job["criteria"].summary(),
+        "lines": len(job["lines"]),
+        "elapsed": round(time.time() - job["started"], 1)
+    }
+
 def parse_errors(output):
     """Parse errors from compiler/runtime output"""
     errors = []
@@ -234,94 +377,27 @@ def parse_errors(output):
     
     return errors
 
-def apply_fix(content, error):
-    """Apply a specific fix to the content"""
-    fix_type = error.get('fix_type')
-    
-    if fix_type == 'add_import':
-        # Add missing import
-        missing_name = error['match_groups'][0] if error['match_groups'] else None
-        if missing_name and missing_name in ERROR_PATTERNS[error['pattern']]['imports']:
-            import_line = ERROR_PATTERNS[error['pattern']]['imports'][missing_name]
-            if import_line not in content:
-                # Add after other imports
-                lines = content.split('\n')
-                import_index = 0
-                for i, line in enumerate(lines):
-                    if line.startswith('from ') or line.startswith('import '):
-                        import_index = i + 1
-                
-                lines.insert(import_index, import_line)
-                return {
-                    'content': '\n'.join(lines),
-                    'description': f"Added import: {import_line}"
-                }
-    
-    elif fix_type == 'fix_attribute':
-        # Fix attribute name
-        if len(error['match_groups']) >= 2:
-            wrong_attr = error['match_groups'][1]
-            mappings = ERROR_PATTERNS[error['pattern']]['mappings']
-            if wrong_attr in mappings:
-                correct_attr = mappings[wrong_attr]
-                content = content.replace(f'.{wrong_attr}(', f'.{correct_attr}(')
-                return {
-                    'content': content,
-                    'description': f"Fixed attribute: {wrong_attr} -> {correct_attr}"
-                }
-    
-    elif fix_type == 'fix_syntax':
-        # Basic syntax fixes
-        # Fix missing colons
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            if any(keyword in line for keyword in ['def ', 'if ', 'for ', 'while ', 'class ']):
-                if not line.strip().endswith(':') and not line.strip().endswith('\\'):
-                    lines[i] = line.rstrip() + ':'
-        
-        return {
-            'content': '\n'.join(lines),
-            'description': "Fixed syntax issues"
-        }
-    
-    elif fix_type == 'fix_indentation':
-        # Fix indentation
-        lines = content.split('\n')
-        fixed_lines = []
-        indent_level = 0
-        
-        for line in lines:
-            stripped = line.strip()
-            if stripped:
-                if stripped.startswith(('def ', 'class ', 'if ', 'for ', 'while ', 'try:', 'except')):
-                    fixed_lines.append('    ' * indent_level + stripped)
-                    if stripped.endswith(':'):
-                        indent_level += 1
-                elif stripped in ['else:', 'elif:', 'except:', 'finally:']:
-                    indent_level = max(0, indent_level - 1)
-                    fixed_lines.append('    ' * indent_level + stripped)
-                    indent_level += 1
-                elif stripped == 'return' or stripped.startswith('return '):
-                    fixed_lines.append('    ' * indent_level + stripped)
-                    indent_level = max(0, indent_level - 1)
-                else:
-                    fixed_lines.append('    ' * indent_level + stripped)
-            else:
-                fixed_lines.append('')
-        
-        return {
-            'content': '\n'.join(fixed_lines),
-            'description': "Fixed indentation"
-        }
-    
-    return None
-
 def get_last_errors():
     """Get errors from the last run"""
     # This would typically read from a log file or database
     # For now, return None
     return None
 
+def archived_criteria(metrics):
+    """check_criteria of an archived run; avg_r only counts when its log carried R values"""
+    met = check_criteria(metrics)
+    if "avg_r" not in metrics:
+        met.pop("avg_r")
+    return met
+
+def check_criteria(metrics):
+    """Check metrics against the success criteria"""
+    return {
+        "win_rate": metrics.get("win_rate", 0) >= criteria.WIN_RATE_MIN,
+        "avg_r": metrics.get("avg_r", metrics.get("avg_return", 0)) >= criteria.AVG_R_MIN,
+        "trades": metrics.get("total_trades", 0) > 0
+    }
+
 def calculate_win_rate(results):
     """Calculate win rate from results"""
     trades = results.get('trades', [])
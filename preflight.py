@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Static pre-flight checks for a single-file Lean strategy.
+
+Catches what would otherwise cost a push and a cloud compile: syntax errors,
+a missing QCAlgorithm subclass or Initialize, imports that do not exist in a
+QuantConnect project, and PascalCase/snake_case API mixing. Also reads the
+CONFIG class constants so a local backtest can run with the same parameters.
+"""
+
+import ast
+import sys
+import json
+import argparse
+
+import local_engine
+
+# Modules a single-file QuantConnect project can import
+ALLOWED_IMPORTS = {"AlgorithmImports", "numpy", "pandas", "math", "datetime", "collections",
+                   "itertools", "json", "statistics", "scipy", "typing"}
+
+def load(path):
+    """(source, tree) of a strategy file, tree is None on a syntax error"""
+    with open(path) as f:
+        source = f.read()
+    try:
+        return source, ast.parse(source, filename=path)
+    except SyntaxError:
+        return source, None
+
+def algorithm_class(tree):
+    """The first class deriving from QCAlgorithm, or None"""
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and any(
+                getattr(base, "id", getattr(base, "attr", None)) == "QCAlgorithm" for base in node.bases):
+            return node
+    return None
+
+def api_style(cls):
+    """'pascal', 'snake' or 'mixed' from the self.<Method>() calls in the algorithm"""
+    pascal = snake = 0
+    for node in ast.walk(cls):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                and isinstance(node.func.value, ast.Name) and node.func.value.id == "self":
+            name = node.func.attr
+            if name in ("Initialize", "initialize") or name.startswith("_"):
+                continue
+            if name[:1].isupper() and any(c.islower() for c in name):
+                pascal += name.startswith(("Set", "Add", "Schedule", "Market", "Limit", "Combo",
+                                           "History", "Liquidate", "Debug", "Log", "Buy", "Sell"))
+            elif name.startswith(("set_", "add_", "market_", "limit_", "combo_", "history",
+                                  "liquidate", "debug", "log", "buy", "sell")):
+                snake += 1
+    if pascal and snake:
+        return "mixed"
+    return "snake" if snake else "pascal"
+
+def config(cls):
+    """{NAME: value} of the literal UPPERCASE class constants"""
+    out = {}
+    for node in cls.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            names = target.elts if isinstance(target, ast.Tuple) else [target]
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError:
+                continue
+            values = value if isinstance(target, ast.Tuple) else [value]
+            for name, v in zip(names, values):
+                if isinstance(name, ast.Name) and name.id.isupper():
+                    out[name.id] = v
+    return out
+
+# Engine behaviours a strategy only has if its CONFIG declares them (off otherwise)
+OPT_IN = ("ROLL", "SMILE_STRIKES")
+
+def engine_params(constants):
+    """Local-engine params from a strategy's CONFIG constants"""
+    params = {k: v for k, v in constants.items() if k in local_engine.DEFAULT_PARAMS}
+    params.update({k: False for k in OPT_IN if k not in constants})
+    if "UNDERLYINGS" in params:
+        params["UNDERLYINGS"] = {t: list(v) for t, v in params["UNDERLYINGS"].items()}
+    elif "UNDERLYING" in constants:               # single-underlying VIX-gated variant
+        params["UNDERLYINGS"] = {constants["UNDERLYING"]: ["VIX", constants.get("VIX_MIN", 18.0)]}
+    return params
+
+def check(path):
+    """Run every check; returns (problems, engine params)"""
+    with open(path) as f:
+        return check_source(f.read(), path)
+
+def check_source(source, path="<source>"):
+    """check() of a strategy's source text"""
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError:
+        tree = None
+    if tree is None:
+        try:
+            compile(source, path, "exec")
+        except SyntaxError as e:
+            return [f"{path}:{e.lineno}: SyntaxError: {e.msg}"], {}
+
+    problems = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            mods = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            mods = [node.module or ""]
+        else:
+            continue
+        for mod in mods:
+            if mod.split(".")[0] not in ALLOWED_IMPORTS:
+                problems.append(f"{path}:{node.lineno}: import '{mod}' is not available in a Lean project")
+    if not any(isinstance(n, ast.ImportFrom) and n.module == "AlgorithmImports" for n in tree.body):
+        problems.append(f"{path}: missing 'from AlgorithmImports import *'")
+
+    cls = algorithm_class(tree)
+    if cls is None:
+        problems.append(f"{path}: no class deriving from QCAlgorithm")
+        return problems, {}
+    methods = {n.name for n in cls.body if isinstance(n, ast.FunctionDef)}
+    if not methods & {"Initialize", "initialize"}:
+        problems.append(f"{path}:{cls.lineno}: {cls.name} has no Initialize/initialize")
+    style = api_style(cls)
+    if style == "mixed":
+        problems.append(f"{path}:{cls.lineno}: {cls.name} mixes PascalCase and snake_case API calls")
+    return problems, engine_params(config(cls))
+
+def main():
+    """Pre-flight a strategy from the command line"""
+    parser = argparse.ArgumentParser(description="Static pre-flight of a Lean strategy")
+    parser.add_argument('paths', nargs='+')
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.paths:
+        problems, params = check(path)
+        for problem in problems:
+            print(problem)
+        if not problems:
+            print(f"{path}: ok  {json.dumps(params)}")
+        failed |= bool(problems)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
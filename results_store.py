@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Persistent, indexed store of backtest results.
+
+One row per (source hash, params, date range, origin) with the headline
+metrics in indexed columns, so leaderboards and filters over hundreds of
+thousands of runs are index scans. The full metrics dict is kept as JSON.
+Writes are upserts: recording the same run twice keeps the latest metrics.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime
+
+RESULTS_DB = "data/results.db"
+
+# indexed column → key in the metrics dicts produced by /analyze and local_engine
+METRIC_COLUMNS = {
+    "win_rate": "win_rate",
+    "avg_r": "avg_r",
+    "sharpe": "sharpe_ratio",
+    "drawdown": "max_drawdown",
+    "trades": "total_trades",
+    "total_return": "total_return",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY,
+    source_hash  TEXT NOT NULL,
+    params_hash  TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    start        TEXT NOT NULL,
+    end          TEXT NOT NULL,
+    origin       TEXT NOT NULL,
+    win_rate     REAL,
+    avg_r        REAL,
+    sharpe       REAL,
+    drawdown     REAL,
+    trades       INTEGER,
+    total_return REAL,
+    metrics      TEXT NOT NULL,
+    created      TEXT NOT NULL,
+    UNIQUE (source_hash, params_hash, start, end, origin)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_win_rate ON runs (win_rate);
+CREATE INDEX IF NOT EXISTS idx_runs_avg_r    ON runs (avg_r);
+CREATE INDEX IF NOT EXISTS idx_runs_sharpe   ON runs (sharpe);
+CREATE INDEX IF NOT EXISTS idx_runs_drawdown ON runs (drawdown);
+CREATE INDEX IF NOT EXISTS idx_runs_trades   ON runs (trades);
+"""
+
+def connect(path=RESULTS_DB):
+    """Open (and create if needed) the results database"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def source_hash(*paths):
+    """Hash of the source files that produced a run"""
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def stamp(result_file, source):
+    """Record next to a result file the source hash that produced it"""
+    with open(result_file + ".source", 'w') as f:
+        f.write(source)
+
+def stamped_source(result_file):
+    """Source hash a result file was stamped with, or None"""
+    try:
+        with open(result_file + ".source") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def strategy_window(path):
+    """(start, end) dates set in a Lean strategy's Initialize, '' where not found"""
+    with open(path) as f:
+        text = f.read()
+    window = []
+    for call in (r"Set_?[Ss]tart_?[Dd]ate", r"Set_?[Ee]nd_?[Dd]ate"):
+        m = re.search(rf"\.(?i:{call})\((\d{{4}}),\s*(\d+),\s*(\d+)\)", text)
+        window.append(f"{int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}" if m else "")
+    return tuple(window)
+
+def params_hash(params):
+    """Stable hash of a params dict"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+def _row(src, params, start, end, metrics, origin):
+    return (src, params_hash(params), json.dumps(params, sort_keys=True), str(start), str(end), origin,
+            *(metrics.get(key) for key in METRIC_COLUMNS.values()),
+            json.dumps(metrics), datetime.now().isoformat())
+
+_UPSERT = f"""
+INSERT INTO runs (source_hash, params_hash, params, start, end, origin,
+                  {", ".join(METRIC_COLUMNS)}, metrics, created)
+VALUES ({", ".join("?" * (8 + len(METRIC_COLUMNS)))})
+ON CONFLICT (source_hash, params_hash, start, end, origin) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in METRIC_COLUMNS)},
+    metrics = excluded.metrics, created = excluded.created
+"""
+
+def record(conn, src, params, start, end, metrics, origin="local"):
+    """Insert or refresh one run"""
+    with conn:
+        conn.execute(_UPSERT, _row(src, params, start, end, metrics, origin))
+
+def record_many(conn, runs, origin="local"):
+    """Bulk insert [(source_hash, params, start, end, metrics)] in one transaction"""
+    with conn:
+        conn.executemany(_UPSERT, (_row(*run, origin) for run in runs))
+    return len(runs)
+
+def lookup(conn, src, params, start, end, origin="local"):
+    """Cached metrics of a run, or None"""
+    row = conn.execute(
+        "SELECT metrics FROM runs WHERE source_hash=? AND params_hash=? AND start=? AND end=? AND origin=?",
+        (src, params_hash(params), str(start), str(end), origin)).fetchone()
+    return json.loads(row["metrics"]) if row else None
+
+def latest(conn, src, origin=None):
+    """Most recent run of a source version (any params), or None"""
+    sql = "SELECT * FROM runs WHERE source_hash=?"
+    args = [src]
+    if origin:
+        sql += " AND origin=?"
+        args.append(origin)
+    row = conn.execute(sql + " ORDER BY created DESC LIMIT 1", args).fetchone()
+    return dict(row) if row else None
+
+def leaderboard(conn, order_by="sharpe", limit=20, min_win_rate=None, min_avg_r=None,
+                max_drawdown=None, min_trades=1, origin=None):
+    """Best runs by one indexed metric, filtered on the others"""
+    if order_by not in METRIC_COLUMNS:
+        raise ValueError(f"Cannot rank by '{order_by}'; use one of {sorted(METRIC_COLUMNS)}")
+    where, args = ["trades >= ?"], [min_trades]
+    for column, op, value in (("win_rate", ">=", min_win_rate), ("avg_r", ">=", min_avg_r),
+                              ("drawdown", "<=", max_drawdown)):
+        if value is not None:
+            where.append(f"{column} {op} ?")
+            args.append(value)
+    if origin:
+        where.append("origin = ?")
+        args.append(origin)
+    direction = "ASC" if order_by == "drawdown" else "DESC"
+    rows = conn.execute(
+        f"SELECT * FROM runs WHERE {' AND '.join(where)} ORDER BY {order_by} {direction} LIMIT ?",
+        args + [limit]).fetchall()
+    return [dict(r) for r in rows]
+
+def main():
+    """Query the results store from the command line"""
+    parser = argparse.ArgumentParser(description="HV-7 backtest results store")
+    parser.add_argument('--db', default=RESULTS_DB)
+    parser.add_argument('--order-by', default="sharpe", choices=sorted(METRIC_COLUMNS))
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--min-win-rate', type=float)
+    parser.add_argument('--min-avg-r', type=float)
+    parser.add_argument('--max-drawdown', type=float)
+    parser.add_argument('--min-trades', type=int, default=1)
+    parser.add_argument('--origin')
+    args = parser.parse_args()
+
+    rows = leaderboard(connect(args.db), args.order_by, args.limit, args.min_win_rate,
+                       args.min_avg_r, args.max_drawdown, args.min_trades, args.origin)
+    for r in rows:
+        print(f"{r['sharpe'] or 0:7.2f} sharpe  {r['win_rate'] or 0:6.1%} win  {r['avg_r'] or 0:6.3f} R  "
+              f"{r['drawdown'] or 0:6.1%} dd  {r['trades'] or 0:5d} trades  {r['origin']:6s} "
+              f"{r['source_hash']}  {r['params']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Entry-day screener: the cheap HV-7 gates for every candidate session up front.
+
+The vol-index level and IV-rank gates of OpenCondor only need the daily
+feature-store rows, so one vectorized pass over the run's sessions yields,
+per underlying, the days whose entry can get past them. The engine combines
+that with the position book (open condors always need their chain; a risk
+budget that is exhausted even at the book's cash value blocks every entry) and
+loads a session's option chain only when something can happen on it. The
+windows replay the engine's own vol history pushes, so a screened run makes
+exactly the same decisions as a full one.
+"""
+
+import sys
+import json
+import argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def log(message):
+    """Log message to stderr"""
+    print(f"[screener] {message}", file=sys.stderr)
+
+def vol_windows(dates, closes, days, start, lookback):
+    """(vol now, IV-rank) after each of days is pushed onto a lookback window seeded before start"""
+    dates, closes = np.asarray(dates), np.asarray(closes, dtype=np.float64)
+    days = np.asarray(days, dtype='datetime64[D]')
+    i = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+    seed = closes[max(0, i - lookback):i]
+    j = np.searchsorted(dates, days, side='left')
+    hit = j < len(dates)
+    hit[hit] = dates[j[hit]] == days[hit]
+    series = np.concatenate([np.full(lookback - len(seed), np.nan), seed, closes[j[hit]]])
+    # the window after day k ends at the (pushes so far)-th close past the seed
+    windows = sliding_window_view(series, lookback)[np.cumsum(hit)]
+    seen = ~np.isnan(windows)
+    lo = np.where(seen, windows, np.inf).min(axis=1)
+    hi = np.where(seen, windows, -np.inf).max(axis=1)
+    now = windows[:, -1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return now, np.where(hi > lo, (now - lo) / (hi - lo), np.nan)
+
+def screen(vol_dates, vol_closes, vol_min, ivr_min, days, start, lookback):
+    """(underlyings, days) bool: the vol-index and IV-rank gates pass on that day's entry"""
+    passed = np.zeros((len(vol_dates), len(days)), dtype=bool)
+    for k, (dates, closes) in enumerate(zip(vol_dates, vol_closes)):
+        now, rank = vol_windows(dates, closes, days, start, lookback)
+        with np.errstate(invalid='ignore'):
+            passed[k] = (now >= vol_min[k]) & (rank >= ivr_min)
+    return passed
+
+def entry_gates(engine, days):
+    """{entry day: underlyings past the gates} for an engine over the sessions it will see"""
+    days = np.asarray(sorted(days), dtype='datetime64[D]')
+    passed = screen(engine.vol_dates, engine.vol_closes, engine.vol_min, engine.params["IVR_MIN"],
+                    days, engine.start, engine.params["IVR_LOOKBACK"])
+    gates = {}
+    for d, day in enumerate(days):
+        if engine.calendar.is_entry_day(day) and passed[:, d].any():
+            gates[day] = {t for k, t in enumerate(engine.tickers) if passed[k, d]}
+    return gates
+
+def main():
+    """Report how many entry sessions the gates let through"""
+    import local_engine
+    parser = argparse.ArgumentParser(description="HV-7 entry-day screener")
+    parser.add_argument('--data-dir', default=local_engine.SNAPSHOT_DIR)
+    parser.add_argument('--start', default=local_engine.START)
+    parser.add_argument('--end', default=local_engine.END)
+    parser.add_argument('--cboe-dir', default=local_engine.CBOE_DIR)
+    parser.add_argument('--store-dir', default=local_engine.feature_store.STORE_DIR)
+    parser.add_argument('--params', default='{}', help="JSON overrides of DEFAULT_PARAMS")
+    args = parser.parse_args()
+
+    params = dict(local_engine.DEFAULT_PARAMS, **json.loads(args.params))
+    engine = local_engine.LocalBacktest(local_engine.open_vol_stores(params, args.cboe_dir, args.store_dir),
+                                        params, args.start, args.end)
+    days = local_engine.feed_days(args.data_dir, engine.tickers, args.start, args.end)
+    gates = entry_gates(engine, days)
+    entries = [d for d in days if engine.calendar.is_entry_day(d)]
+    print(json.dumps({
+        "sessions": len(days),
+        "entry_days": len(entries),
+        "entry_days_passing": len(gates),
+        "by_underlying": {t: sum(t in g for g in gates.values()) for t in engine.tickers},
+        "first_passing": [str(d) for d in sorted(gates)[:10]],
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
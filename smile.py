@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Per-expiry volatility smile with closed-form delta-to-strike inversion.
+
+One quadratic in log-moneyness k = ln(K/S),
+
+    σ(k) = a + b·k + c·k²
+
+is fitted by least squares to the out-of-the-money mid implied vols of one
+expiry at one decision bar (quoted IVs where present, otherwise inverted from
+the mid), and held flat outside the fitted range. With zero rates a target
+delta maps to log-moneyness in closed form for a given vol,
+
+    k = σ²t/2 − σ√t · N⁻¹(Δ)            (calls; puts use N⁻¹(1 + Δ))
+
+and a few fixed-point passes through σ(k) settle the smile's vol. The strike
+is then snapped to the nearest listed one, so short-strike selection no longer
+depends on per-contract greeks being populated.
+"""
+
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+import pricing
+
+MIN_POINTS = 5                          # OTM quotes needed for a fit
+BAND = 0.20                             # |log-moneyness| used in the fit
+VOL_FLOOR = 0.01
+ITERATIONS = 4                          # fixed-point passes of the delta inversion
+
+def chain_vols(strike, right, bid, ask, spot, t, iv=None):
+    """(k, vol) of the OTM quotes inside BAND; quoted iv where finite, else from the mid"""
+    strike, right, bid, ask = (np.asarray(a, dtype=np.float64) for a in (strike, right, bid, ask))
+    k = np.log(strike / spot)
+    otm = np.where(right == pricing.PUT, strike < spot, strike >= spot)
+    use = otm & (np.abs(k) <= BAND) & (bid > 0) & (ask >= bid)
+    vol = np.full(len(strike), np.nan) if iv is None else np.asarray(iv, dtype=np.float64).copy()
+    missing = use & ~(np.isfinite(vol) & (vol > 0))
+    if missing.any():
+        vol[missing] = pricing.implied_vol(0.5 * (bid[missing] + ask[missing]), spot,
+                                           strike[missing], t, right[missing])
+    use &= np.isfinite(vol) & (vol > 0)
+    return k[use], vol[use]
+
+def fit(k, vol):
+    """Least-squares quadratic smile {coef, lo, hi} of (k, vol) points, or None if too few"""
+    k, vol = np.asarray(k, dtype=np.float64), np.asarray(vol, dtype=np.float64)
+    if len(k) < MIN_POINTS or np.ptp(k) <= 0:
+        return None
+    coef, *_ = np.linalg.lstsq(np.stack([np.ones_like(k), k, k * k], axis=1), vol, rcond=None)
+    return {"coef": coef, "lo": float(k.min()), "hi": float(k.max())}
+
+def fit_chain(strike, right, bid, ask, spot, t, iv=None):
+    """Smile of one expiry's chain at one bar, or None"""
+    if not (np.isfinite(spot) and spot > 0 and t > 0):
+        return None
+    return fit(*chain_vols(strike, right, bid, ask, spot, t, iv))
+
+def vol_at(smile, k):
+    """Smile vol at log-moneyness k, flat outside the fitted range"""
+    a, b, c = smile["coef"]
+    k = np.clip(k, smile["lo"], smile["hi"])
+    return np.maximum(a + b * k + c * k * k, VOL_FLOOR)
+
+def delta_to_strike(smile, spot, t, delta, right, iterations=ITERATIONS):
+    """Strike whose Black-Scholes delta on the smile is delta (calls > 0, puts < 0)"""
+    z = pricing.norm_ppf(np.where(np.asarray(right) == pricing.PUT, 1.0 + np.asarray(delta), delta))
+    sqrt_t = np.sqrt(t)
+    k = np.zeros(np.shape(z))
+    for _ in range(iterations):
+        vol = vol_at(smile, k)
+        k = 0.5 * vol * vol * t - vol * sqrt_t * z
+    return spot * np.exp(k)
+
+def snap(listed, target):
+    """Index of the listed strike (sorted ascending) nearest to target"""
+    i = int(np.searchsorted(listed, target))
+    if i == 0 or i == len(listed):
+        return min(i, len(listed) - 1)
+    return i - 1 if target - listed[i - 1] <= listed[i] - target else i
+
+def main():
+    """Fit one snapshot's smile and compare smile and nearest-delta short strikes"""
+    import local_engine
+    parser = argparse.ArgumentParser(description="Per-expiry quadratic smile fit")
+    parser.add_argument('day')
+    parser.add_argument('--ticker', default="SPY")
+    parser.add_argument('--data-dir', default=local_engine.SNAPSHOT_DIR)
+    parser.add_argument('--short-delta', type=float, default=local_engine.DEFAULT_PARAMS["SHORT_DELTA"])
+    args = parser.parse_args()
+
+    day = np.datetime64(args.day, 'D')
+    data = local_engine.load_snapshot_day(local_engine.snapshot_path(args.data_dir, args.ticker, day))
+    batch = next(local_engine.iter_day_batches(data, day))
+    rows = batch["expiry"] == batch["expiry"].min()
+    t = local_engine.years_to_expiry(batch["time"], batch["expiry"][rows][0])
+
+    t0 = time.perf_counter()
+    smile = fit_chain(batch["strike"][rows], batch["right"][rows], batch["bid"][rows],
+                      batch["ask"][rows], batch["spot"], t, batch["iv"][rows])
+    ms = (time.perf_counter() - t0) * 1e3
+    if smile is None:
+        sys.exit(f"no smile for {args.ticker} {day}")
+    out = {"time": str(batch["time"]), "spot": batch["spot"], "coef": smile["coef"].round(5).tolist(),
+           "fit_ms": round(ms, 3)}
+    for right, target in ((pricing.PUT, -args.short_delta), (pricing.CALL, args.short_delta)):
+        side = rows & (batch["right"] == right)
+        listed = np.sort(batch["strike"][side])
+        strike = float(delta_to_strike(smile, batch["spot"], t, target, right))
+        nearest = np.flatnonzero(side)[np.nanargmin(np.abs(batch["delta"][side] - target))]
+        out["put" if right == pricing.PUT else "call"] = {
+            "smile_strike": round(strike, 2),
+            "snapped": float(listed[snap(listed, strike)]),
+            "nearest_delta": float(batch["strike"][nearest]),
+        }
+    print(json.dumps(out, indent=2))
+
+if __name__ == "__main__":
+    main()
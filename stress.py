@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Price × volatility × time stress grid for open iron condors.
+
+Every leg of every condor is revalued with Black-Scholes across the grid of
+spot moves, implied-vol shifts and days forward in one broadcasted evaluation:
+an (m condors, 4 legs, spots, vols, days) price tensor. The book P&L surface is
+its sum over condors; its minimum is the worst-case loss that sizing can cap.
+Spot moves are applied to every underlying at once (a correlated gap).
+"""
+
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+import pricing
+
+SPOT_MOVES = (-0.05, -0.03, -0.02, -0.01, 0.0, 0.01, 0.02, 0.03, 0.05)
+VOL_SHIFTS = (-0.05, 0.0, 0.05, 0.10, 0.20)     # absolute IV points added to every leg
+DAYS_FORWARD = (0, 1, 3)
+VOL_FLOOR = 0.01
+
+def make_grid(spot_moves=SPOT_MOVES, vol_shifts=VOL_SHIFTS, days_forward=DAYS_FORWARD):
+    """Scenario axes as float arrays"""
+    return {
+        "spot": np.asarray(spot_moves, dtype=np.float64),
+        "vol": np.asarray(vol_shifts, dtype=np.float64),
+        "days": np.asarray(days_forward, dtype=np.float64),
+    }
+
+GRID = make_grid()
+
+def make_book(strikes, rights, ivs, ratios, qty, spot, t):
+    """Open positions as arrays: (m, 4) strikes/rights/ivs/ratios, (m,) qty/spot/t (years)"""
+    book = {
+        "strike": np.asarray(strikes, dtype=np.float64).reshape(-1, 4),
+        "right": np.asarray(rights, dtype=np.float64).reshape(-1, 4),
+        "iv": np.asarray(ivs, dtype=np.float64).reshape(-1, 4),
+        "ratio": np.broadcast_to(np.asarray(ratios, dtype=np.float64), (len(qty), 4)),
+        "qty": np.asarray(qty, dtype=np.float64),
+        "spot": np.asarray(spot, dtype=np.float64),
+        "t": np.asarray(t, dtype=np.float64),
+    }
+    return book
+
+def scenario_pnl(book, grid=GRID):
+    """P&L in dollars per condor and scenario, shape (m, spots, vols, days); NaN for condors without IV"""
+    m = len(book["qty"])
+    if m == 0:
+        return np.zeros((0, len(grid["spot"]), len(grid["vol"]), len(grid["days"])))
+    x = (slice(None), slice(None), None, None, None)          # (m, 4) → (m, 4, 1, 1, 1)
+    spot = book["spot"][:, None, None, None, None] * (1.0 + grid["spot"])[None, None, :, None, None]
+    vol = np.maximum(book["iv"][x] + grid["vol"][None, None, None, :, None], VOL_FLOOR)
+    t = np.maximum(book["t"][:, None, None, None, None]
+                   - pricing.year_fraction(grid["days"])[None, None, None, None, :], 0.0)
+    value = (pricing.bs_price(spot, book["strike"][x], t, vol, book["right"][x])
+             * book["ratio"][x]).sum(axis=1)
+    now = (pricing.bs_price(book["spot"][:, None], book["strike"], book["t"][:, None],
+                            book["iv"], book["right"]) * book["ratio"]).sum(axis=1)
+    pnl = (value - now[:, None, None, None]) * 100 * book["qty"][:, None, None, None]
+    pnl[~np.isfinite(book["iv"]).all(axis=1)] = np.nan        # bs_price would treat a NaN IV as intrinsic
+    return pnl
+
+def surface(book, grid=GRID):
+    """Book P&L surface, shape (spots, vols, days)"""
+    return scenario_pnl(book, grid).sum(axis=0)
+
+def worst_case(pnl_surface, grid=GRID):
+    """(worst P&L, {spot, vol, days} of the scenario producing it)"""
+    if pnl_surface.size == 0:
+        return 0.0, {}
+    k = np.unravel_index(np.argmin(pnl_surface), pnl_surface.shape)
+    return float(pnl_surface[k]), {
+        "spot": float(grid["spot"][k[0]]),
+        "vol": float(grid["vol"][k[1]]),
+        "days": float(grid["days"][k[2]]),
+    }
+
+def max_quantity(book_surface, unit_surface, loss_cap):
+    """Largest qty with book + qty × unit ≥ -loss_cap in every scenario (may be 0)
+
+    A surface with a NaN scenario (a leg without a finite IV) cannot be checked
+    against the cap, so it allows nothing rather than everything.
+    """
+    if not (np.isfinite(book_surface).all() and np.isfinite(unit_surface).all()):
+        return 0
+    headroom = book_surface + loss_cap
+    if np.any(headroom < 0):
+        return 0
+    losing = unit_surface < 0
+    if not losing.any():
+        return sys.maxsize
+    return int(np.floor((headroom[losing] / -unit_surface[losing]).min()))
+
+def report(pnl_surface, grid=GRID):
+    """Text table of the book surface: spot moves × vol shifts at each horizon"""
+    lines = []
+    worst, at = worst_case(pnl_surface, grid)
+    lines.append(f"worst case {worst:,.0f} at spot {at.get('spot', 0):+.1%}, "
+                 f"vol {at.get('vol', 0):+.2f}, {at.get('days', 0):g}d")
+    for d, days in enumerate(grid["days"]):
+        lines.append(f"\n+{days:g}d      " + "".join(f"{v:>+11.2f}" for v in grid["vol"]))
+        for s, move in enumerate(grid["spot"]):
+            lines.append(f"spot {move:+6.1%}" + "".join(f"{p:>11,.0f}" for p in pnl_surface[s, :, d]))
+    return "\n".join(lines)
+
+def random_book(rng, m):
+    """Synthetic book of m 20-δ-ish 7-DTE condors around spot 500"""
+    spot = np.full(m, 500.0)
+    sp = np.round(spot * rng.uniform(0.96, 0.99, m))
+    sc = np.round(spot * rng.uniform(1.01, 1.04, m))
+    strikes = np.stack([sp - 5, sp, sc, sc + 5], axis=1)
+    rights = np.tile([pricing.PUT, pricing.PUT, pricing.CALL, pricing.CALL], (m, 1))
+    ivs = rng.uniform(0.12, 0.25, (m, 4))
+    return make_book(strikes, rights, ivs, [1, -1, -1, 1], rng.integers(1, 20, m), spot,
+                     pricing.year_fraction(rng.uniform(1, 8, m)))
+
+def benchmark(condors=500, repeat=20, seed=0):
+    """Milliseconds per full-grid evaluation of a synthetic book"""
+    book = random_book(np.random.default_rng(seed), condors)
+    surface(book)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        surface(book)
+    return (time.perf_counter() - t0) / repeat * 1e3
+
+def main():
+    """Stress report for an engine checkpoint's open book, or a benchmark"""
+    parser = argparse.ArgumentParser(description="HV-7 condor stress grid")
+    parser.add_argument('--checkpoint', help="local_engine checkpoint to report on")
+    parser.add_argument('--data-dir', default=None, help="snapshot dir for the checkpoint's quotes")
+    parser.add_argument('--bench', type=int, metavar="CONDORS", help="time the grid for a synthetic book")
+    args = parser.parse_args()
+
+    if args.bench:
+        print(json.dumps({"condors": args.bench, "scenarios": int(np.prod([len(a) for a in GRID.values()])),
+                          "ms": round(benchmark(args.bench), 2)}))
+    if args.checkpoint:
+        import local_engine
+        book = local_engine.checkpoint_book(args.checkpoint, args.data_dir or local_engine.SNAPSHOT_DIR)
+        print(f"{len(book['qty'])} open condors")
+        print(report(surface(book)))
+
+if __name__ == "__main__":
+    main()
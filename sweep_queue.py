@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Distributed, resumable parameter-sweep queue on a shared filesystem.
+
+The queue is a directory, so any number of worker processes on any number of
+hosts that mount it can cooperate without a coordinator:
+
+    pending/<job>.json             waiting to be claimed
+    running/<job>__<worker>.json   claimed; its mtime is the worker heartbeat
+    done/<job>.json                metrics, first writer wins (idempotent)
+    failed/<job>.json              gave up after MAX_ATTEMPTS
+    checkpoints/                   local-engine checkpoints, so a re-queued job
+                                   resumes mid-run instead of from its start date
+
+Claims are atomic renames, which stay atomic on NFS, unlike SQLite WAL (it needs
+shared memory and is unsafe across hosts). Jobs whose heartbeat is older than
+STALE_AFTER seconds are put back in pending by whichever worker notices first.
+"""
+
+import os
+import json
+import time
+import glob
+import socket
+import hashlib
+import argparse
+import itertools
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime
+
+import local_engine
+import results_store
+
+QUEUE_DIR = "data/sweeps/default"
+HEARTBEAT = 10          # seconds between heartbeats
+STALE_AFTER = 60        # seconds without heartbeat before a job is re-queued
+MAX_ATTEMPTS = 3
+POLL = 2
+
+STATES = ("pending", "running", "done", "failed", "checkpoints")
+
+def log(message):
+    """Log message with timestamp"""
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}\n", end="", flush=True)
+
+def job_id(params, start, end):
+    """Stable id of one backtest: the same grid point is never queued twice"""
+    key = json.dumps({"params": params, "start": start, "end": end}, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+def write_json(path, payload, exclusive=False):
+    """Atomically write JSON; exclusive=True never replaces an existing file"""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(payload, f, indent=2)
+    try:
+        if exclusive:
+            os.link(tmp, path)          # fails if another writer got there first
+        else:
+            os.replace(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def read_json(path):
+    """Read JSON, or None if the file vanished underneath us"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+# -------- QUEUE -------------------------------------------------------------
+def init_queue(queue_dir):
+    """Create the queue directory layout"""
+    for state in STATES:
+        os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+
+def expand_grid(grid):
+    """Cartesian product of {param: [values]} as a list of param dicts"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def enqueue(queue_dir, grid, base=None, start=local_engine.START, end=local_engine.END):
+    """Queue every grid point not already pending, running, done or failed"""
+    init_queue(queue_dir)
+    added = 0
+    for point in expand_grid(grid):
+        params = dict(base or {}, **point)
+        jid = job_id(params, start, end)
+        if job_known(queue_dir, jid):
+            continue
+        write_json(os.path.join(queue_dir, "pending", f"{jid}.json"), {
+            "id": jid,
+            "params": params,
+            "start": start,
+            "end": end,
+            "attempts": 0,
+        }, exclusive=True)
+        added += 1
+    return added
+
+def job_known(queue_dir, jid):
+    """True if the job exists in any state"""
+    return any(os.path.exists(os.path.join(queue_dir, s, f"{jid}.json"))
+               for s in ("pending", "done", "failed")) or \
+        bool(glob.glob(os.path.join(queue_dir, "running", f"{jid}__*.json")))
+
+def claim(queue_dir, worker):
+    """Atomically move one pending job to running; returns (job, running path) or None"""
+    for path in sorted(glob.glob(os.path.join(queue_dir, "pending", "*.json"))):
+        jid = os.path.basename(path)[:-5]
+        running = os.path.join(queue_dir, "running", f"{jid}__{worker}.json")
+        try:
+            os.rename(path, running)
+        except FileNotFoundError:
+            continue                    # another worker won this one
+        os.utime(running)
+        job = read_json(running)
+        if job is not None:
+            return job, running
+    return None
+
+def requeue_stale(queue_dir, stale_after=STALE_AFTER):
+    """Put jobs whose worker stopped heartbeating back in pending; returns how many"""
+    now = time.time()
+    moved = 0
+    for path in glob.glob(os.path.join(queue_dir, "running", "*.json")):
+        try:
+            if now - os.path.getmtime(path) < stale_after:
+                continue
+        except FileNotFoundError:
+            continue
+        job = read_json(path)
+        if job is None:
+            continue
+        jid = job["id"]
+        if os.path.exists(os.path.join(queue_dir, "done", f"{jid}.json")):
+            os.remove(path)             # finished but the running file was left behind
+            continue
+        state = "failed" if job["attempts"] + 1 >= MAX_ATTEMPTS else "pending"
+        job["attempts"] += 1
+        if write_json(os.path.join(queue_dir, state, f"{jid}.json"), job, exclusive=True):
+            moved += 1
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return moved
+
+def heartbeat(path, stop):
+    """Touch the running file until stop is set or the job is taken away"""
+    while not stop.wait(HEARTBEAT):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return
+
+# -------- WORKER ------------------------------------------------------------
+def run_job(queue_dir, job, running, engine_args):
+    """Run one claimed job and record its outcome"""
+    jid = job["id"]
+    stop = threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(running, stop), daemon=True)
+    beat.start()
+    try:
+        metrics = local_engine.run_backtest(
+            job["params"], job["start"], job["end"],
+            checkpoint_dir=os.path.join(queue_dir, "checkpoints"), checkpoint_every=5,
+            resume=True, **engine_args)
+        write_json(os.path.join(queue_dir, "done", f"{jid}.json"),
+                   dict(job, metrics=metrics, finished=datetime.now().isoformat()),
+                   exclusive=True)
+        log(f"done {jid}: {json.dumps(metrics)}")
+    except Exception:
+        job["attempts"] += 1
+        job["error"] = traceback.format_exc(limit=3)
+        state = "failed" if job["attempts"] >= MAX_ATTEMPTS else "pending"
+        write_json(os.path.join(queue_dir, state, f"{jid}.json"), job, exclusive=True)
+        log(f"{state} {jid}: {job['error'].strip().splitlines()[-1]}")
+    finally:
+        stop.set()
+        try:
+            os.remove(running)
+        except FileNotFoundError:
+            pass
+
+def work(queue_dir, worker=None, engine_args=None, exit_when_idle=True):
+    """Claim and run jobs until the queue is drained; returns jobs run"""
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    engine_args = engine_args or {}
+    ran = 0
+    while True:
+        requeue_stale(queue_dir)
+        claimed = claim(queue_dir, worker)
+        if claimed is None:
+            counts = status(queue_dir)
+            if exit_when_idle and counts["pending"] == 0 and counts["running"] == 0:
+                return ran
+            time.sleep(POLL)
+            continue
+        run_job(queue_dir, *claimed, engine_args)
+        ran += 1
+
+def status(queue_dir):
+    """Number of jobs in each state"""
+    return {s: len(glob.glob(os.path.join(queue_dir, s, "*.json")))
+            for s in ("pending", "running", "done", "failed")}
+
+def results(queue_dir):
+    """Finished jobs as a list of {id, params, metrics}"""
+    out = []
+    for path in sorted(glob.glob(os.path.join(queue_dir, "done", "*.json"))):
+        job = read_json(path)
+        if job is not None:
+            out.append({"id": job["id"], "params": job["params"], "metrics": job["metrics"]})
+    return out
+
+def collect(queue_dir, db=results_store.RESULTS_DB):
+    """Bulk-insert every finished job into the results store; returns rows written"""
+    src = results_store.source_hash(local_engine.__file__, local_engine.kernels.__file__)
+    runs = []
+    for path in sorted(glob.glob(os.path.join(queue_dir, "done", "*.json"))):
+        job = read_json(path)
+        if job is not None:
+            runs.append((src, job["params"], job["start"], job["end"], job["metrics"]))
+    return results_store.record_many(results_store.connect(db), runs, origin="local")
+
+def main():
+    """Sweep queue command line"""
+    parser = argparse.ArgumentParser(description="Distributed HV-7 parameter sweep queue")
+    parser.add_argument('command', choices=["enqueue", "work", "status", "results", "collect"])
+    parser.add_argument('--queue', default=QUEUE_DIR)
+    parser.add_argument('--grid', help="JSON file of {param: [values]}")
+    parser.add_argument('--base', default='{}', help="JSON params shared by every job")
+    parser.add_argument('--start', default=local_engine.START)
+    parser.add_argument('--end', default=local_engine.END)
+    parser.add_argument('--procs', type=int, default=1, help="worker processes on this host")
+    parser.add_argument('--data-dir', default=local_engine.SNAPSHOT_DIR)
+    parser.add_argument('--cboe-dir', default=local_engine.CBOE_DIR)
+    parser.add_argument('--db', default=results_store.RESULTS_DB, help="results store for collect")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        with open(args.grid) as f:
+            grid = json.load(f)
+        added = enqueue(args.queue, grid, json.loads(args.base), args.start, args.end)
+        log(f"queued {added} new jobs in {args.queue}")
+    elif args.command == "work":
+        init_queue(args.queue)
+        engine_args = {"data_dir": args.data_dir, "cboe_dir": args.cboe_dir}
+        if args.procs == 1:
+            work(args.queue, engine_args=engine_args)
+        else:
+            procs = [multiprocessing.Process(target=work, args=(args.queue, None, engine_args))
+                     for _ in range(args.procs)]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+        log(f"queue drained: {status(args.queue)}")
+    elif args.command == "status":
+        print(json.dumps(status(args.queue), indent=2))
+    elif args.command == "collect":
+        log(f"recorded {collect(args.queue, args.db)} runs in {args.db}")
+    else:
+        print(json.dumps(results(args.queue), indent=2))
+
+if __name__ == "__main__":
+    main()
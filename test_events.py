@@ -0,0 +1,26 @@
+"""Tests of event logs and exit attribution."""
+
+import pytest
+
+import events
+
+def run(ivr, r):
+    """One run's events: condor 1 opened at ivr and closed at take-profit with r"""
+    return [events.event("2024-01-02T15:40", "open", "SPY", id=1, qty=1, credit=1.0, ivr=ivr),
+            events.event("2024-01-05T15:40", "exit", "SPY", "tp", id=1, qty=1, credit=1.0, mark=0.5, r=r)]
+
+@pytest.mark.parametrize("suffix", [".hv7e", ".ndjson"])
+def test_runs_sharing_ids_join_apart(tmp_path, suffix):
+    """Two runs appended to one log both use id 1, and each exit gets its own entry IV rank"""
+    path = str(tmp_path / f"ev{suffix}")
+    events.append(path, run(0.2, 0.5), run="a")
+    events.append(path, run(0.8, 0.5), run="b")
+    assert events.attribution(events.load(path))["exits"]["tp"]["entry_ivr"] == pytest.approx(0.5)
+    assert {rec["run"] for rec in events.to_records(events.load(path))} == {"a", "b"}
+
+def test_append_refuses_other_version(tmp_path):
+    """Records are never appended behind a header of another version"""
+    path = tmp_path / "ev.hv7e"
+    path.write_bytes(events.HEADER.pack(events.MAGIC, 1, 60))
+    with pytest.raises(ValueError):
+        events.append(str(path), run(0.2, 0.5), run="a")
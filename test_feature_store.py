@@ -0,0 +1,26 @@
+"""Tests of feature store builds and staleness."""
+
+import os
+
+import feature_store
+
+CSV = "20240102,13.2,13.2,13.2,13.2\n20240103,14.0,14.0,14.0,14.0\n20240104,14.1,14.1,14.1,14.1\n"
+
+def test_rows_are_previous_close(tmp_path):
+    """The row of session D holds the close of D-1 and nothing else"""
+    (tmp_path / "vix.csv").write_text(CSV)
+    store = feature_store.open_feature_store(str(tmp_path / "vix.csv"), str(tmp_path / "store"))
+    assert store.dtype.names == ("date", "vix")
+    assert [str(d) for d in store["date"]] == ["2024-01-03", "2024-01-04"]
+    assert list(store["vix"]) == [13.2, 14.0]
+
+def test_missing_meta_rebuilds(tmp_path):
+    """A store whose .json was lost is rebuilt, leaving no temp files behind"""
+    (tmp_path / "vix.csv").write_text(CSV)
+    source, store_dir = str(tmp_path / "vix.csv"), str(tmp_path / "store")
+    feature_store.open_feature_store(source, store_dir)
+    path = feature_store.store_path(store_dir, "vix", feature_store.source_hash(source))
+    os.remove(path[:-4] + ".json")
+    assert len(feature_store.open_feature_store(source, store_dir)) == 2
+    assert feature_store.read_meta(path)["version"] == feature_store.STORE_VERSION
+    assert sorted(os.listdir(store_dir)) == sorted(os.path.basename(path[:-4]) + ext for ext in (".json", ".npy"))
@@ -0,0 +1,65 @@
+"""Parity of every available kernel backend with the python reference."""
+
+import numpy as np
+import pytest
+
+import kernels
+
+# one expiry: put/call pairs at 400..405, the 402 put delta and the 404 call bid unquoted
+STRIKE = np.repeat(np.arange(400.0, 406.0), 2)
+RIGHT = np.tile(np.array([0, 1], dtype=np.int8), 6)
+DELTA = np.array([0.80, -0.15, 0.65, -0.22, 0.50, np.nan, 0.35, -0.48, 0.21, -0.62, 0.10, -0.79])
+ELIGIBLE = np.array([True] * 10 + [False, True])
+BID = np.array([5.0, 0.4, 4.1, 0.7, 3.2, 1.1, 2.4, 1.6, np.nan, 2.3, 1.1, 3.1])
+ASK = BID + 0.1
+LEGS = np.array([[1, 3, 6, 10], [3, 5, 8, 10], [1, 7, 2, 4]])
+
+BACKENDS = [name for name in kernels.BACKENDS if name != "python"]
+REF = kernels.BACKENDS["python"]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("want_right,target", [(1, -0.20), (0, 0.20), (1, -0.50), (0, 0.95)])
+def test_nearest_delta(backend, want_right, target):
+    """Same contract picked, NaN deltas and ineligible rows skipped"""
+    got = kernels.BACKENDS[backend]["nearest_delta"](DELTA, RIGHT, ELIGIBLE, want_right, target)
+    assert got == REF["nearest_delta"](DELTA, RIGHT, ELIGIBLE, want_right, target)
+
+def test_nearest_delta_skips_nan():
+    """NaN deltas are skipped: the 402 put is never a candidate"""
+    assert REF["nearest_delta"](DELTA, RIGHT, ELIGIBLE, 1, -0.40) == 7
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("want_right,target", [(1, 402.0), (0, 405.0), (1, 402.5), (0, 399.0)])
+def test_match_strike(backend, want_right, target):
+    """Same row for listed strikes, -1 for unlisted or ineligible ones"""
+    got = kernels.BACKENDS[backend]["match_strike"](STRIKE, RIGHT, ELIGIBLE, want_right, target)
+    assert got == REF["match_strike"](STRIKE, RIGHT, ELIGIBLE, want_right, target)
+
+def test_match_strike_unmatched():
+    """Off-grid and ineligible strikes are not matched"""
+    assert REF["match_strike"](STRIKE, RIGHT, ELIGIBLE, 1, 402.5) == -1
+    assert REF["match_strike"](STRIKE, RIGHT, ELIGIBLE, 0, 405.0) == -1
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_condor_marks(backend):
+    """Same credit and cost, NaN wherever a leg is unquoted"""
+    credit, cost = kernels.BACKENDS[backend]["condor_marks"](BID, ASK, LEGS)
+    ref_credit, ref_cost = REF["condor_marks"](BID, ASK, LEGS)
+    np.testing.assert_allclose(credit, ref_credit, equal_nan=True)
+    np.testing.assert_allclose(cost, ref_cost, equal_nan=True)
+    assert np.isnan(credit[1]) and np.isnan(cost[1])
+
+def test_random_chains():
+    """No backend disagrees with python over the randomized parity check"""
+    assert not any(kernels.check_parity(trials=50).values())
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("ratios", [kernels.CONDOR_RATIOS, [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0]])
+def test_aggregate(backend, ratios):
+    """Same ratio-weighted sum per condor, NaN only where a weighted leg is NaN"""
+    got = kernels.BACKENDS[backend]["aggregate"](DELTA, LEGS, np.asarray(ratios))
+    np.testing.assert_allclose(got, REF["aggregate"](DELTA, LEGS, np.asarray(ratios)), equal_nan=True)
+
+def test_aggregate_short_legs():
+    """Short-leg ratios pick that leg's value out of each condor"""
+    np.testing.assert_allclose(kernels.aggregate(DELTA, LEGS, [0.0, 0.0, 1.0, 0.0]), DELTA[LEGS[:, 2]])
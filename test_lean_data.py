@@ -0,0 +1,18 @@
+"""Tests of the Lean minute zip parser."""
+
+import io
+
+import numpy as np
+
+import lean_data
+
+def test_one_sided_quote_row():
+    """Blank bid OHLC fields parse as NaN instead of failing the whole member"""
+    text = (b"34200000,1000,1100,900,1000,10,1200,1300,1100,1200,12\n"
+            b"34260000,,,,,0,1000,1100,900,1000,10\n"
+            b"34320000,1000,1100,900,1000,10,,,,,0")
+    rows = lean_data.parse_csv(io.BytesIO(text), lean_data.QUOTE_COLUMNS)
+    assert rows.shape == (3, lean_data.QUOTE_COLUMNS)
+    assert np.isnan(rows[1, 1:5]).all() and rows[1, 9] == 1000
+    assert np.isnan(rows[2, 6:10]).all() and rows[2, 4] == 1000
+    assert np.isfinite(rows[0]).all()
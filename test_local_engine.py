@@ -0,0 +1,37 @@
+"""Tests of the local engine's run-control logic that need no snapshot data."""
+
+import numpy as np
+
+import local_engine
+
+def engine(**params):
+    """An engine over January 2024 on one underlying, with no vol history"""
+    params = dict({"UNDERLYINGS": {"SPY": ["VIX", 10.0]}, "EARLY_ABORT": True}, **params)
+    stores = {"SPY": {"date": np.array([], dtype='datetime64[D]'), "vix": np.array([])}}
+    bt = local_engine.LocalBacktest(stores, params, "2024-01-02", "2024-01-31")
+    bt.day = np.datetime64("2024-01-02")
+    bt.condors[1] = {"underlying": "SPY", "risk": 400.0}
+    for _ in range(10):
+        bt.criteria.add_trade(-0.5)
+    return bt
+
+def test_abort_without_rolls():
+    """Ten losers with one open condor and a month of entries cannot reach the win rate"""
+    assert engine(ROLL=False).abort_reason() == "win_rate"
+
+def test_rolls_keep_run_alive():
+    """Same-bar rolls add closed trades, so the same book must not be given up on"""
+    assert engine(ROLL=True).abort_reason() is None
+
+def test_no_abort_when_disabled():
+    """Without EARLY_ABORT only the drawdown guard can stop a run"""
+    assert engine(ROLL=False, EARLY_ABORT=False).abort_reason() is None
+
+def test_missing_wanted_chain_yields_idle_frames(tmp_path):
+    """A session whose only wanted chain has no file still reaches the engine"""
+    (tmp_path / "qqq").mkdir()
+    (tmp_path / "qqq" / "20240103.npz").touch()
+    frames = list(local_engine.iter_snapshots(str(tmp_path), ["SPY", "QQQ"], "2024-01-01", "2024-01-31",
+                                              minutes=[940, 950], wanted=lambda day: {"SPY"}))
+    assert [str(t) for t, _ in frames] == ["2024-01-03T15:40", "2024-01-03T15:50"]
+    assert all(batches == {} for _, batches in frames)
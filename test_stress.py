@@ -0,0 +1,29 @@
+"""Tests of stress-grid sizing."""
+
+import numpy as np
+
+import pricing
+import stress
+
+def condor(ivs, qty=1):
+    """One 7-DTE 490/495/505/510 condor around spot 500"""
+    return stress.make_book([490, 495, 505, 510], [pricing.PUT, pricing.PUT, pricing.CALL, pricing.CALL],
+                            ivs, [1, -1, -1, 1], [qty], [500.0], [pricing.year_fraction(7)])
+
+def test_cap_limits_quantity():
+    """A finite book and candidate are sized under the cap"""
+    unit = stress.surface(condor([0.20, 0.18, 0.16, 0.17]))
+    qty = stress.max_quantity(np.zeros_like(unit), unit, 5000.0)
+    assert 0 < qty < 1000
+    assert (qty * unit).min() >= -5000.0
+
+def test_nan_leg_iv_allows_nothing():
+    """A candidate leg without IV cannot be checked, so the cap does not switch off"""
+    unit = stress.surface(condor([0.20, np.nan, 0.16, 0.17]))
+    assert stress.max_quantity(np.zeros_like(unit), unit, 5000.0) == 0
+
+def test_nan_book_allows_nothing():
+    """An open condor without IV poisons the book surface the same way"""
+    book = stress.surface(condor([np.nan, 0.18, 0.16, 0.17], qty=3))
+    unit = stress.surface(condor([0.20, 0.18, 0.16, 0.17]))
+    assert stress.max_quantity(book, unit, 5000.0) == 0
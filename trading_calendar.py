@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Precomputed NYSE trading calendar and weekly-expiry index.
+
+Built once per year range into flat integer arrays indexed by calendar-day
+offset, so trading-DTE, next session, next valid entry day, next weekly expiry
+and the time-exit date are array lookups instead of per-condor datetime
+arithmetic. Holidays follow the NYSE rules (weekend observance, Good Friday,
+Juneteenth from 2022) plus the ad-hoc closures in SPECIAL_CLOSURES.
+"""
+
+import json
+import argparse
+import numpy as np
+from datetime import date, timedelta
+
+ENTRY_WEEKDAYS = (0, 2)                 # Monday, Wednesday
+EXIT_DTE = 2                            # time exit at ≤ 2 trading days to expiry
+SPECIAL_CLOSURES = (
+    "2012-10-29", "2012-10-30",         # Hurricane Sandy
+    "2018-12-05",                       # President G.H.W. Bush
+    "2025-01-09",                       # President Carter
+)
+
+def easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+def nth_weekday(year, month, weekday, n):
+    """n-th weekday (Monday=0) of a month; n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def observed(day):
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+def nyse_holidays(year):
+    """Full-day NYSE closures in one year"""
+    days = [
+        nth_weekday(year, 1, 0, 3),                     # Martin Luther King Jr. Day
+        nth_weekday(year, 2, 0, 3),                     # Washington's Birthday
+        easter(year) - timedelta(days=2),               # Good Friday
+        nth_weekday(year, 5, 0, -1),                    # Memorial Day
+        observed(date(year, 7, 4)),                     # Independence Day
+        nth_weekday(year, 9, 0, 1),                     # Labor Day
+        nth_weekday(year, 11, 3, 4),                    # Thanksgiving
+        observed(date(year, 12, 25)),                   # Christmas
+    ]
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:                         # no Friday-before make-up across years
+        days.append(observed(new_year))
+    if year >= 2022:
+        days.append(observed(date(year, 6, 19)))        # Juneteenth
+    days += [date.fromisoformat(d) for d in SPECIAL_CLOSURES if d.startswith(str(year))]
+    return sorted(days)
+
+class TradingCalendar:
+    """Session and expiry lookups over [first_year, last_year] as integer arrays"""
+
+    def __init__(self, first_year, last_year, entry_weekdays=ENTRY_WEEKDAYS):
+        self.origin = np.datetime64(f"{first_year}-01-01", 'D')
+        end = np.datetime64(f"{last_year + 1}-01-01", 'D')
+        days = np.arange(self.origin, end, dtype='datetime64[D]')
+        weekday = (days.astype(np.int64) + 3) % 7
+        holidays = np.array([np.datetime64(d, 'D') for y in range(first_year, last_year + 1)
+                             for d in nyse_holidays(y)], dtype='datetime64[D]')
+        open_ = (weekday < 5) & ~np.isin(days, holidays)
+
+        self.days = days
+        self.is_open = open_
+        self.sessions = days[open_]
+        # sessions on or before each calendar day: trading DTE is a difference of two rows
+        self.count = np.cumsum(open_).astype(np.int64)
+        # next session on or after each calendar day (len(sessions) past the end)
+        self.next = np.searchsorted(self.sessions, days, side='left')
+
+        # an entry weekday that is a holiday moves to the next session
+        entry = np.zeros(len(days), dtype=bool)
+        nxt = self.next[np.isin(weekday, entry_weekdays)]
+        entry[np.flatnonzero(open_)[nxt[nxt < len(self.sessions)]]] = True
+        self.is_entry = entry
+        self.entry_count = np.cumsum(entry).astype(np.int64)
+
+        # weekly expiry: last session of each Monday-based week (Friday, or Thursday before a holiday)
+        week = (self.sessions.astype(np.int64) + 3) // 7
+        self.expiries = self.sessions[np.append(week[1:] != week[:-1], True)]
+        self.next_expiry = np.searchsorted(self.expiries, days, side='left')
+
+    def offset(self, day):
+        """Calendar-day row of day (array or scalar)"""
+        off = (np.asarray(day, dtype='datetime64[D]') - self.origin).astype(np.int64)
+        if np.any((off < 0) | (off >= len(self.days))):
+            raise ValueError(f"{day} is outside the calendar {self.days[0]} .. {self.days[-1]}")
+        return off
+
+    def is_session(self, day):
+        """True where day is an NYSE session"""
+        return self.is_open[self.offset(day)]
+
+    def trading_dte(self, day, expiry):
+        """Sessions after day up to and including expiry (broadcasts)"""
+        return self.count[self.offset(expiry)] - self.count[self.offset(day)]
+
+    def next_session(self, day):
+        """First session on or after day"""
+        return self.sessions[self.next[self.offset(day)]]
+
+    def is_entry_day(self, day):
+        """Scheduled entry day, or the session it was moved to by a holiday"""
+        return bool(self.is_entry[self.offset(day)])
+
+    def next_entry_day(self, day):
+        """First entry session on or after day"""
+        off = self.offset(day)
+        hit = np.flatnonzero(self.is_entry[off:])
+        return self.days[off + hit[0]] if len(hit) else None
+
+    def entry_days_between(self, after, through):
+        """Entry sessions in (after, through]"""
+        return int(self.entry_count[self.offset(through)] - self.entry_count[self.offset(after)])
+
+    def weekly_expiry(self, day):
+        """First weekly expiry session on or after day"""
+        return self.expiries[self.next_expiry[self.offset(day)]]
+
+    def exit_date(self, expiry, exit_dte=EXIT_DTE):
+        """First session whose trading DTE to expiry is ≤ exit_dte"""
+        return self.sessions[max(self.count[self.offset(expiry)] - 1 - exit_dte, 0)]
+
+_calendars = {}
+
+def calendar(first_year, last_year):
+    """Shared calendar covering the years, built on first use"""
+    key = (int(first_year), int(last_year))
+    if key not in _calendars:
+        _calendars[key] = TradingCalendar(*key)
+    return _calendars[key]
+
+def for_window(start, end, pad_years=1):
+    """Calendar covering [start, end] plus pad_years either side"""
+    first = int(str(np.datetime64(start, 'Y'))) - pad_years
+    last = int(str(np.datetime64(end, 'Y'))) + pad_years
+    return calendar(first, last)
+
+def main():
+    """Print sessions, holidays and expiries of a year"""
+    parser = argparse.ArgumentParser(description="NYSE trading calendar")
+    parser.add_argument('year', type=int)
+    args = parser.parse_args()
+
+    cal = calendar(args.year, args.year)
+    print(json.dumps({
+        "sessions": int(len(cal.sessions)),
+        "holidays": [str(d) for d in nyse_holidays(args.year)],
+        "weekly_expiries_moved": [str(d) for d in cal.expiries if (d.astype(np.int64) + 3) % 7 != 4],
+        "entry_days_moved": [str(d) for d in cal.days[cal.is_entry]
+                             if (d.astype(np.int64) + 3) % 7 not in ENTRY_WEEKDAYS],
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Watch mode: pre-flight and a fast local backtest on every strategy save.
+
+Watches the project directories (inotify through ctypes, mtime polling where
+inotify is unavailable), debounces bursts of editor writes, then for each
+changed main.py runs preflight.check and a snapshot-only local_engine backtest
+over a short window with the strategy's own CONFIG constants. Metrics are
+printed as a diff against the previous save of the same project.
+"""
+
+import os
+import sys
+import json
+import time
+import ctypes
+import select
+import struct
+import argparse
+import ctypes.util
+from datetime import datetime, timedelta
+
+import preflight
+import local_engine
+import feature_store
+
+PROJECTS = ("IronCondor", "IronCondorTest")
+WINDOW_DAYS = 30                # short window ending at local_engine.END
+DEBOUNCE = 0.3                  # seconds of quiet before a burst of writes counts as one save
+POLL = 0.5                      # mtime polling interval without inotify
+METRICS = ("total_trades", "win_rate", "avg_r", "sharpe_ratio", "total_return", "max_drawdown")
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+EVENT = struct.Struct("iIII")
+
+def log(message):
+    """Log message with timestamp"""
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+# -------- WATCHERS ----------------------------------------------------------
+class InotifyWatcher:
+    """Directory watcher on Linux inotify; yields sets of changed file paths"""
+
+    def __init__(self, dirs):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for d in dirs:
+            wd = libc.inotify_add_watch(self.fd, os.path.abspath(d).encode(),
+                                        IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+            self.dirs[wd] = d
+
+    def _drain(self):
+        changed = set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        i = 0
+        while i < len(buf):
+            wd, _, _, size = EVENT.unpack_from(buf, i)
+            name = buf[i + EVENT.size:i + EVENT.size + size].rstrip(b"\0").decode()
+            i += EVENT.size + size
+            if wd in self.dirs and name:
+                changed.add(os.path.join(self.dirs[wd], name))
+        return changed
+
+    def wait(self):
+        """Block until a save, then collect events until DEBOUNCE seconds of quiet"""
+        select.select([self.fd], [], [])
+        changed = self._drain()
+        while select.select([self.fd], [], [], DEBOUNCE)[0]:
+            changed |= self._drain()
+        return changed
+
+class PollingWatcher:
+    """Fallback watcher comparing file mtimes"""
+
+    def __init__(self, dirs):
+        self.dirs = list(dirs)
+        self.mtimes = self._scan()
+
+    def _scan(self):
+        out = {}
+        for d in self.dirs:
+            for name in os.listdir(d):
+                path = os.path.join(d, name)
+                try:
+                    out[path] = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    pass
+        return out
+
+    def wait(self):
+        """Block until some mtime changes and stays put for DEBOUNCE seconds"""
+        while True:
+            time.sleep(POLL)
+            now = self._scan()
+            if now != self.mtimes:
+                break
+        while True:
+            time.sleep(DEBOUNCE)
+            settled = self._scan()
+            if settled == now:
+                break
+            now = settled
+        changed = {p for p in set(now) | set(self.mtimes) if now.get(p) != self.mtimes.get(p)}
+        self.mtimes = now
+        return changed
+
+def make_watcher(dirs, polling=False):
+    """inotify watcher when available, else polling"""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError) as e:
+            log(f"inotify unavailable ({e}); polling every {POLL}s")
+    return PollingWatcher(dirs)
+
+# -------- FEEDBACK ----------------------------------------------------------
+def diff(previous, metrics):
+    """One line per metric: value and change since the previous save"""
+    lines = []
+    for key in METRICS:
+        now = metrics.get(key, 0)
+        if previous is None:
+            lines.append(f"  {key:14s} {now:>10.4f}")
+        else:
+            delta = now - previous.get(key, 0)
+            mark = "" if abs(delta) < 1e-12 else f"  ({delta:+.4f})"
+            lines.append(f"  {key:14s} {previous.get(key, 0):>10.4f} -> {now:>10.4f}{mark}")
+    return "\n".join(lines)
+
+def evaluate(project, args, previous):
+    """Pre-flight and backtest one project; returns its metrics or None"""
+    path = os.path.join(project, "main.py")
+    t0 = time.perf_counter()
+    problems, params = preflight.check(path)
+    if problems:
+        log(f"{project}: pre-flight failed")
+        for problem in problems:
+            print(f"  {problem}")
+        return None
+    params.update(args.params)
+    try:
+        metrics = local_engine.run_backtest(params, args.start, args.end, args.data_dir,
+                                            args.cboe_dir, args.store_dir)
+    except Exception as e:
+        log(f"{project}: local backtest failed: {type(e).__name__}: {e}")
+        return None
+    log(f"{project}: {args.start} → {args.end} in {time.perf_counter() - t0:.2f}s")
+    print(diff(previous, metrics), flush=True)
+    return metrics
+
+def main():
+    """Watch the strategy projects and re-run on every save"""
+    parser = argparse.ArgumentParser(description="Re-run pre-flight and a local backtest on every save")
+    parser.add_argument('projects', nargs='*', default=list(PROJECTS))
+    parser.add_argument('--days', type=int, default=WINDOW_DAYS, help="window length ending at --end")
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=local_engine.END)
+    parser.add_argument('--data-dir', default=local_engine.SNAPSHOT_DIR)
+    parser.add_argument('--cboe-dir', default=local_engine.CBOE_DIR)
+    parser.add_argument('--store-dir', default=feature_store.STORE_DIR)
+    parser.add_argument('--params', type=json.loads, default={},
+                        help="JSON overrides applied on top of the strategy CONFIG")
+    parser.add_argument('--poll', action='store_true', help="force mtime polling")
+    parser.add_argument('--once', action='store_true', help="evaluate once and exit")
+    args = parser.parse_args()
+    args.start = args.start or (datetime.strptime(args.end, "%Y-%m-%d")
+                                - timedelta(days=args.days)).strftime("%Y-%m-%d")
+
+    projects = [p for p in args.projects if os.path.isfile(os.path.join(p, "main.py"))]
+    last = {p: evaluate(p, args, None) for p in projects}
+    if args.once:
+        sys.exit(0 if all(m is not None for m in last.values()) else 1)
+
+    watcher = make_watcher(projects, args.poll)
+    log(f"watching {', '.join(projects)} ({type(watcher).__name__}); Ctrl-C to stop")
+    try:
+        while True:
+            changed = watcher.wait()
+            for project in projects:
+                if os.path.join(project, "main.py") in changed:
+                    metrics = evaluate(project, args, last[project])
+                    if metrics is not None:
+                        last[project] = metrics
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()